@@ -26,6 +26,8 @@ echo "Make migrations..."
 python manage.py makemigrations --noinput
 echo "Running migrations..."
 python manage.py migrate --noinput
+echo "Indexing workflow versions..."
+python manage.py import_workflow_versions
 
 # Create superuser if it doesn't exist
 if [ "$DJANGO_SUPERUSER_USERNAME" ] && [ "$DJANGO_SUPERUSER_PASSWORD" ] && [ "$DJANGO_SUPERUSER_EMAIL" ]; then
@@ -7,7 +7,8 @@ from .models import (
     UnitSystem, UnitType, UnitDefinition, UnitCategory, UnitSystemCategoryDefinition,
     DataSource, DataSourceComponent, ScenarioClass, ScenarioComponentLink,
     ObjectType, ObjectInstance, ObjectTypeProperty, MainClass, MainClassHistory, ScenarioLog, Workflow, 
-    WorkflowScheduler, WorkflowSchedulerLog, GapNetworkData
+    WorkflowScheduler, WorkflowSchedulerLog, WorkflowSchedulerLogSummary, WorkflowVersion, GapNetworkData,
+    ScenarioLogSummary, ScenarioSummary
 )
 
 
@@ -80,14 +81,14 @@ class DataSourceAdmin(admin.ModelAdmin):
 # ---------- Data Source Component ----------
 @admin.register(DataSourceComponent)
 class DataSourceComponentAdmin(admin.ModelAdmin):
-    list_display = ('name', 'data_source', 'internal_mode', 'created_date', 'last_updated', 'created_by')
+    list_display = ('name', 'data_source', 'internal_mode', 'independent_periods', 'created_date', 'last_updated', 'created_by')
     list_filter = ('data_source', 'created_by')
     search_fields = ('name', 'description')
     readonly_fields = ('created_date', 'last_updated', 'created_by')
 
     fieldsets = (
         (None, {
-            'fields': ('name', 'description', 'data_source', 'internal_mode', 'file')
+            'fields': ('name', 'description', 'data_source', 'internal_mode', 'independent_periods', 'file')
         }),
         ('Audit Information', {
             'fields': ('created_by', 'created_date', 'last_updated'),
@@ -110,9 +111,11 @@ class ScenarioClassAdmin(admin.ModelAdmin):
         'start_date', 
         'end_date', 
         'created_date', 
-        'created_by'
+        'created_by',
+        'baseline',
+        'storage_mode',
     )
-    list_filter = ('status', 'is_approved', 'created_by')
+    list_filter = ('status', 'is_approved', 'created_by', 'storage_mode')
     search_fields = ('scenario_name', 'description')
     readonly_fields = ('created_date', 'created_by', 'task_id')  # task_id readonly
 
@@ -246,6 +249,7 @@ class WorkflowAdmin(admin.ModelAdmin):
         "updated_at",
         "inputs_config",
         "outputs_config",
+        "execution_mode",
         "cells",
         "preview_cells",
         "code_file",
@@ -298,12 +302,33 @@ class WorkflowAdmin(admin.ModelAdmin):
         return f"{label}: {code}"
     short_cells_preview.short_description = "First Cell"
 
+@admin.register(WorkflowVersion)
+class WorkflowVersionAdmin(admin.ModelAdmin):
+    list_display = ("id", "workflow", "label", "code_hash", "created_by", "created_at")
+    list_filter = ("created_at",)
+    search_fields = ("workflow__component__name", "code_hash", "label")
+    readonly_fields = ("code_hash", "code_file", "ipynb_file", "created_at")
+
 @admin.register(WorkflowScheduler)
 class WorkflowSchedulerAdmin(admin.ModelAdmin):
-    list_display = ("id", "workflow", "cron_expression", "is_active", "last_run", "next_run")
+    list_display = ("id", "workflow", "cron_expression", "overlap_policy", "max_queued", "is_active", "last_run", "next_run")
 
 @admin.register(WorkflowSchedulerLog)
 class WorkflowSchedulerLogAdmin(admin.ModelAdmin):
     list_display = ("scheduler", "timestamp", "status", "message")
     list_filter = ("status", "timestamp")
 
+@admin.register(WorkflowSchedulerLogSummary)
+class WorkflowSchedulerLogSummaryAdmin(admin.ModelAdmin):
+    list_display = ("scheduler", "day", "total", "status_counts", "last_message")
+    list_filter = ("day",)
+
+@admin.register(ScenarioLogSummary)
+class ScenarioLogSummaryAdmin(admin.ModelAdmin):
+    list_display = ("scenario", "day", "total", "max_progress", "last_message")
+    list_filter = ("day",)
+
+@admin.register(ScenarioSummary)
+class ScenarioSummaryAdmin(admin.ModelAdmin):
+    list_display = ("scenario", "object_instance", "object_type_property", "period", "samples", "total", "average", "cumulative")
+    list_filter = ("period",)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Iterable, Optional, Sequence
 
-from django.db.models import Q, QuerySet
+from django.db.models import Count, Max, Q, QuerySet
 from django.utils.dateparse import parse_datetime
 from django.utils import timezone
 
@@ -234,4 +234,39 @@ def get_history(
         )
     )
 
-__all__ = ["get_components", "get_records", "get_history"]
+
+def get_data_stamps(components: Iterable[ComponentLike]) -> dict[int, dict]:
+    """
+    Return {component_id: stamp} describing the Internal data of each component.
+
+    The stamp holds the count and highest id of its records and of their
+    history rows, so any saved, added or deleted value changes it.
+    """
+    ids, names = _split_ids_names(components, id_keys=("id", "component_id"), name_keys=("name", "component_name"))
+    comp_qs = _apply_id_name_filter(get_components(as_queryset=True), "id", "name", ids, names)
+    stamps = {
+        int(cid): {"records": 0, "last_record": None, "history": 0, "last_history": None}
+        for cid in comp_qs.values_list("id", flat=True)
+    }
+
+    records = (
+        MainClass.objects.filter(component_id__in=list(stamps))
+        .order_by()
+        .values("component_id")
+        .annotate(n=Count("data_set_id"), last=Max("data_set_id"))
+    )
+    for r in records:
+        stamps[r["component_id"]].update(records=r["n"], last_record=r["last"])
+
+    history = (
+        MainClassHistory.objects.filter(main_record__component_id__in=list(stamps))
+        .order_by()
+        .values("main_record__component_id")
+        .annotate(n=Count("id"), last=Max("id"))
+    )
+    for h in history:
+        stamps[h["main_record__component_id"]].update(history=h["n"], last_history=h["last"])
+
+    return stamps
+
+__all__ = ["get_components", "get_records", "get_history", "get_data_stamps"]
@@ -44,6 +44,8 @@ class DataSourceComponent(models.Model):
         choices=[("SERIES", "Series"), ("CONSTANTS", "Constants")],
         default="SERIES",
     )
+    # Periods can be computed independently, so scenario runs may be split by date range.
+    independent_periods = models.BooleanField("Independent Periods", default=False)
 
     created_by = models.ForeignKey("auth.User", on_delete=models.SET_NULL, null=True, blank=True)
     created_date = models.DateTimeField(auto_now_add=True)
@@ -63,9 +65,10 @@ class DataSourceComponent(models.Model):
 
 class MainClass(models.Model):
     data_set_id = models.AutoField(primary_key=True, unique=True)
+    # Scenario deletion purges these rows in the background first (services/scenario_purge.py).
     scenario = models.ForeignKey(
         "apiapp.ScenarioClass",
-        on_delete=models.SET_NULL,
+        on_delete=models.CASCADE,
         null=True,
         blank=True,
         related_name="main_records",
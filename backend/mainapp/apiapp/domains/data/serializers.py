@@ -18,7 +18,18 @@ class DataSourceComponentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = DataSourceComponent
-        fields = ["id", "name", "description", "data_source", "internal_mode", "created_by", "created_date", "last_updated", "file"]
+        fields = [
+            "id",
+            "name",
+            "description",
+            "data_source",
+            "internal_mode",
+            "independent_periods",
+            "created_by",
+            "created_date",
+            "last_updated",
+            "file",
+        ]
         read_only_fields = ["created_by", "created_date", "last_updated"]
 
 
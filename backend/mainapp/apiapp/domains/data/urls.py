@@ -1,6 +1,7 @@
 from django.urls import path
 
 from apiapp.domains.data.views import (
+    ComponentExportView,
     DataSourceComponentCreateView,
     DataSourceComponentDetailView,
     DataSourceComponentsBySourceView,
@@ -28,6 +29,7 @@ urlpatterns = [
     path("components/pi-records/<int:component_id>/", PIRecordsView.as_view()),
     path("components/decline-curves/<int:component_id>/", DeclineCurvesView.as_view()),
     path("components/<int:component_id>/workflow-outputs/", WorkflowOutputsView.as_view()),
+    path("components/<int:component_id>/export/<str:fmt>/", ComponentExportView.as_view(), name="component-export"),
 ]
 
 __all__ = ["urlpatterns"]
@@ -14,6 +14,7 @@ from apiapp.domains.integration.pi_client import series as pi_series
 from apiapp.domains.integration.pi_client import value as pi_value
 
 from apiapp.domains.data.models import DataSource, DataSourceComponent, MainClass, MainClassHistory
+from apiapp.services.result_export import QueryTokenAuthentication, export_response, unavailable_reason
 from apiapp.domains.data.serializers import (
     DataSourceComponentSerializer,
     DataSourceSerializer,
@@ -423,6 +424,21 @@ def pi_history_for_component_row(request, component_id, row_id):
         return Response({"error": str(e)}, status=500)
 
 
+class ComponentExportView(APIView):
+    """Download a component's records as csv, xlsx or parquet (streamed, see services/result_export.py)."""
+
+    authentication_classes = [QueryTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, component_id, fmt):
+        component = get_object_or_404(DataSourceComponent, id=component_id)
+        reason = unavailable_reason(fmt)
+        if reason:
+            return Response({"error": reason}, status=status.HTTP_400_BAD_REQUEST)
+        records = MainClass.objects.filter(component=component)
+        return export_response(records, fmt, f"component_{component.id}")
+
+
 __all__ = [
     "DataSourceListView",
     "DataSourceComponentsBySourceView",
@@ -434,6 +450,7 @@ __all__ = [
     "DeclineCurvesView",
     "MainClassHistoryView",
     "WorkflowOutputsView",
+    "ComponentExportView",
     "fetch_pi_value_for_component_row",
     "pi_history_for_component_row",
 ]
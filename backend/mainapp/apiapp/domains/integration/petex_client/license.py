@@ -0,0 +1,217 @@
+"""
+Distributed semaphore for Petex (IPM) license slots.
+
+Every PetexServer holds one slot while its COM server is open, so no more
+than PETEX_LICENSE_SLOTS sessions run across all workers and the rest wait
+in line instead of failing in Dispatch().
+
+Redis layout (prefix PETEX_LICENSE_KEY):
+  <key>:holders  zset  holder id -> lease deadline
+  <key>:queue    zset  waiter id -> ticket (FIFO order)
+  <key>:seen     zset  waiter id -> last poll time
+  <key>:ticket   counter
+
+Waiters keep their ticket across polls, so slots are handed out in arrival
+order. Leases expire after PETEX_LICENSE_LEASE_SECONDS unless renewed (a
+background thread renews while the slot is held), so a crashed worker frees
+its slot. Waiters that stop polling drop out of the queue.
+
+Configuration (environment):
+  PETEX_LICENSE_SLOTS            number of licenses; 0 disables the semaphore (default)
+  PETEX_LICENSE_REDIS_URL        falls back to CELERY_BROKER_URL
+  PETEX_LICENSE_KEY              default "prodcast:petex-licenses"
+  PETEX_LICENSE_LEASE_SECONDS    default 120
+  PETEX_LICENSE_ACQUIRE_TIMEOUT  seconds to wait for a slot, default 1800
+
+The redis package is optional; without it (or with 0 slots) acquire() is a no-op.
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Optional
+
+try:
+    import redis  # type: ignore[import-not-found]
+except Exception:  # pragma: no cover - optional dependency
+    redis = None
+
+from .exceptions import PetexException
+
+# KEYS: holders, queue, seen, ticket
+# ARGV: id, limit, lease_s, waiter_timeout_s
+_ACQUIRE = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local id, limit = ARGV[1], tonumber(ARGV[2])
+local lease, waiter_timeout = tonumber(ARGV[3]), tonumber(ARGV[4])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+local stale = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now - waiter_timeout)
+for _, w in ipairs(stale) do
+    redis.call('ZREM', KEYS[2], w)
+    redis.call('ZREM', KEYS[3], w)
+end
+
+if redis.call('ZSCORE', KEYS[1], id) then
+    redis.call('ZADD', KEYS[1], now + lease, id)
+    return 1
+end
+if not redis.call('ZSCORE', KEYS[2], id) then
+    redis.call('ZADD', KEYS[2], redis.call('INCR', KEYS[4]), id)
+end
+redis.call('ZADD', KEYS[3], now, id)
+
+local free = limit - redis.call('ZCARD', KEYS[1])
+if free > 0 and redis.call('ZRANK', KEYS[2], id) < free then
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('ZREM', KEYS[3], id)
+    redis.call('ZADD', KEYS[1], now + lease, id)
+    return 1
+end
+return 0
+"""
+
+# KEYS: holders  ARGV: id, lease_s
+_RENEW = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local deadline = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not deadline or tonumber(deadline) < now then
+    redis.call('ZREM', KEYS[1], ARGV[1])
+    return 0
+end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[1])
+return 1
+"""
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class LicenseSemaphore:
+    def __init__(
+        self,
+        slots: Optional[int] = None,
+        redis_url: Optional[str] = None,
+        key: Optional[str] = None,
+        lease_s: Optional[float] = None,
+        poll_s: float = 1.0,
+        client=None,
+    ):
+        """`client` is an existing Redis client to use instead of connecting to redis_url."""
+        self.slots = int(slots if slots is not None else _env_float("PETEX_LICENSE_SLOTS", 0))
+        self.redis_url = redis_url or os.environ.get("PETEX_LICENSE_REDIS_URL") or os.environ.get("CELERY_BROKER_URL")
+        self.key = key or os.environ.get("PETEX_LICENSE_KEY", "prodcast:petex-licenses")
+        self.lease_s = lease_s or _env_float("PETEX_LICENSE_LEASE_SECONDS", 120)
+        self.poll_s = poll_s
+        self._client = client
+
+    @property
+    def enabled(self) -> bool:
+        if self.slots <= 0:
+            return False
+        return self._client is not None or (redis is not None and bool(self.redis_url))
+
+    def _keys(self):
+        return [f"{self.key}:holders", f"{self.key}:queue", f"{self.key}:seen", f"{self.key}:ticket"]
+
+    def _redis(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.redis_url)  # type: ignore[union-attr]
+        return self._client
+
+    def try_acquire(self, holder_id: str) -> bool:
+        waiter_timeout = max(self.poll_s * 10, 30)
+        return bool(self._redis().eval(
+            _ACQUIRE, 4, *self._keys(), holder_id, self.slots, self.lease_s, waiter_timeout
+        ))
+
+    def renew(self, holder_id: str) -> bool:
+        return bool(self._redis().eval(_RENEW, 1, self._keys()[0], holder_id, self.lease_s))
+
+    def release(self, holder_id: str) -> None:
+        holders, queue, seen, _ = self._keys()
+        pipe = self._redis().pipeline(transaction=False)
+        pipe.zrem(holders, holder_id)
+        pipe.zrem(queue, holder_id)
+        pipe.zrem(seen, holder_id)
+        pipe.execute()
+
+    def acquire(self, timeout_s: Optional[float] = None) -> Optional["LicenseLease"]:
+        """
+        Wait in line for a slot; returns a LicenseLease (None when the semaphore
+        is disabled). Raises PetexException on timeout or when Redis is unreachable.
+        """
+        if not self.enabled:
+            return None
+        timeout_s = timeout_s if timeout_s is not None else _env_float("PETEX_LICENSE_ACQUIRE_TIMEOUT", 1800)
+        holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:12]}"
+        deadline = time.monotonic() + timeout_s
+        try:
+            while not self.try_acquire(holder_id):
+                if time.monotonic() > deadline:
+                    self.release(holder_id)
+                    raise PetexException(f"Timed out after {timeout_s:.0f}s waiting for a Petex license slot")
+                time.sleep(self.poll_s)
+        except PetexException:
+            raise
+        except Exception as e:
+            raise PetexException(f"Petex license semaphore unavailable: {e}") from e
+        return LicenseLease(self, holder_id)
+
+    def status(self) -> dict:
+        """Slots in use / free and waiters; for status views."""
+        if not self.enabled:
+            return {"enabled": False, "slots": self.slots}
+        holders, queue, _, _ = self._keys()
+        client = self._redis()
+        sec, usec = client.time()
+        now = sec + usec / 1_000_000
+        pipe = client.pipeline(transaction=False)
+        pipe.zcount(holders, now, "+inf")
+        pipe.zcard(queue)
+        in_use, waiting = pipe.execute()
+        return {
+            "enabled": True,
+            "slots": self.slots,
+            "in_use": in_use,
+            "available": max(self.slots - in_use, 0),
+            "waiting": waiting,
+        }
+
+
+class LicenseLease:
+    """A held slot; renewed in the background until released."""
+
+    def __init__(self, semaphore: LicenseSemaphore, holder_id: str):
+        self.semaphore = semaphore
+        self.holder_id = holder_id
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._renew_loop, name="petex-license-lease", daemon=True)
+        self._thread.start()
+
+    def _renew_loop(self):
+        interval = max(self.semaphore.lease_s / 3, 1)
+        while not self._stop.wait(interval):
+            try:
+                if not self.semaphore.renew(self.holder_id):
+                    print(f"[Petex License] Lease {self.holder_id} expired before renewal")
+                    return
+            except Exception as e:
+                print(f"[Petex License] Failed to renew lease {self.holder_id}: {e}")
+
+    def release(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        try:
+            self.semaphore.release(self.holder_id)
+        except Exception as e:
+            # The lease expires on its own.
+            print(f"[Petex License] Failed to release lease {self.holder_id}: {e}")
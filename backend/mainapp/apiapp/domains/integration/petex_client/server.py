@@ -19,6 +19,7 @@ if _IS_WINDOWS:
         Dispatch = None
 
 from .exceptions import PetexException
+from .license import LicenseSemaphore
 
 
 def petex_available() -> bool:
@@ -55,18 +56,27 @@ class PetexServer:
       - pythoncom CoInitialize/Uninitialize
       - error checking after commands
       - async wait with timeout
+      - a license slot held for the lifetime of the session (see license.py)
     """
 
-    def __init__(self, progid: str = _DEFAULT_PROGID):
+    def __init__(self, progid: str = _DEFAULT_PROGID, semaphore: Optional[LicenseSemaphore] = None):
         self._progid = progid
         self._server = None
+        self._license = semaphore or LicenseSemaphore()
+        self._lease = None
 
     # Context manager support
     def __enter__(self) -> "PetexServer":
         _require_petex()
-        pythoncom.CoInitialize()
-        self._server = Dispatch(self._progid)  # type: ignore[misc]
+        self._lease = self._license.acquire()
+        try:
+            pythoncom.CoInitialize()
+            self._server = Dispatch(self._progid)  # type: ignore[misc]
+        except Exception:
+            self.close()
+            raise
         if self._server is None:
+            self.close()
             raise PetexException("Unable to acquire COM server (license or connectivity issue)")
         return self
 
@@ -80,6 +90,9 @@ class PetexServer:
         except Exception:
             # avoid masking real exceptions on exit
             pass
+        if self._lease is not None:
+            self._lease.release()
+            self._lease = None
 
     # --- Core primitives -----------------------------------------------------
 
@@ -1,9 +1,16 @@
+import os
+import threading
+
+import requests
 import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Allow self-signed SSL certs for internal PI Web API
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-BASE_URL = "https://kpcpdw08/piwebapi"
+# Point PI_WEBAPI_BASE_URL at a local stub server to run without PI.
+BASE_URL = os.environ.get("PI_WEBAPI_BASE_URL", "https://kpcpdw08/piwebapi").rstrip("/")
 
 
 try:
@@ -13,8 +20,85 @@ except Exception:
     OPTIONAL = None
 
 
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+POOL_SIZE = _env_int("PI_POOL_SIZE", 10)
+MAX_RETRIES = _env_int("PI_MAX_RETRIES", 3)
+BACKOFF_FACTOR = _env_float("PI_BACKOFF_FACTOR", 0.5)
+TIMEOUT = (_env_float("PI_CONNECT_TIMEOUT", 10), _env_float("PI_READ_TIMEOUT", 300))
+VERIFY_SSL = os.environ.get("PI_VERIFY_SSL", "").lower() in ("1", "true", "yes")
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_lock = threading.Lock()
+_session = None
+_session_pid = None
+_local = threading.local()
+
+
 def get_auth():
-    """Return Kerberos auth used for PI Web API calls."""
+    """
+    Return Kerberos auth used for PI Web API calls.
+
+    One instance per thread, so the negotiated context is reused across calls
+    without threads sharing its per-host state. The token is sent up front
+    instead of after a 401 challenge.
+    """
     if HTTPKerberosAuth is None:
         return None
-    return HTTPKerberosAuth(mutual_authentication=OPTIONAL)
+    auth = getattr(_local, "auth", None)
+    if auth is None:
+        auth = HTTPKerberosAuth(mutual_authentication=OPTIONAL, force_preemptive=True)
+        _local.auth = auth
+    return auth
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.verify = VERIFY_SSL
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Keep-alive session shared by all threads of this process.
+
+    Connections come from a pool of PI_POOL_SIZE per host; GETs are retried
+    PI_MAX_RETRIES times with exponential backoff on connection errors and
+    429/5xx. A forked worker builds its own session instead of sharing the
+    parent's sockets.
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _lock:
+            if _session is None or _session_pid != pid:
+                _session = _build_session()
+                _session_pid = pid
+    return _session
+
+
+def pi_get(url: str) -> requests.Response:
+    """GET a PI Web API URL through the shared session."""
+    return get_session().get(url, auth=get_auth(), timeout=TIMEOUT)
@@ -2,9 +2,8 @@ import urllib.parse
 from typing import Optional, List, Dict
 
 import pandas as pd
-import requests
 
-from .config import BASE_URL, get_auth
+from .config import BASE_URL, pi_get
 
 
 def get_value_at_time(web_id: str, iso_time_str: str) -> Optional[Dict]:
@@ -12,7 +11,7 @@ def get_value_at_time(web_id: str, iso_time_str: str) -> Optional[Dict]:
     time_param = urllib.parse.quote(iso_time_str)
     url = f"{BASE_URL}/streams/{web_id}/value?time={time_param}"
 
-    resp = requests.get(url, auth=get_auth(), verify=False)
+    resp = pi_get(url)
     if resp.status_code == 200:
         return resp.json()
     return None
@@ -38,7 +37,7 @@ def get_time_series(
             f"?startTime={start_time}&endTime={end_time}"
             f"&interval={interval}&selectedFields=Items.Timestamp;Items.Value"
         )
-        resp = requests.get(url, auth=get_auth(), verify=False)
+        resp = pi_get(url)
         resp.raise_for_status()
         items: List[Dict] = resp.json().get("Items", [])
     else:
@@ -49,7 +48,7 @@ def get_time_series(
         )
         items = []
         while url:
-            resp = requests.get(url, auth=get_auth(), verify=False)
+            resp = pi_get(url)
             resp.raise_for_status()
             data = resp.json()
             items.extend(data.get("Items", []))
@@ -1,11 +1,13 @@
+import hashlib
 import os
-from django.http import HttpResponse, HttpResponseNotFound
+from django.http import HttpResponse, HttpResponseNotFound, HttpResponseNotModified
 from django.views.decorators.csrf import csrf_exempt
 
 BASE_DIR = os.path.dirname(__file__)
 MODULE_PATHS = {
     "petex_client": os.path.join(BASE_DIR, "petex_client"),
     "pi_client": os.path.join(BASE_DIR, "pi_client"),
+    "workflow_runtime": os.path.join(BASE_DIR, "workflow_runtime"),
     "apiapp": os.path.abspath(os.path.join(BASE_DIR, "..", "..")),
 }
 
@@ -31,7 +33,16 @@ def get_module(request, path):
     with open(file_path, "r", encoding="utf-8") as f:
         code = f.read()
 
-    return HttpResponse(code, content_type="text/plain")
+    # Workers cache fetched modules (and their compiled code) by ETag and
+    # revalidate with If-None-Match, so unchanged modules cost a 304.
+    etag = f'"{hashlib.sha256(code.encode("utf-8")).hexdigest()[:32]}"'
+    if request.META.get("HTTP_IF_NONE_MATCH") == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(code, content_type="text/plain")
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    return response
 
 
 
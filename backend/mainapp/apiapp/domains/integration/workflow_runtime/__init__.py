@@ -0,0 +1,12 @@
+"""
+Runtime shared by generated workflow scripts.
+
+Served to workers through `integration.views.get_module` and imported once
+per worker process, so a run only executes the short generated preamble
+instead of compiling the table classes again.
+"""
+
+from .dag import EXECUTION_MODES, run_cells
+from .tables import RUNTIME_VERSION, bootstrap
+
+__all__ = ["RUNTIME_VERSION", "EXECUTION_MODES", "bootstrap", "run_cells"]
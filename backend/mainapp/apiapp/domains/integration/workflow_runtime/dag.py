@@ -0,0 +1,381 @@
+"""
+Dependency-aware cell execution for workflows.
+
+With Workflow.execution_mode set to "threads" or "processes" the generated
+script hands its cells to run_cells() instead of running them top to bottom.
+Each cell is parsed with `ast` to find the global names it reads and writes;
+a cell depends on every earlier cell it shares a name with (read after
+write, write after read, write after write). Cells with no path between
+them run concurrently.
+
+The analysis only sees names. A cell that mutates an object through a method
+call (`rows.append(...)`) without assigning it is not seen as writing it, so
+the mode is opt-in. Cells using exec/eval/globals()/`import *` are treated as
+barriers and run alone.
+
+"processes" runs a cell in a worker process when everything it reads can be
+pickled and sends back the names it writes (its imports are replayed in the
+main process); cells defining functions or classes, or reading something that
+cannot be pickled (`internal`, the tables), run in threads in the main process. If the
+pool cannot start (the runtime is not importable in a child process), the
+remaining cells fall back to threads.
+"""
+
+import ast
+import builtins
+import os
+import pickle
+import threading
+import time
+import types
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+EXECUTION_MODES = ("sequential", "threads", "processes")
+
+_BARRIER_CALLS = {"exec", "eval", "globals", "locals", "vars", "__import__"}
+_BUILTINS = set(dir(builtins))
+
+
+class CellAnalysis:
+    __slots__ = ("reads", "writes", "imports", "import_code", "defines", "barrier")
+
+    def __init__(self, reads=(), writes=(), imports=(), import_code="", defines=False, barrier=False):
+        self.reads = set(reads)
+        self.writes = set(writes)
+        # Names bound only by import; two cells importing the same name do not conflict.
+        self.imports = set(imports)
+        # Module-level import statements, replayed in the main process after a process run.
+        self.import_code = import_code
+        # Defines functions/classes at module level; those cannot be sent back from a process.
+        self.defines = defines
+        self.barrier = barrier
+
+
+class _NameVisitor(ast.NodeVisitor):
+    """Collects module-level stores and every load of a name, at any depth."""
+
+    def __init__(self):
+        self.reads = set()
+        self.writes = set()
+        self.imported = set()
+        self.assigned = set()
+        self.import_nodes = []
+        self.defines = False
+        self.barrier = False
+        self._depth = 0
+        self._globals = [set()]
+
+    def _store(self, name, imported=False):
+        if self._depth == 0 or name in self._globals[-1]:
+            self.writes.add(name)
+            (self.imported if imported else self.assigned).add(name)
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.reads.add(node.id)
+        elif isinstance(node.ctx, (ast.Store, ast.Del)):
+            self._store(node.id)
+
+    def _mutated_root(self, target):
+        # x[...] = v / x.attr = v / x[...] += v mutate the object bound to x.
+        node = target
+        while isinstance(node, (ast.Subscript, ast.Attribute)):
+            node = node.value
+        if isinstance(node, ast.Name) and node is not target:
+            self.reads.add(node.id)
+            self._store(node.id)
+
+    def visit_Assign(self, node):
+        for t in node.targets:
+            self._mutated_root(t)
+        self.generic_visit(node)
+
+    def visit_AugAssign(self, node):
+        self._mutated_root(node.target)
+        if isinstance(node.target, ast.Name):
+            self.reads.add(node.target.id)
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node):
+        self._mutated_root(node.target)
+        self.generic_visit(node)
+
+    def visit_Delete(self, node):
+        for t in node.targets:
+            self._mutated_root(t)
+        self.generic_visit(node)
+
+    def visit_Import(self, node):
+        if self._depth == 0:
+            self.import_nodes.append(node)
+        for alias in node.names:
+            self._store(alias.asname or alias.name.split(".", 1)[0], imported=True)
+
+    def visit_ImportFrom(self, node):
+        if self._depth == 0:
+            self.import_nodes.append(node)
+        for alias in node.names:
+            if alias.name == "*":
+                self.barrier = True
+            else:
+                self._store(alias.asname or alias.name, imported=True)
+
+    def visit_Global(self, node):
+        self._globals[-1].update(node.names)
+        self.writes.update(node.names)
+        self.assigned.update(node.names)
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Name) and node.func.id in _BARRIER_CALLS:
+            self.barrier = True
+        self.generic_visit(node)
+
+    def _scoped(self, node, name=None):
+        if name is not None:
+            if self._depth == 0:
+                self.defines = True
+            self._store(name)
+        for d in getattr(node, "decorator_list", []):
+            self.visit(d)
+        args = getattr(node, "args", None)
+        if isinstance(args, ast.arguments):
+            for default in list(args.defaults) + [d for d in args.kw_defaults if d is not None]:
+                self.visit(default)
+        self._depth += 1
+        self._globals.append(set())
+        body = node.body if isinstance(node.body, list) else [node.body]
+        for stmt in body:
+            self.visit(stmt)
+        self._globals.pop()
+        self._depth -= 1
+
+    def visit_FunctionDef(self, node):
+        self._scoped(node, node.name)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node):
+        self._scoped(node)
+
+    def visit_ClassDef(self, node):
+        for b in node.bases:
+            self.visit(b)
+        self._scoped(node, node.name)
+
+    def _comprehension(self, node):
+        self._depth += 1
+        self._globals.append(set())
+        self.generic_visit(node)
+        self._globals.pop()
+        self._depth -= 1
+
+    visit_ListComp = visit_SetComp = visit_DictComp = visit_GeneratorExp = _comprehension
+
+
+def analyze_cell(source: str) -> CellAnalysis:
+    """Return the global names a cell reads and writes."""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        # Let the cell fail on its own, after everything before it.
+        return CellAnalysis(barrier=True)
+    v = _NameVisitor()
+    v.visit(tree)
+    imports = v.imported - v.assigned
+    import_code = "\n".join(ast.unparse(n) for n in v.import_nodes)
+    return CellAnalysis(v.reads - _BUILTINS - imports, v.writes, imports, import_code, v.defines, v.barrier)
+
+
+def build_dag(sources) -> list:
+    """Return, for each cell, the set of earlier cell indexes it depends on."""
+    return _dependencies([analyze_cell(s) for s in sources])
+
+
+def _dependencies(analyses) -> list:
+    deps = []
+    for j, a in enumerate(analyses):
+        d = set()
+        for i in range(j):
+            b = analyses[i]
+            shared_imports = a.imports & b.imports
+            if (
+                a.barrier
+                or b.barrier
+                or (b.writes & a.reads)
+                or (b.reads & a.writes)
+                or ((b.writes & a.writes) - shared_imports)
+            ):
+                d.add(i)
+        deps.append(d)
+    return deps
+
+
+def _exec_in_process(source: str, label: str, inputs: dict, writes: list) -> dict:
+    ns = {"__name__": "__workflow_cell__", **inputs}
+    exec(compile(source, label, "exec"), ns)
+    out = {}
+    for name in writes:
+        if name not in ns or isinstance(ns[name], types.ModuleType):
+            continue
+        try:
+            pickle.dumps(ns[name])
+        except Exception as e:
+            raise TypeError(f"{name!r} cannot be returned from a process cell ({e}); use the threads mode") from None
+        out[name] = ns[name]
+    return out
+
+
+def _picklable(values: dict) -> bool:
+    try:
+        pickle.dumps(values)
+        return True
+    except Exception:
+        return False
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def run_cells(
+    namespace: dict,
+    cells,
+    mode: str = "threads",
+    max_workers: Optional[int] = None,
+    report: Optional[Callable[[list], None]] = None,
+) -> list:
+    """
+    Run [(label, source), ...] in `namespace` following their dependencies.
+
+    Returns the per-cell timeline; it is also passed to `report` (or to
+    `workflow_report_timeline` from the namespace, when the worker provides
+    it). The first failing cell stops scheduling; running cells finish and
+    the error is re-raised.
+    """
+    if mode not in EXECUTION_MODES:
+        raise ValueError(f"Unknown execution mode {mode!r}")
+
+    cells = [(str(label), str(src)) for label, src in cells]
+    analyses = [analyze_cell(src) for _, src in cells]
+    deps = _dependencies(analyses) if mode != "sequential" else [
+        {i - 1} if i else set() for i in range(len(cells))
+    ]
+    dependents = [[] for _ in cells]
+    for j, d in enumerate(deps):
+        for i in d:
+            dependents[i].append(j)
+
+    timeline = [
+        {
+            "index": i,
+            "label": label,
+            "depends_on": sorted(deps[i]),
+            "status": "pending",
+            "worker": None,
+            "start": None,
+            "end": None,
+            "duration_ms": None,
+            "error": None,
+        }
+        for i, (label, _) in enumerate(cells)
+    ]
+
+    workers = max_workers or min(8, (os.cpu_count() or 1) + 4)
+    threads = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wf-cell")
+    pools = {"processes": ProcessPoolExecutor(max_workers=min(workers, os.cpu_count() or 1)) if mode == "processes" else None}
+    t0 = time.perf_counter()
+    first_error = None
+
+    def run_local(i):
+        label, src = cells[i]
+        timeline[i]["worker"] = threading.current_thread().name
+        exec(compile(src, label, "exec"), namespace)
+
+    def submit(i):
+        label, src = cells[i]
+        timeline[i]["status"] = "running"
+        timeline[i]["start"] = _now_iso()
+        timeline[i]["_t"] = time.perf_counter()
+        if pools["processes"] is not None:
+            a = analyses[i]
+            inputs = {n: namespace[n] for n in a.reads if n in namespace and not n.startswith("__")}
+            if not a.barrier and not a.defines and _picklable(inputs):
+                timeline[i]["worker"] = "process"
+                return pools["processes"].submit(_exec_in_process, src, label, inputs, sorted(a.writes))
+        return threads.submit(run_local, i)
+
+    remaining = [len(d) for d in deps]
+    running = {}
+    try:
+        for i, n in enumerate(remaining):
+            if n == 0:
+                running[submit(i)] = i
+
+        while running:
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                i = running.pop(fut)
+                entry = timeline[i]
+                entry["end"] = _now_iso()
+                entry["duration_ms"] = round((time.perf_counter() - entry.pop("_t")) * 1000, 1)
+                try:
+                    result = fut.result()
+                except BrokenProcessPool:
+                    # Every cell in flight on a broken pool fails; the first one retires it.
+                    if pools["processes"] is not None:
+                        pools["processes"].shutdown(wait=False)
+                        pools["processes"] = None
+                    running[submit(i)] = i
+                    continue
+                except BaseException as e:  # noqa: BLE001 - reported and re-raised below
+                    entry["status"] = "error"
+                    entry["error"] = f"{type(e).__name__}: {e}"
+                    if first_error is None:
+                        first_error = e
+                    continue
+                if isinstance(result, dict):
+                    if analyses[i].import_code:
+                        exec(analyses[i].import_code, namespace)
+                    namespace.update(result)
+                entry["status"] = "ok"
+                if first_error is not None:
+                    continue
+                for j in dependents[i]:
+                    remaining[j] -= 1
+                    if remaining[j] == 0:
+                        running[submit(j)] = j
+    finally:
+        threads.shutdown(wait=True)
+        if pools["processes"] is not None:
+            pools["processes"].shutdown(wait=True)
+
+    for entry in timeline:
+        if entry["status"] == "pending":
+            entry["status"] = "skipped"
+        entry.pop("_t", None)
+
+    total_ms = round((time.perf_counter() - t0) * 1000, 1)
+    print(f"[workflow cells] {len(cells)} cell(s) in {total_ms} ms ({mode})")
+
+    report = report or namespace.get("workflow_report_timeline")
+    if callable(report):
+        try:
+            report(timeline)
+        except Exception as e:
+            print(f"[workflow cells] timeline report failed: {e}")
+
+    if first_error is not None:
+        raise first_error
+    return timeline
+
+
+__all__ = [
+    "EXECUTION_MODES",
+    "CellAnalysis",
+    "analyze_cell",
+    "build_dag",
+    "run_cells",
+]
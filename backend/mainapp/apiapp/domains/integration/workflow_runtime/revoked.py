@@ -0,0 +1,108 @@
+"""
+Revoked task ids kept in Redis, restored into a Celery worker on startup.
+Also turns on task_track_started in every worker that imports it.
+
+The server's task index (apiapp/services/task_index.py) adds every cancelled
+task id to a sorted set scored by revoke time and broadcasts the revoke. A
+worker that was down during the broadcast would still run the queued
+message, so worker apps import this module when they start:
+
+    # in the worker's Celery app module
+    import workflow_runtime.revoked  # noqa: F401
+
+Importing it connects a worker_ready receiver that loads the ids revoked
+within TASK_INDEX_TTL_SECONDS into celery.worker.state.revoked. The set is
+read from TASK_INDEX_REDIS_URL, or else the worker's own broker. The
+mainserver worker imports it from apiapp/tasks.py.
+
+It also connects a worker_init receiver that sets task_track_started on
+the worker's app and its tasks, so a running task is STARTED rather than
+PENDING and the server can tell it from a queued one
+(apiapp/services/task_index.cancel_task).
+
+The redis and celery packages are optional; without them this is a no-op.
+"""
+import os
+import time
+from typing import List, Optional
+
+try:
+    import redis  # type: ignore[import-not-found]
+except Exception:  # pragma: no cover - optional dependency
+    redis = None
+
+try:
+    from celery.signals import worker_init, worker_ready  # type: ignore[import-not-found]
+except Exception:  # pragma: no cover - optional dependency
+    worker_init = worker_ready = None
+
+REVOKED_KEY = "prodcast:revoked-tasks"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+def _ttl_seconds() -> float:
+    try:
+        return float(os.environ.get("TASK_INDEX_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+    except ValueError:
+        return DEFAULT_TTL_SECONDS
+
+
+def _redis_url() -> Optional[str]:
+    url = os.environ.get("TASK_INDEX_REDIS_URL")
+    if url:
+        return url
+    try:
+        from celery import current_app
+
+        return current_app.conf.broker_url or os.environ.get("CELERY_BROKER_URL")
+    except Exception:
+        return os.environ.get("CELERY_BROKER_URL")
+
+
+def load_revoked_ids(client=None, ttl_seconds: Optional[float] = None) -> List[str]:
+    """Ids revoked within the TTL; `client` defaults to a Redis client for the broker."""
+    if client is None:
+        url = _redis_url()
+        if redis is None or not url or not url.startswith(("redis://", "rediss://")):
+            return []
+        client = redis.Redis.from_url(url)
+    since = time.time() - (ttl_seconds if ttl_seconds is not None else _ttl_seconds())
+    return [i.decode() if isinstance(i, bytes) else i for i in client.zrangebyscore(REVOKED_KEY, since, "+inf")]
+
+
+def restore_revoked(client=None, ttl_seconds: Optional[float] = None) -> int:
+    """Add the stored revoked ids to this worker's revoked set; returns how many."""
+    from celery.worker import state
+
+    ids = load_revoked_ids(client, ttl_seconds)
+    for task_id in ids:
+        state.revoked.add(task_id)
+    return len(ids)
+
+
+def _on_worker_ready(sender=None, **kwargs):
+    try:
+        count = restore_revoked()
+    except Exception as e:
+        print(f"[Task Index] Failed to load revoked tasks: {e}")
+        return
+    print(f"[Task Index] Loaded {count} revoked task id(s)")
+
+
+def _on_worker_init(sender=None, **kwargs):
+    app = getattr(sender, "app", None)
+    if app is None:
+        return
+    app.conf.task_track_started = True
+    # Tasks bound before this point copied the old setting.
+    for task in app.tasks.values():
+        task.track_started = True
+
+
+if worker_ready is not None:
+    worker_ready.connect(_on_worker_ready, weak=False, dispatch_uid="prodcast.restore_revoked")
+if worker_init is not None:
+    worker_init.connect(_on_worker_init, weak=False, dispatch_uid="prodcast.track_started")
+
+
+__all__ = ["REVOKED_KEY", "load_revoked_ids", "restore_revoked"]
@@ -0,0 +1,207 @@
+"""
+Input snapshots for repeatable workflow runs.
+
+When an inputs config sets "snapshot": true, the rows built for each inputs
+tab are written once to a snapshot directory and re-used by later runs with
+the same key instead of querying the database again. The key hashes the tab
+config, the resolved date range and a stamp of the data of every component
+the tab reads from (record/history counts and highest ids, see
+internal_query.get_data_stamps), so editing the inputs or the component data
+invalidates it. last_n ranges are aligned to the data interval (tables.py), so
+the key repeats between runs within an interval.
+
+Layout of one snapshot (all rows of a tab concatenated):
+    <dir>/<key>/times.npy    datetime64[us]
+    <dir>/<key>/values.npy   float64
+    <dir>/<key>/index.json   {label: {row: [start, stop]}}
+    <dir>/<key>/stored.json  times and values as stored, for Sample[i]
+
+.npy files are loaded with mmap_mode="r"; each row is a slice of the mapping,
+so loading a snapshot does not copy the sample data. stored.json is only read
+when a notebook indexes single samples.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+SNAPSHOT_DIR_ENV = "WORKFLOW_SNAPSHOT_DIR"
+SNAPSHOT_MAX_AGE_ENV = "WORKFLOW_SNAPSHOT_MAX_AGE_DAYS"
+SNAPSHOT_FORMAT = 2
+
+
+def snapshot_dir() -> str:
+    return os.environ.get(SNAPSHOT_DIR_ENV) or os.path.join(tempfile.gettempdir(), "prodcast_wf_snapshots")
+
+
+def _json_default(v):
+    if hasattr(v, "isoformat"):
+        return v.isoformat()
+    return str(v)
+
+
+def _encode_stored(v):
+    if v is None or isinstance(v, (str, int, float)):
+        return v
+    if isinstance(v, datetime):
+        return {"datetime": v.isoformat()}
+    return str(v)
+
+
+def _decode_stored(v):
+    if isinstance(v, dict):
+        return datetime.fromisoformat(v["datetime"])
+    return v
+
+
+class _StoredSamples:
+    """Reads stored.json of a snapshot once, on first use."""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._arrays = None
+
+    def row(self, a: int, b: int):
+        return lambda: tuple(arr[a:b] for arr in self._load())
+
+    def _load(self):
+        if self._arrays is None:
+            with open(self._path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            arrays = []
+            for name in ("times", "values"):
+                arr = np.empty(len(data[name]), dtype=object)
+                arr[:] = [_decode_stored(v) for v in data[name]]
+                arrays.append(arr)
+            self._arrays = tuple(arrays)
+        return self._arrays
+
+
+def snapshot_key(tab: dict, preset: str, start: Optional[str], end: Optional[str], component_stamps: dict) -> str:
+    """Return the snapshot key for an inputs tab."""
+    payload = {
+        "format": SNAPSHOT_FORMAT,
+        "tab": tab,
+        "range": [preset, start, end],
+        "components": {str(k): component_stamps[k] for k in sorted(component_stamps)},
+    }
+    raw = json.dumps(payload, sort_keys=True, default=_json_default, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def component_stamps(internal, component_ids) -> Optional[dict]:
+    """Return {component_id: data stamp} or None when the runtime cannot tell."""
+    if not component_ids or not hasattr(internal, "get_data_stamps"):
+        return None
+    stamps = {int(k): v for k, v in (internal.get_data_stamps(list(component_ids)) or {}).items()}
+    if set(stamps) != set(int(c) for c in component_ids):
+        return None
+    return stamps
+
+
+def save_snapshot(key: str, rows: dict) -> None:
+    """Write {label: {row: SampleList}} under key; concurrent writers are harmless."""
+    base = snapshot_dir()
+    os.makedirs(base, exist_ok=True)
+    target = os.path.join(base, key)
+    if os.path.isdir(target):
+        return
+
+    index = {}
+    stored = {"times": [], "values": []}
+    times_parts = []
+    values_parts = []
+    offset = 0
+    for label, row_map in rows.items():
+        index[label] = {}
+        for row, samples in row_map.items():
+            n = len(samples)
+            index[label][row] = [offset, offset + n]
+            times_parts.append(np.asarray(samples.times, dtype="datetime64[us]"))
+            values_parts.append(np.asarray(samples.values, dtype="float64"))
+            for sample in samples:
+                stored["times"].append(_encode_stored(sample.TimeOfSample))
+                stored["values"].append(_encode_stored(sample.Value))
+            offset += n
+
+    times = np.concatenate(times_parts) if times_parts else np.empty(0, dtype="datetime64[us]")
+    values = np.concatenate(values_parts) if values_parts else np.empty(0, dtype="float64")
+
+    tmp = tempfile.mkdtemp(prefix=f".{key[:12]}-", dir=base)
+    try:
+        np.save(os.path.join(tmp, "times.npy"), times)
+        np.save(os.path.join(tmp, "values.npy"), values)
+        with open(os.path.join(tmp, "index.json"), "w", encoding="utf-8") as f:
+            json.dump({"format": SNAPSHOT_FORMAT, "rows": index}, f, ensure_ascii=False)
+        with open(os.path.join(tmp, "stored.json"), "w", encoding="utf-8") as f:
+            json.dump(stored, f, ensure_ascii=False)
+        os.replace(tmp, target)
+    except OSError:
+        # Another run published the same key first (or the dir is read-only).
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    prune_snapshots(base)
+
+
+def load_snapshot(key: str, sample_list_cls) -> Optional[dict]:
+    """Return {label: {row: SampleList}} backed by memory-mapped arrays, or None."""
+    target = os.path.join(snapshot_dir(), key)
+    try:
+        with open(os.path.join(target, "index.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != SNAPSHOT_FORMAT:
+            return None
+        times = np.load(os.path.join(target, "times.npy"), mmap_mode="r")
+        values = np.load(os.path.join(target, "values.npy"), mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+    stored = _StoredSamples(os.path.join(target, "stored.json"))
+    rows = {}
+    for label, row_map in (meta.get("rows") or {}).items():
+        rows[label] = {}
+        for row, (a, b) in row_map.items():
+            rows[label][row] = sample_list_cls(times[a:b], values[a:b], stored.row(a, b))
+
+    try:
+        os.utime(target)
+    except OSError:
+        pass
+    return rows
+
+
+def prune_snapshots(base: Optional[str] = None) -> None:
+    """Remove snapshots not used for WORKFLOW_SNAPSHOT_MAX_AGE_DAYS (default 7)."""
+    base = base or snapshot_dir()
+    try:
+        max_age = float(os.environ.get(SNAPSHOT_MAX_AGE_ENV) or 7) * 86400
+    except ValueError:
+        max_age = 7 * 86400
+    cutoff = time.time() - max_age
+    try:
+        entries = list(os.scandir(base))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+        except OSError:
+            continue
+
+
+__all__ = [
+    "snapshot_dir",
+    "snapshot_key",
+    "component_stamps",
+    "save_snapshot",
+    "load_snapshot",
+    "prune_snapshots",
+]
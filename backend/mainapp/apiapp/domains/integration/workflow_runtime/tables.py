@@ -0,0 +1,663 @@
+"""
+Workflow tables runtime.
+
+Builds the <Type>InputsTable / <Type>OutputsTable objects used by workflow
+notebooks from the inputs/outputs config embedded in the generated script:
+
+    WELLInputsTable['Gas Rate'].Row['A1'].Sample[i].Value
+    WELLInputsTable['Gas Rate'].Row['A1'].Sample[i].TimeOfSample
+    WELLInputsTable['Gas Rate'].Row['A1'].Sample.values       # float64 ndarray
+    WELLInputsTable['Gas Rate'].Row['A1'].Sample.times        # datetime64[us] ndarray (UTC)
+    WELLInputsTable['Gas Rate'].Row['A1'].Sample.to_series()  # pandas Series
+
+    WELLOutputsTable['Gas Rate'].Row['A1'].Value = 123
+    WELLOutputsTable['Gas Rate'].Row['A1'].Save(123, date_time=..., description=...)
+    WELLOutputsTable.flush()  # -> {'rows': ..., 'batches': ..., ...}
+
+Setting "snapshot": true on the inputs config (or on a single tab) re-uses
+input rows materialized by an earlier run with the same inputs, see snapshot.py.
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from . import snapshot
+
+RUNTIME_VERSION = 4
+
+DEFAULT_BATCH_SIZE = 5000
+
+# last_n ranges are widened to whole data intervals so repeated runs resolve
+# the same bounds (and the same snapshot key) until the next interval starts.
+DATA_INTERVAL_ENV = "WORKFLOW_DATA_INTERVAL_MINUTES"
+DEFAULT_DATA_INTERVAL_MINUTES = 60
+
+
+def table_ident(name) -> str:
+    """Return a python identifier built from a table type name."""
+    s = "".join(ch for ch in str(name) if ch.isalnum() or ch == "_")
+    if not s:
+        return "_Table"
+    if s[0].isdigit():
+        s = "_" + s
+    return s
+
+
+def _to_datetime64(t) -> np.datetime64:
+    if t is None or t == "":
+        return np.datetime64("NaT", "us")
+    if isinstance(t, str):
+        try:
+            t = datetime.fromisoformat(t.replace("Z", "+00:00"))
+        except ValueError:
+            return np.datetime64("NaT", "us")
+    if isinstance(t, datetime) and t.tzinfo is not None:
+        t = t.astimezone(timezone.utc).replace(tzinfo=None)
+    try:
+        return np.datetime64(t, "us")
+    except Exception:
+        return np.datetime64("NaT", "us")
+
+
+def _to_float(v) -> Optional[float]:
+    if v is None or isinstance(v, bool):
+        return None
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+# --- Inputs -------------------------------------------------------------------
+
+
+class Sample:
+    def __init__(self, value=None, time=None):
+        self.Value = value
+        self.TimeOfSample = time
+
+
+class SampleList:
+    """Samples of one input row as parallel arrays.
+
+    times is datetime64[us] (UTC) and values is float64 (NaN when the stored
+    value is not numeric). Sample[i].Value and .TimeOfSample return the values
+    as stored, kept in `stored` as a pair of object arrays (or a callable
+    returning them, so snapshots only read them when a sample is accessed).
+    """
+
+    def __init__(self, times: np.ndarray, values: np.ndarray, stored=None):
+        self._times = times
+        self._values = values
+        self._stored = stored
+
+    @classmethod
+    def from_pairs(cls, pairs) -> "SampleList":
+        pairs = list(pairs or [])
+        n = len(pairs)
+        times = np.empty(n, dtype="datetime64[us]")
+        values = np.empty(n, dtype="float64")
+        raw_times = np.empty(n, dtype=object)
+        raw_values = np.empty(n, dtype=object)
+        for i, (t, v) in enumerate(pairs):
+            times[i] = _to_datetime64(t)
+            f = _to_float(v)
+            values[i] = np.nan if f is None else f
+            raw_times[i] = t
+            raw_values[i] = v
+        if n > 1:
+            order = np.argsort(times, kind="stable")
+            times = times[order]
+            values = values[order]
+            raw_times = raw_times[order]
+            raw_values = raw_values[order]
+        return cls(times, values, (raw_times, raw_values))
+
+    def _stored_arrays(self):
+        if callable(self._stored):
+            self._stored = self._stored()
+        return self._stored
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values
+
+    @property
+    def times(self) -> np.ndarray:
+        return self._times
+
+    @property
+    def raw(self) -> np.ndarray:
+        """Values as stored (object array)."""
+        stored = self._stored_arrays()
+        if stored is None:
+            return self._values.astype(object)
+        return stored[1]
+
+    def to_series(self, name=None):
+        import pandas as pd
+
+        index = pd.DatetimeIndex(self._times).tz_localize("UTC")
+        return pd.Series(self._values, index=index, name=name, copy=False)
+
+    def _sample_at(self, i) -> Sample:
+        stored = self._stored_arrays()
+        if stored is not None:
+            return Sample(stored[1][i], stored[0][i])
+        t = self._times[i]
+        return Sample(float(self._values[i]), None if np.isnat(t) else t.item().replace(tzinfo=timezone.utc))
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            stored = self._stored_arrays()
+            if stored is not None:
+                stored = (stored[0][idx], stored[1][idx])
+            return SampleList(self._times[idx], self._values[idx], stored)
+        return self._sample_at(idx)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        for i in range(len(self._values)):
+            yield self._sample_at(i)
+
+
+class InputRowBinding:
+    def __init__(self, samples: SampleList):
+        self.Sample = samples
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.Sample.values
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.Sample.times
+
+    def to_series(self, name=None):
+        return self.Sample.to_series(name=name)
+
+
+class InputRowCollection:
+    def __init__(self, row_map):
+        self._row_map = row_map or {}
+
+    def __getitem__(self, row_name):
+        if row_name not in self._row_map:
+            raise KeyError(row_name)
+        return InputRowBinding(self._row_map[row_name])
+
+
+class InputColumn:
+    def __init__(self, row_map):
+        self.Row = InputRowCollection(row_map)
+
+
+class InputsTable:
+    def __init__(self, columns):
+        self._columns = columns or {}
+
+    def __getitem__(self, col_name):
+        if col_name not in self._columns:
+            raise KeyError(col_name)
+        return self._columns[col_name]
+
+
+def resolve_date_range(tab: dict, tz) -> tuple[str, Optional[str], Optional[str]]:
+    """Return (preset, start, end) for an inputs tab's dateRange."""
+    dr = tab.get("dateRange") or {}
+    preset = dr.get("preset") or "current"
+    start = None
+    end = None
+    if preset == "custom":
+        start = dr.get("start") or None
+        end = dr.get("end") or None
+    elif preset == "last_n":
+        try:
+            n = int(dr.get("value") or 1)
+        except Exception:
+            n = 1
+        unit = dr.get("unit") or "week"
+        mul = 1 if unit == "day" else (7 if unit == "week" else 30)
+        now = datetime.now(tz)
+        step = _data_interval()
+        end = _ceil_to(now, step).isoformat()
+        start = _floor_to(now - timedelta(days=mul * max(n, 1)), step).isoformat()
+    return preset, start, end
+
+
+def _data_interval() -> timedelta:
+    try:
+        minutes = float(os.environ.get(DATA_INTERVAL_ENV) or DEFAULT_DATA_INTERVAL_MINUTES)
+    except ValueError:
+        minutes = DEFAULT_DATA_INTERVAL_MINUTES
+    return timedelta(minutes=max(minutes, 1))
+
+
+def _floor_to(dt: datetime, step: timedelta) -> datetime:
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return dt - (dt - epoch) % step
+
+
+def _ceil_to(dt: datetime, step: timedelta) -> datetime:
+    floor = _floor_to(dt, step)
+    return floor if floor == dt else floor + step
+
+
+def _column_label(c: dict) -> str:
+    return str(c.get("label") or c.get("property") or "Column")
+
+
+def _tab_component_ids(tab: dict) -> list[int]:
+    return sorted({int(c.get("componentId")) for c in (tab.get("columns") or []) if c.get("componentId") is not None})
+
+
+def build_inputs_table(tab: dict, internal, tz, use_snapshot: bool = False) -> InputsTable:
+    if internal is None:
+        return InputsTable({})
+
+    preset, start, end = resolve_date_range(tab, tz)
+
+    key = None
+    if use_snapshot:
+        stamps = snapshot.component_stamps(internal, _tab_component_ids(tab))
+        if stamps is not None:
+            key = snapshot.snapshot_key(tab, preset, start, end, stamps)
+            rows = snapshot.load_snapshot(key, SampleList)
+            if rows is not None:
+                return InputsTable({label: InputColumn(row_map) for (label, row_map) in rows.items()})
+
+    rows = _query_input_rows(tab, internal, preset, start, end)
+    if key is not None:
+        try:
+            snapshot.save_snapshot(key, rows)
+        except OSError as e:
+            print(f"[workflow inputs] snapshot not saved: {e}")
+    return InputsTable({label: InputColumn(row_map) for (label, row_map) in rows.items()})
+
+
+def _query_input_rows(tab: dict, internal, preset: str, start: Optional[str], end: Optional[str]) -> dict:
+    """Return {column_label: {row_name: SampleList}} read through `internal`."""
+    object_type = tab.get("type") or None
+    instances = tab.get("instances") or []
+    cols_cfg = tab.get("columns") or []
+
+    component_ids = _tab_component_ids(tab)
+    properties = sorted({str(c.get("property")) for c in cols_cfg if c.get("property")})
+
+    q_components = component_ids or None
+    q_instances = instances or None
+    q_properties = properties or None
+
+    records = internal.get_records(
+        components=q_components,
+        object_type=object_type,
+        instances=q_instances,
+        properties=q_properties,
+    )
+
+    key_to_record_id = {}
+    for r in records or []:
+        comp_id = int(r.get("component_id") or r.get("component") or 0)
+        inst_name = r.get("object_instance__object_instance_name")
+        prop_name = r.get("object_type_property__object_type_property_name")
+        rid = r.get("data_set_id")
+        if not (comp_id and inst_name and prop_name and rid):
+            continue
+        key_to_record_id[(comp_id, str(inst_name), str(prop_name))] = rid
+    record_id_to_key = {rid: key for (key, rid) in key_to_record_id.items()}
+
+    # Build current samples from MainClass records
+    current_samples = {}  # (comp_id, inst_name, prop_name) -> (time, value)
+    for r in records or []:
+        comp_id = int(r.get("component_id") or r.get("component") or 0)
+        inst_name = r.get("object_instance__object_instance_name")
+        prop_name = r.get("object_type_property__object_type_property_name")
+        if not (comp_id and inst_name and prop_name):
+            continue
+        current_samples[(comp_id, str(inst_name), str(prop_name))] = (r.get("date_time"), r.get("value"))
+
+    history = []
+    if preset != "current":
+        history = internal.get_history(
+            components=q_components,
+            object_type=object_type,
+            instances=q_instances,
+            properties=q_properties,
+            start=start,
+            end=end,
+        )
+
+    # (comp_id, prop_name) -> [column labels...]
+    labels_by_series = {}
+    table_data = {}  # {column_label: {row_name: [(time, value)...]}}
+    for c in cols_cfg:
+        label = _column_label(c)
+        table_data.setdefault(label, {})
+        labels_by_series.setdefault((int(c.get("componentId") or 0), str(c.get("property") or "")), []).append(label)
+
+    if instances:
+        for label in table_data:
+            for inst in instances:
+                table_data[label].setdefault(str(inst), [])
+
+    for h in history or []:
+        key = record_id_to_key.get(h.get("main_record_id"))
+        if not key:
+            continue
+        comp_id, inst_name, prop_name = key
+        for label in labels_by_series.get((comp_id, prop_name), []):
+            table_data[label].setdefault(inst_name, []).append((h.get("time"), h.get("value")))
+
+    # Fill from current (MainClass) when requested; otherwise only where history is empty
+    for (comp_id, inst_name, prop_name), sample in current_samples.items():
+        for label in labels_by_series.get((comp_id, prop_name), []):
+            lst = table_data[label].setdefault(inst_name, [])
+            if preset == "current" or not lst:
+                lst.append(sample)
+
+    return {
+        label: {row: SampleList.from_pairs(pairs) for (row, pairs) in rows.items()}
+        for (label, rows) in table_data.items()
+    }
+
+
+# --- Outputs ------------------------------------------------------------------
+
+
+class OutputBuffer:
+    """Collects output records and writes them in bulk, one call per component."""
+
+    def __init__(self, save_output: Callable[[], Any], mode: str, save_to: Optional[str], batch_size: int):
+        self._save_output = save_output
+        self._mode = mode
+        self._save_to = save_to
+        self._batch_size = max(int(batch_size or 1), 1)
+        self._pending = {}  # component_id -> [records...]
+        self._size = 0
+        self.rows_written = 0
+        self.batches = 0
+        self.rows_by_component = {}
+        # Cells may run concurrently (see dag.run_cells).
+        self._lock = threading.RLock()
+
+    def add(self, component_id, record: dict) -> None:
+        with self._lock:
+            self._pending.setdefault(component_id, []).append(record)
+            self._size += 1
+            if self._size >= self._batch_size:
+                self.flush()
+
+    def __len__(self):
+        return self._size
+
+    def flush(self) -> dict:
+        with self._lock:
+            if not self._size:
+                return self.summary()
+            save = self._save_output()
+            if save is None:
+                raise RuntimeError("workflow_save_output is not available in this runtime")
+            pending, self._pending, self._size = self._pending, {}, 0
+            for component_id, records in pending.items():
+                save(records, mode=self._mode, save_to=self._save_to, component_id=component_id)
+                self.rows_written += len(records)
+                self.batches += 1
+                self.rows_by_component[component_id] = self.rows_by_component.get(component_id, 0) + len(records)
+            return self.summary()
+
+    def summary(self) -> dict:
+        return {
+            "rows": self.rows_written,
+            "batches": self.batches,
+            "pending": self._size,
+            "components": dict(self.rows_by_component),
+        }
+
+
+class OutputSample:
+    def __init__(self, save_fn):
+        self._save_fn = save_fn
+        self._value = None
+        self.TimeOfSample = None
+
+    @property
+    def Value(self):
+        return self._value
+
+    @Value.setter
+    def Value(self, v):
+        self._value = v
+        self._save_fn(v, date_time=self.TimeOfSample)
+
+
+class OutputSampleList:
+    def __init__(self, save_fn):
+        self._save_fn = save_fn
+        self._samples = []
+
+    def __getitem__(self, idx):
+        try:
+            i = int(idx)
+        except Exception:
+            i = 0
+        while len(self._samples) <= i:
+            self._samples.append(OutputSample(self._save_fn))
+        return self._samples[i]
+
+    def append(self, item=None, *, value=None, time=None, date_time=None, description=None):
+        dt = date_time if date_time is not None else time
+        s = OutputSample(self._save_fn)
+        if dt is not None:
+            s.TimeOfSample = dt
+        if item is not None and value is None:
+            if isinstance(item, dict):
+                v = item.get("Value") if "Value" in item else item.get("value")
+                td = item.get("TimeOfSample") if "TimeOfSample" in item else item.get("time")
+                if td is not None:
+                    s.TimeOfSample = td
+                if v is not None:
+                    self._save_fn(v, date_time=s.TimeOfSample, description=description)
+            else:
+                self._save_fn(item, date_time=s.TimeOfSample, description=description)
+        elif value is not None:
+            self._save_fn(value, date_time=s.TimeOfSample, description=description)
+        self._samples.append(s)
+        return s
+
+    def __len__(self):
+        return len(self._samples)
+
+    def __iter__(self):
+        return iter(self._samples)
+
+
+class OutputRowBinding:
+    def __init__(self, save_fn):
+        self._save_fn = save_fn
+        self.Sample = OutputSampleList(save_fn)
+
+    @property
+    def Value(self):
+        return None
+
+    @Value.setter
+    def Value(self, v):
+        self._save_fn(v)
+
+    def Save(self, value, date_time=None, description=None):
+        self._save_fn(value, date_time=date_time, description=description)
+
+
+class OutputRowCollection:
+    def __init__(self, save_by_row):
+        self._save_by_row = save_by_row or {}
+        self._cache = {}
+
+    def __getitem__(self, row_name):
+        if row_name in self._cache:
+            return self._cache[row_name]
+        if row_name not in self._save_by_row:
+            raise KeyError(row_name)
+        b = OutputRowBinding(self._save_by_row[row_name])
+        self._cache[row_name] = b
+        return b
+
+
+class OutputColumn:
+    def __init__(self, save_by_row):
+        self.Row = OutputRowCollection(save_by_row)
+
+
+class OutputsTable:
+    def __init__(self, columns, buffer: Optional[OutputBuffer] = None):
+        self._columns = columns or {}
+        self._buffer = buffer
+
+    def __getitem__(self, col_name):
+        if col_name not in self._columns:
+            raise KeyError(col_name)
+        return self._columns[col_name]
+
+    def flush(self) -> dict:
+        return self._buffer.flush() if self._buffer is not None else {}
+
+    def summary(self) -> dict:
+        return self._buffer.summary() if self._buffer is not None else {}
+
+
+def output_save_to_value(cfg: dict) -> Optional[str]:
+    v = (cfg or {}).get("saveTarget")
+    return "db" if v == "db" else None
+
+
+def build_outputs_table(tab: dict, buffer: OutputBuffer) -> OutputsTable:
+    object_type = tab.get("type") or None
+    instances = tab.get("instances") or []
+    cols_cfg = tab.get("columns") or []
+
+    def make_save(component_id, instance_name, property_name):
+        comp_id = int(component_id) if component_id is not None else None
+
+        def _save(value, date_time=None, description=None):
+            record = {
+                "component": comp_id,
+                "object_type": object_type,
+                "object_instance": instance_name,
+                "object_type_property": property_name,
+                "value": value,
+                "date_time": date_time,
+                "description": description,
+            }
+            buffer.add(comp_id, record)
+
+        return _save
+
+    columns = {}
+    for c in cols_cfg:
+        component_id = c.get("componentId")
+        prop = c.get("property")
+        save_by_row = {}
+        for inst in instances or []:
+            save_by_row[str(inst)] = make_save(component_id, str(inst), prop)
+        columns[_column_label(c)] = OutputColumn(save_by_row)
+
+    return OutputsTable(columns, buffer)
+
+
+# --- Namespace bootstrap ------------------------------------------------------
+
+
+class ConfigView:
+    def __init__(self, cfg):
+        self._cfg = cfg or {}
+        self.tabs = list(self._cfg.get("tabs") or [])
+        self.instances = {}  # type -> [instances...]
+        self.properties = {}  # type -> [properties...]
+        self.columns = {}  # type -> [column labels...]
+        for tab in self.tabs:
+            t = tab.get("type") or "Default"
+            inst = list(tab.get("instances") or [])
+            cols = list(tab.get("columns") or [])
+            props = [c.get("property") for c in cols if c.get("property")]
+            labels = [c.get("label") for c in cols if c.get("label")]
+            self.instances[t] = inst
+            self.properties[t] = props
+            self.columns[t] = labels
+
+
+def bootstrap(
+    namespace: dict,
+    inputs_cfg: Optional[dict],
+    outputs_cfg: Optional[dict],
+    tz_name: Optional[str] = None,
+    runtime_version: Optional[int] = None,
+) -> None:
+    """
+    Populate a workflow's globals with its input/output tables.
+
+    `internal` and `workflow_save_output` are taken from the namespace, as
+    provided by the worker. Defines <Type>InputsTable, <Type>OutputsTable,
+    `inputs`, `outputs` and `__wf_flush_outputs` (called by the epilogue).
+    """
+    if runtime_version is not None and int(runtime_version) > RUNTIME_VERSION:
+        raise RuntimeError(
+            f"Workflow requires tables runtime v{runtime_version}, worker has v{RUNTIME_VERSION}; reload workflow_runtime"
+        )
+
+    inputs_cfg = inputs_cfg or {}
+    outputs_cfg = outputs_cfg or {}
+    tz = ZoneInfo(tz_name) if tz_name else datetime.now().astimezone().tzinfo
+    internal = namespace.get("internal")
+
+    use_snapshot = bool(inputs_cfg.get("snapshot"))
+    for tab in inputs_cfg.get("tabs") or []:
+        var = f"{table_ident(tab.get('type') or 'Inputs')}InputsTable"
+        namespace[var] = build_inputs_table(tab, internal, tz, use_snapshot=use_snapshot or bool(tab.get("snapshot")))
+
+    buffer = OutputBuffer(
+        lambda: namespace.get("workflow_save_output"),
+        outputs_cfg.get("mode") or "append",
+        output_save_to_value(outputs_cfg),
+        outputs_cfg.get("batchSize") or DEFAULT_BATCH_SIZE,
+    )
+
+    for tab in outputs_cfg.get("tabs") or []:
+        var = f"{table_ident(tab.get('type') or 'Outputs')}OutputsTable"
+        namespace[var] = build_outputs_table(tab, buffer)
+
+    # Called from the `finally` the generated script wraps the cells in, so
+    # rows saved before a failing cell are still written.
+    def flush_outputs(report: bool = True) -> dict:
+        if not len(buffer) and not buffer.batches:
+            return buffer.summary()
+        summary = buffer.flush()
+        if report:
+            print(f"[workflow outputs] {summary['rows']} rows written in {summary['batches']} batch(es)")
+        return summary
+
+    namespace.setdefault("internal", None)
+    namespace.setdefault("workflow_save_output", None)
+    namespace["__wf_flush_outputs"] = flush_outputs
+    namespace["inputs"] = ConfigView(inputs_cfg)
+    namespace["outputs"] = ConfigView(outputs_cfg)
+
+
+__all__ = [
+    "RUNTIME_VERSION",
+    "bootstrap",
+    "build_inputs_table",
+    "build_outputs_table",
+    "resolve_date_range",
+    "table_ident",
+    "SampleList",
+    "InputsTable",
+    "OutputsTable",
+    "OutputBuffer",
+]
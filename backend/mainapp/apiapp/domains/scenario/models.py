@@ -1,6 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
+from apiapp.domains.catalog.models import ObjectInstance, ObjectType, ObjectTypeProperty
 from apiapp.domains.data.models import DataSourceComponent
 
 
@@ -12,6 +15,24 @@ class ScenarioClass(models.Model):
     start_date = models.DateTimeField(null=True, blank=True)
     end_date = models.DateTimeField(null=True, blank=True)
     task_id = models.CharField(max_length=255, blank=True, null=True)
+    summary_built_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Sensitivity cases: with storage_mode "delta" only rows that differ from the
+    # baseline by more than delta_tolerance are kept (services/scenario_storage.py),
+    # so a baseline cannot be deleted while scenarios are derived from it.
+    baseline = models.ForeignKey(
+        "self",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="derived_scenarios",
+        verbose_name="Baseline",
+    )
+    storage_mode = models.CharField(
+        max_length=10,
+        choices=[("full", "Full copy"), ("delta", "Differences from baseline")],
+        default="full",
+    )
+    delta_tolerance = models.FloatField(default=0.0, help_text="Relative tolerance for numeric values")
     is_approved = models.BooleanField(default=False)
     created_by = models.ForeignKey(
         "auth.User",
@@ -28,10 +49,23 @@ class ScenarioClass(models.Model):
         verbose_name_plural = "Scenarios"
         ordering = ["-created_date"]
         app_label = "apiapp"
+        # Cursor pagination of the scenario list walks this order.
+        indexes = [models.Index(fields=["-created_date", "-scenario_id"], name="scenario_created_idx")]
 
     def __str__(self):
         return self.scenario_name
 
+    def clean(self):
+        if self.storage_mode == "delta" and not self.baseline_id:
+            raise ValidationError("Delta storage needs a baseline scenario.")
+        seen = {self.pk}
+        baseline = self.baseline
+        while baseline is not None:
+            if baseline.pk in seen:
+                raise ValidationError("A scenario cannot be its own baseline.")
+            seen.add(baseline.pk)
+            baseline = baseline.baseline
+
 
 class ScenarioLog(models.Model):
     scenario = models.ForeignKey("ScenarioClass", on_delete=models.CASCADE, related_name="logs")
@@ -44,6 +78,71 @@ class ScenarioLog(models.Model):
         verbose_name = "ScenarioLog"
         verbose_name_plural = "ScenarioLogs"
         app_label = "apiapp"
+        indexes = [models.Index(fields=["timestamp"])]
+
+
+class ScenarioLogSummary(models.Model):
+    """Per-day roll-up of ScenarioLog rows removed by the log retention job."""
+
+    scenario = models.ForeignKey("ScenarioClass", on_delete=models.CASCADE, related_name="log_summaries")
+    day = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+    max_progress = models.IntegerField(default=0)
+    first_at = models.DateTimeField()
+    last_at = models.DateTimeField()
+    first_message = models.TextField(blank=True)
+    last_message = models.TextField(blank=True)
+
+    class Meta:
+        db_table = "apiapp_scenariolog_summary"
+        ordering = ["day"]
+        app_label = "apiapp"
+        constraints = [
+            models.UniqueConstraint(fields=["scenario", "day"], name="uniq_scenariolog_summary_day"),
+        ]
+
+    def as_log_entry(self):
+        return {
+            "id": None,
+            "scenario": self.scenario_id,
+            "timestamp": self.last_at,
+            "message": f"{self.day}: {self.total} messages, first: {self.first_message} / last: {self.last_message}",
+            "progress": self.max_progress,
+            "summary": True,
+        }
+
+
+class ScenarioSummary(models.Model):
+    """
+    Monthly roll-up of a finished scenario's numeric results, one row per
+    (instance, property, month). Built by services/scenario_summary.py.
+    """
+
+    scenario = models.ForeignKey("ScenarioClass", on_delete=models.CASCADE, related_name="summaries")
+    object_type = models.ForeignKey(ObjectType, on_delete=models.CASCADE)
+    object_instance = models.ForeignKey(ObjectInstance, on_delete=models.CASCADE)
+    object_type_property = models.ForeignKey(ObjectTypeProperty, on_delete=models.CASCADE)
+    period = models.DateField()
+    samples = models.PositiveIntegerField(default=0)
+    total = models.FloatField()
+    average = models.FloatField()
+    minimum = models.FloatField()
+    maximum = models.FloatField()
+    first_value = models.FloatField()
+    last_value = models.FloatField()
+    cumulative = models.FloatField()
+
+    class Meta:
+        db_table = "apiapp_scenario_summary"
+        ordering = ["period"]
+        app_label = "apiapp"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scenario", "object_instance", "object_type_property", "period"],
+                name="uniq_scenario_summary_period",
+            ),
+        ]
+        indexes = [models.Index(fields=["scenario", "object_type_property", "period"])]
 
 
 class ScenarioComponentLink(models.Model):
@@ -79,4 +178,28 @@ class ScenarioComponentLink(models.Model):
         super().save(*args, **kwargs)
 
 
-__all__ = ["ScenarioClass", "ScenarioLog", "ScenarioComponentLink"]
+@receiver(post_save, sender=ScenarioLog)
+def publish_scenario_log(sender, instance, **kwargs):
+    # Streamed to the scenario log view (see services/progress_events.py).
+    from apiapp.services.progress_events import SCENARIO_LOG_CHANNEL, publish, scenario_log_event
+
+    transaction.on_commit(
+        lambda: publish(SCENARIO_LOG_CHANNEL.format(instance.scenario_id), scenario_log_event(instance))
+    )
+
+
+@receiver(post_save, sender=ScenarioClass)
+def publish_scenario_status(sender, instance, **kwargs):
+    from apiapp.services.progress_events import SCENARIOS_CHANNEL, publish, scenario_event
+
+    transaction.on_commit(lambda: publish(SCENARIOS_CHANNEL, scenario_event(instance)))
+
+
+@receiver(post_delete, sender=ScenarioClass)
+def publish_scenario_deleted(sender, instance, **kwargs):
+    from apiapp.services.progress_events import SCENARIOS_CHANNEL, publish, scenario_event
+
+    transaction.on_commit(lambda: publish(SCENARIOS_CHANNEL, dict(scenario_event(instance), status="DELETED")))
+
+
+__all__ = ["ScenarioClass", "ScenarioLog", "ScenarioLogSummary", "ScenarioSummary", "ScenarioComponentLink"]
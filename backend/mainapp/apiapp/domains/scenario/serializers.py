@@ -18,6 +18,9 @@ class ScenarioClassSerializer(serializers.ModelSerializer):
             "created_by",
             "created_date",
             "is_approved",
+            "baseline",
+            "storage_mode",
+            "delta_tolerance",
         ]
         read_only_fields = ["scenario_id", "created_by", "created_date"]
 
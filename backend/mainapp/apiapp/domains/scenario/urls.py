@@ -3,11 +3,16 @@ from django.urls import path
 from apiapp.domains.scenario.views import (
     ComponentsByDataSourceView,
     RunScenarioView,
+    ScenarioCompareView,
     ScenarioCreateView,
     ScenarioDeleteView,
+    ScenarioExportView,
     ScenarioListView,
     ScenarioLogsView,
     ScenarioResultsView,
+    ScenarioStatusView,
+    scenario_events,
+    scenario_log_events,
 )
 from apiapp.domains.workflow.views import TaskManagementView, WorkersStatusView
 
@@ -17,7 +22,12 @@ urlpatterns = [
     path("scenarios/run/<int:scenario_id>/", RunScenarioView.as_view(), name="scenario-run"),
     path("scenarios/<int:scenario_id>/start/", RunScenarioView.as_view(), name="scenario-start"),
     path("scenarios/<int:scenario_id>/logs/", ScenarioLogsView.as_view(), name="scenario-logs"),
+    path("scenarios/<int:scenario_id>/events/", scenario_log_events, name="scenario-log-events"),
+    path("scenarios/events/", scenario_events, name="scenario-events"),
+    path("scenarios/status/", ScenarioStatusView.as_view(), name="scenario-status"),
     path("scenarios/<int:scenario_id>/results/", ScenarioResultsView.as_view(), name="scenario-results"),
+    path("scenarios/compare/", ScenarioCompareView.as_view(), name="scenario-compare"),
+    path("scenarios/<int:scenario_id>/export/<str:fmt>/", ScenarioExportView.as_view(), name="scenario-export"),
     path("scenarios/<int:scenario_id>/delete/", ScenarioDeleteView.as_view(), name="scenario-delete"),
     path("scenarios/workers-status/", WorkersStatusView.as_view(), name="scenario-workers-status"),
     path("scenarios/task/<str:task_id>/", TaskManagementView.as_view(), name="scenario-task"),
@@ -1,15 +1,45 @@
+from datetime import datetime, time
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db.models import OuterRef, Prefetch, Subquery
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.text import slugify
 from rest_framework import status
+from rest_framework.pagination import CursorPagination
+from rest_framework.renderers import JSONRenderer
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from apiapp.domains.data.models import DataSource, DataSourceComponent, MainClass
+from apiapp.domains.data.models import DataSource, DataSourceComponent
 from apiapp.domains.data.serializers import DataSourceComponentSerializer, MainClassSerializer
-from apiapp.domains.scenario.models import ScenarioClass, ScenarioComponentLink
+from apiapp.domains.scenario.models import ScenarioClass, ScenarioComponentLink, ScenarioLog
 from apiapp.domains.scenario.serializers import ScenarioClassSerializer, ScenarioLogSerializer
-from mainapp.celery import app
+from apiapp.services.progress_events import (
+    SCENARIO_LOG_CHANNEL,
+    SCENARIOS_CHANNEL,
+    Subscription,
+    event_stream,
+    publish_many,
+    scenario_event,
+    scenario_log_event,
+    sse,
+    unauthorized,
+    user_from_query_token,
+)
+from apiapp.services import result_cache
+from apiapp.services.result_export import QueryTokenAuthentication, export_response, unavailable_reason
+from apiapp.services.scenario_fanout import dispatch_scenario
+from apiapp.services.scenario_purge import DELETING
+from apiapp.services.scenario_storage import delta_dependents, results_queryset
+from apiapp.services.scenario_summary import METRICS, as_records, summary_rows
+from apiapp.services.task_index import cancel_task, dispatch_task
+from apiapp.services.task_status import fetch_task_states
 
 
 class ScenarioCreateView(APIView):
@@ -21,12 +51,23 @@ class ScenarioCreateView(APIView):
         if not scenario_name or not components:
             return Response({"error": "Scenario name and components required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        scenario = ScenarioClass.objects.create(
+        baseline_id = request.data.get("baseline_id")
+        scenario = ScenarioClass(
             scenario_name=scenario_name,
             description=description,
             created_by=request.user,
             status="new",
+            baseline=get_object_or_404(ScenarioClass, pk=baseline_id) if baseline_id else None,
+            storage_mode=request.data.get("storage_mode") or "full",
         )
+        try:
+            scenario.delta_tolerance = float(request.data.get("delta_tolerance") or 0)
+            scenario.clean_fields(exclude=["created_by", "baseline"])
+            scenario.clean()
+        except (TypeError, ValueError, ValidationError) as e:
+            message = e.messages if isinstance(e, ValidationError) else str(e)
+            return Response({"error": message}, status=status.HTTP_400_BAD_REQUEST)
+        scenario.save()
 
         for comp in components:
             component_id = comp.get("component_id")
@@ -56,46 +97,237 @@ class ComponentsByDataSourceView(APIView):
         return Response(result)
 
 
+class ScenarioCursorPagination(CursorPagination):
+    # created_date alone is not unique; scenario_id breaks ties so pages never overlap.
+    ordering = ("-created_date", "-scenario_id")
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
 class ScenarioListView(APIView):
+    """
+    Scenarios with their components, newest first, one cursor page at a time.
+
+    Filters: status (comma separated), owner (username or "me"),
+    created_from / created_to (ISO date or datetime), q (name contains).
+    Two queries per page whatever the table size: the page (with owners), and
+    the component links with their components and data sources.
+    """
+
+    pagination_class = ScenarioCursorPagination
+
     def get(self, request):
-        scenarios = ScenarioClass.objects.select_related("created_by").all()
-        result = []
-        for scenario in scenarios:
-            links = ScenarioComponentLink.objects.filter(scenario=scenario).select_related("component")
-            components = []
-            for link in links:
-                comp = link.component
-                components.append(
-                    {
-                        "id": comp.id,
-                        "name": getattr(comp, "name", ""),
-                        "description": getattr(comp, "description", ""),
-                        "data_source_name": getattr(comp.data_source, "data_source_name", ""),
-                    }
-                )
-            result.append(
+        try:
+            scenarios = self._filter(request, ScenarioClass.objects.all())
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        scenarios = scenarios.select_related("created_by", "baseline").prefetch_related(
+            Prefetch(
+                "scenariocomponentlink_set",
+                queryset=ScenarioComponentLink.objects.select_related("component__data_source").order_by("id"),
+            )
+        )
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(scenarios, request, view=self)
+        return paginator.get_paginated_response([self._row(scenario) for scenario in page])
+
+    @staticmethod
+    def _filter(request, qs):
+        params = request.query_params
+        statuses = [s.strip() for s in params.get("status", "").split(",") if s.strip()]
+        if statuses:
+            qs = qs.filter(status__in=statuses)
+
+        owner = params.get("owner")
+        if owner == "me":
+            qs = qs.filter(created_by=request.user)
+        elif owner:
+            qs = qs.filter(created_by__username=owner)
+
+        for param, lookup in (("created_from", "created_date__gte"), ("created_to", "created_date__lte")):
+            value = params.get(param)
+            if not value:
+                continue
+            parsed = parse_datetime(value)
+            if parsed is None:
+                day = parse_date(value)
+                if day is None:
+                    raise ValueError(f"Invalid {param}: {value}")
+                # A bare created_to date includes the whole day.
+                parsed = datetime.combine(day, time.max if param == "created_to" else time.min)
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            qs = qs.filter(**{lookup: parsed})
+
+        search = params.get("q", "").strip()
+        if search:
+            qs = qs.filter(scenario_name__icontains=search)
+        return qs
+
+    @staticmethod
+    def _row(scenario):
+        components = []
+        for link in scenario.scenariocomponentlink_set.all():
+            comp = link.component
+            components.append(
                 {
-                    "scenario_id": scenario.scenario_id,
-                    "scenario_name": scenario.scenario_name,
-                    "description": scenario.description,
-                    "status": scenario.status,
-                    "start_date": scenario.start_date,
-                    "end_date": scenario.end_date,
-                    "is_approved": scenario.is_approved,
-                    "created_by": getattr(scenario.created_by, "username", None),
-                    "created_date": scenario.created_date,
-                    "components": components,
+                    "id": comp.id,
+                    "name": getattr(comp, "name", ""),
+                    "description": getattr(comp, "description", ""),
+                    "data_source_name": getattr(comp.data_source, "data_source_name", ""),
                 }
             )
-        return Response(result)
+        return {
+            "scenario_id": scenario.scenario_id,
+            "scenario_name": scenario.scenario_name,
+            "description": scenario.description,
+            "status": scenario.status,
+            "start_date": scenario.start_date,
+            "end_date": scenario.end_date,
+            "is_approved": scenario.is_approved,
+            "created_by": getattr(scenario.created_by, "username", None),
+            "created_date": scenario.created_date,
+            "baseline": getattr(scenario.baseline, "scenario_name", None),
+            "storage_mode": scenario.storage_mode,
+            "components": components,
+        }
+
+
+def _since_id(value):
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+# Celery states that overwrite ScenarioClass.status; PENDING only means "no result yet".
+RECONCILED_STATES = {"STARTED", "RETRY", "SUCCESS", "FAILURE", "REVOKED"}
+ACTIVE_SCENARIO_STATUSES = {"QUEUED", "PENDING", "STARTED", "RETRY"}
+MAX_STATUS_IDS = 500
+
+
+class ScenarioStatusView(APIView):
+    """
+    Status of many scenarios in one call: GET ?ids=1,2,3 or POST {"ids": [...]}.
+    Task states come from the result backend in one MGET and changed
+    statuses are saved with one bulk update.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return self._status(request.query_params.get("ids", "").split(","))
+
+    def post(self, request):
+        return self._status(request.data.get("ids") or [])
+
+    def _status(self, raw_ids):
+        try:
+            ids = sorted({int(i) for i in raw_ids if str(i).strip()})
+        except (TypeError, ValueError):
+            return Response({"error": "ids must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > MAX_STATUS_IDS:
+            return Response({"error": f"At most {MAX_STATUS_IDS} ids per request"}, status=status.HTTP_400_BAD_REQUEST)
+
+        latest_progress = ScenarioLog.objects.filter(scenario_id=OuterRef("pk")).order_by("-id").values("progress")[:1]
+        scenarios = list(
+            ScenarioClass.objects.filter(scenario_id__in=ids)
+            .only("scenario_id", "status", "task_id")
+            .annotate(progress=Subquery(latest_progress))
+        )
+
+        try:
+            states = fetch_task_states([s.task_id for s in scenarios])
+        except Exception as e:
+            print(f"Result backend error: {e}")
+            states = {}
+
+        changed = []
+        for scenario in scenarios:
+            state = states.get(scenario.task_id)
+            if state in RECONCILED_STATES and state != scenario.status and scenario.status != DELETING:
+                scenario.status = state
+                changed.append(scenario)
+        if changed:
+            ScenarioClass.objects.bulk_update(changed, ["status"])
+            publish_many(SCENARIOS_CHANNEL, [scenario_event(s) for s in changed])
+
+        return Response([
+            {
+                "scenario_id": s.scenario_id,
+                "status": s.status,
+                "task_id": s.task_id,
+                "task_state": states.get(s.task_id),
+                "progress": s.progress,
+            }
+            for s in scenarios
+        ])
 
 
 class ScenarioLogsView(APIView):
     def get(self, request, scenario_id):
         scenario = ScenarioClass.objects.get(scenario_id=scenario_id)
-        logs = scenario.logs.order_by("timestamp")
-        serializer = ScenarioLogSerializer(logs, many=True)
-        return Response(serializer.data)
+
+        # ?since_id=N: only rows added after the last one the client has.
+        since_id = _since_id(request.query_params.get("since_id"))
+        if since_id is not None:
+            logs = scenario.logs.filter(id__gt=since_id).order_by("id")
+            return Response(ScenarioLogSerializer(logs, many=True).data)
+
+        logs = list(scenario.logs.order_by("timestamp"))
+        data = ScenarioLogSerializer(logs, many=True).data
+
+        # Days compacted by the retention job come first, as one row per day.
+        summaries = scenario.log_summaries.all()
+        if logs:
+            summaries = summaries.filter(last_at__lt=logs[0].timestamp)
+        return Response([s.as_log_entry() for s in summaries.order_by("day")] + list(data))
+
+
+async def scenario_log_events(request, scenario_id):
+    """
+    SSE stream of new ScenarioLog rows of one scenario. Rows after since_id
+    (or Last-Event-ID on reconnect) are sent first from the database.
+    """
+    if await user_from_query_token(request) is None:
+        return unauthorized()
+    since_id = _since_id(request.headers.get("Last-Event-ID") or request.GET.get("since_id"))
+
+    async def stream():
+        async with Subscription(SCENARIO_LOG_CHANNEL.format(scenario_id)) as subscription:
+            last_id = since_id
+            if since_id is not None:
+                backlog = await sync_to_async(list)(
+                    ScenarioLog.objects.filter(scenario_id=scenario_id, id__gt=since_id).order_by("id")[:1000]
+                )
+                for log in backlog:
+                    yield sse(scenario_log_event(log), log.id)
+                    last_id = log.id
+            async for event in subscription.events():
+                if event is None:
+                    yield ": ping\n\n"
+                    continue
+                if last_id is not None and event["id"] <= last_id:
+                    continue
+                last_id = event["id"]
+                yield sse(event, event["id"])
+
+    return event_stream(stream())
+
+
+async def scenario_events(request):
+    """SSE stream of scenario status changes."""
+    if await user_from_query_token(request) is None:
+        return unauthorized()
+
+    async def stream():
+        async with Subscription(SCENARIOS_CHANNEL) as subscription:
+            async for event in subscription.events():
+                yield ": ping\n\n" if event is None else sse(event)
+
+    return event_stream(stream())
 
 
 class ScenarioDeleteView(APIView):
@@ -104,32 +336,92 @@ class ScenarioDeleteView(APIView):
         user = request.user if hasattr(request, "user") else None
 
         if user and (getattr(user, "is_superuser", False) or scenario.created_by_id == getattr(user, "id", None)):
-            scenario.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
+            dependents = list(scenario.derived_scenarios.values_list("scenario_name", flat=True))
+            if dependents:
+                return Response(
+                    {"error": f"Scenario is the baseline of: {', '.join(dependents)}"},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            if scenario.status != DELETING:
+                if scenario.task_id and scenario.status in ACTIVE_SCENARIO_STATUSES:
+                    try:
+                        cancel_task(scenario.task_id, terminate=True)
+                    except Exception as e:
+                        print(f"Failed to revoke task {scenario.task_id} of deleted scenario {scenario_id}: {e}")
+                scenario.status = DELETING
+                scenario.save(update_fields=["status"])
+                result_cache.invalidate(scenario.pk)
+            # Result rows are removed by mainserver.purge_scenario, chunk by chunk.
+            try:
+                dispatch_task("mainserver.purge_scenario", [scenario.pk], "default")
+            except Exception as e:
+                # `manage.py purge_orphan_results` picks up scenarios left in DELETING.
+                print(f"Failed to queue purge of scenario {scenario_id}: {e}")
+            return Response({"scenario_id": scenario.pk, "status": DELETING}, status=status.HTTP_202_ACCEPTED)
 
         return Response({"error": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
 
 
+def _parse_bound(value):
+    dt = parse_datetime(value) if value else None
+    if dt is not None and timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def _summary_metric(request):
+    """The ?summary=<metric> of an overview request, None for raw records; raises ValueError."""
+    metric = request.query_params.get("summary")
+    if metric and metric not in METRICS:
+        raise ValueError(f"summary must be one of {', '.join(METRICS)}")
+    return metric or None
+
+
+def _property_ids(request):
+    raw = request.query_params.get("object_type_property", "")
+    return [int(p) for p in raw.split(",") if p.strip()]
+
+
 class ScenarioResultsView(APIView):
+    """
+    Result records of a scenario. With ?summary=<metric> (total, average, min,
+    max, first, last, cumulative) one point per instance/property/month is
+    served from ScenarioSummary instead of the raw rows.
+
+    Responses for SUCCESS scenarios are kept in the result cache until the
+    scenario is re-run or deleted.
+    """
+
     permission_classes = [IsAuthenticated]
 
     def get(self, request, scenario_id: int):
         scenario = get_object_or_404(ScenarioClass, scenario_id=scenario_id)
-
-        qs = MainClass.objects.filter(scenario_id=scenario_id).order_by("date_time")
-
-        start_s = request.query_params.get("start")
-        end_s = request.query_params.get("end")
-        if start_s:
-            from django.utils.dateparse import parse_datetime
-            dt = parse_datetime(start_s)
-            if dt:
-                qs = qs.filter(date_time__gte=dt)
-        if end_s:
-            from django.utils.dateparse import parse_datetime
-            dt = parse_datetime(end_s)
-            if dt:
-                qs = qs.filter(date_time__lte=dt)
+        try:
+            metric = _summary_metric(request)
+            property_ids = _property_ids(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        start = _parse_bound(request.query_params.get("start"))
+        end = _parse_bound(request.query_params.get("end"))
+
+        # Cache only once post-processing (compaction, summary) has finished.
+        cacheable = scenario.status == "SUCCESS" and scenario.summary_built_at is not None
+        if cacheable:
+            cached = result_cache.get(scenario.pk, request.query_params)
+            if cached is not None:
+                return HttpResponse(cached, content_type="application/json")
+
+        if metric:
+            records = as_records(summary_rows(scenario, start, end, property_ids), metric)
+        else:
+            qs = results_queryset(scenario).order_by("date_time")
+            if start:
+                qs = qs.filter(date_time__gte=start)
+            if end:
+                qs = qs.filter(date_time__lte=end)
+            if property_ids:
+                qs = qs.filter(object_type_property_id__in=property_ids)
+            records = MainClassSerializer(qs.select_related("component__data_source"), many=True).data
 
         data = {
             "scenario": {
@@ -145,12 +437,87 @@ class ScenarioResultsView(APIView):
                 }
                 for link in ScenarioComponentLink.objects.select_related("component", "component__data_source").filter(scenario=scenario)
             ],
-            "records": MainClassSerializer(qs, many=True).data,
+            "summary": metric,
+            "records": records,
         }
 
+        # Skip the fill if a re-run started while the rows were being read.
+        if cacheable and ScenarioClass.objects.filter(
+            pk=scenario.pk, status="SUCCESS", summary_built_at__isnull=False
+        ).exists():
+            result_cache.put(scenario.pk, request.query_params, JSONRenderer().render(data))
         return Response(data, status=status.HTTP_200_OK)
 
 
+class ScenarioExportView(APIView):
+    """
+    Download a scenario's results as csv, xlsx or parquet, streamed from the
+    database (see services/result_export.py). Takes the same start, end and
+    object_type_property filters as the results view.
+    """
+
+    authentication_classes = [QueryTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, scenario_id, fmt):
+        scenario = get_object_or_404(ScenarioClass, scenario_id=scenario_id)
+        reason = unavailable_reason(fmt)
+        if reason:
+            return Response({"error": reason}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            property_ids = _property_ids(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        qs = results_queryset(scenario)
+        start = _parse_bound(request.query_params.get("start"))
+        end = _parse_bound(request.query_params.get("end"))
+        if start:
+            qs = qs.filter(date_time__gte=start)
+        if end:
+            qs = qs.filter(date_time__lte=end)
+        if property_ids:
+            qs = qs.filter(object_type_property_id__in=property_ids)
+        return export_response(qs, fmt, slugify(scenario.scenario_name) or f"scenario_{scenario.pk}")
+
+
+class ScenarioCompareView(APIView):
+    """
+    Overview of several scenarios side by side:
+    GET ?ids=1,2,3&summary=<metric>[&object_type_property=..&start=..&end=..].
+    Records carry their scenario id; all come from ScenarioSummary.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            ids = [int(i) for i in request.query_params.get("ids", "").split(",") if i.strip()]
+            metric = _summary_metric(request) or "average"
+            property_ids = _property_ids(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not ids:
+            return Response({"error": "ids is required"}, status=status.HTTP_400_BAD_REQUEST)
+        start = _parse_bound(request.query_params.get("start"))
+        end = _parse_bound(request.query_params.get("end"))
+
+        scenarios = list(ScenarioClass.objects.filter(scenario_id__in=ids).order_by("scenario_id"))
+        records = []
+        for scenario in scenarios:
+            records.extend(as_records(summary_rows(scenario, start, end, property_ids), metric))
+        return Response(
+            {
+                "scenarios": [
+                    {"scenario_id": s.scenario_id, "scenario_name": s.scenario_name, "status": s.status}
+                    for s in scenarios
+                ],
+                "summary": metric,
+                "records": records,
+            }
+        )
+
+
 class RunScenarioView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -161,22 +528,41 @@ class RunScenarioView(APIView):
         if not scenario_id or not start_date or not end_date:
             return Response({"error": "Missing parameters"}, status=status.HTTP_400_BAD_REQUEST)
 
-        task = app.send_task("worker.run_scenario", args=[scenario_id, start_date, end_date], queue="scenarios")
+        scenario = get_object_or_404(ScenarioClass, pk=scenario_id)
+        if scenario.status == DELETING:
+            return Response({"error": "Scenario is being deleted"}, status=status.HTTP_409_CONFLICT)
+        # Delta scenarios read the baseline's rows; re-running it would change their results.
+        dependents = list(delta_dependents(scenario).values_list("scenario_name", flat=True))
+        if dependents:
+            return Response(
+                {"error": f"Scenario is the baseline of delta scenarios: {', '.join(dependents)}"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        try:
+            task_id, chunks = dispatch_scenario(scenario_id, start_date, end_date)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        scenario = ScenarioClass.objects.get(pk=scenario_id)
-        scenario.task_id = task.id
+        scenario.task_id = task_id
         scenario.status = "QUEUED"
+        scenario.summary_built_at = None
         scenario.save()
+        result_cache.invalidate(scenario.pk)
 
-        return Response({"task_id": task.id, "status": "QUEUED"})
+        return Response({"task_id": task_id, "status": "QUEUED", "chunks": chunks})
 
 
 __all__ = [
     "ScenarioCreateView",
     "ComponentsByDataSourceView",
     "ScenarioListView",
+    "ScenarioStatusView",
     "ScenarioLogsView",
+    "scenario_log_events",
+    "scenario_events",
     "ScenarioDeleteView",
     "ScenarioResultsView",
+    "ScenarioCompareView",
+    "ScenarioExportView",
     "RunScenarioView",
 ]
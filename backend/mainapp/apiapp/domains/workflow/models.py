@@ -1,5 +1,7 @@
 import os
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 from apiapp.domains.data.models import DataSourceComponent
 
@@ -12,6 +14,10 @@ def workflow_ipynb_path(instance, filename):
     return os.path.join("workflows", f"{instance.component.id}.ipynb")
 
 
+def workflow_version_file_path(workflow_id, code_hash, ext="py"):
+    return os.path.join("workflows", str(workflow_id), f"{code_hash}.{ext}")
+
+
 class Workflow(models.Model):
     component = models.OneToOneField(
         DataSourceComponent,
@@ -19,6 +25,16 @@ class Workflow(models.Model):
         related_name="workflow",
     )
     cells = models.JSONField(default=list, blank=True)
+    execution_mode = models.CharField(
+        max_length=20,
+        choices=[
+            ("sequential", "Sequential"),
+            ("threads", "Parallel (threads)"),
+            ("processes", "Parallel (processes)"),
+        ],
+        default="sequential",
+        help_text="Non-sequential modes run independent cells concurrently, see workflow_runtime/dag.py",
+    )
     outputs_config = models.JSONField(default=dict, blank=True)
     inputs_config = models.JSONField(default=dict, blank=True)
     code_file = models.FileField(upload_to=workflow_code_path, blank=True, null=True)
@@ -42,6 +58,39 @@ class Workflow(models.Model):
         return ""
 
 
+class WorkflowVersion(models.Model):
+    """
+    One saved revision of a workflow, addressed by the hash of its generated code.
+
+    Identical saves map to the same row and files; `cells` keeps the notebook
+    blocks so versions can be listed and loaded without reading the files.
+    """
+
+    workflow = models.ForeignKey(Workflow, on_delete=models.CASCADE, related_name="versions")
+    code_hash = models.CharField(max_length=64)
+    label = models.CharField(max_length=32, help_text="Timestamp label shown in the editor")
+    cells = models.JSONField(default=list, blank=True)
+    code_file = models.CharField(max_length=255)
+    ipynb_file = models.CharField(max_length=255)
+    created_by = models.ForeignKey("auth.User", on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "apiapp_workflow_version"
+        ordering = ["-created_at"]
+        app_label = "apiapp"
+        constraints = [
+            models.UniqueConstraint(fields=["workflow", "code_hash"], name="uniq_workflow_version_hash"),
+        ]
+        indexes = [
+            models.Index(fields=["workflow", "label"]),
+            models.Index(fields=["workflow", "-created_at"]),
+        ]
+
+    def __str__(self):
+        return f"Workflow {self.workflow_id} @ {self.label} ({self.code_hash[:12]})"
+
+
 class WorkflowScheduler(models.Model):
     workflow = models.ForeignKey(
         Workflow,
@@ -56,6 +105,18 @@ class WorkflowScheduler(models.Model):
     next_run = models.DateTimeField(null=True, blank=True)
     last_run = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
+    overlap_policy = models.CharField(
+        max_length=10,
+        choices=[
+            ("allow", "Always queue"),
+            ("skip", "Skip if running"),
+            ("queue", "Queue at most N"),
+            ("replace", "Replace oldest"),
+        ],
+        default="allow",
+        help_text="What to do when the workflow still has queued/running runs, see services/workflow_dispatch.py",
+    )
+    max_queued = models.PositiveIntegerField(default=1, help_text="N for the 'queue' and 'replace' policies")
     created_by = models.ForeignKey("auth.User", on_delete=models.SET_NULL, null=True, blank=True)
     created_date = models.DateTimeField(auto_now_add=True)
 
@@ -85,11 +146,58 @@ class WorkflowSchedulerLog(models.Model):
         verbose_name_plural = "Workflow Scheduler Logs"
         ordering = ["-timestamp"]
         app_label = "apiapp"
+        indexes = [models.Index(fields=["timestamp"])]
 
     def __str__(self):
         return f"{self.scheduler.id} @ {self.timestamp} -> {self.status}"
 
 
+class WorkflowSchedulerLogSummary(models.Model):
+    """Per-day roll-up of WorkflowSchedulerLog rows removed by the log retention job."""
+
+    scheduler = models.ForeignKey(
+        WorkflowScheduler,
+        on_delete=models.CASCADE,
+        related_name="log_summaries",
+    )
+    day = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+    status_counts = models.JSONField(default=dict, blank=True)
+    first_at = models.DateTimeField()
+    last_at = models.DateTimeField()
+    first_message = models.TextField(blank=True, null=True)
+    last_message = models.TextField(blank=True, null=True)
+
+    class Meta:
+        db_table = "apiapp_workflow_scheduler_log_summary"
+        ordering = ["-day"]
+        app_label = "apiapp"
+        constraints = [
+            models.UniqueConstraint(fields=["scheduler", "day"], name="uniq_wf_sched_log_summary_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.scheduler_id} @ {self.day}: {self.total} log(s)"
+
+    def as_log_entry(self):
+        counts = ", ".join(f"{k}: {v}" for k, v in sorted(self.status_counts.items()))
+        return {
+            "id": None,
+            "scheduler": self.scheduler_id,
+            "timestamp": self.last_at,
+            "status": "SUMMARY",
+            "message": f"{self.day}: {self.total} entries ({counts}). Last: {self.last_message or ''}",
+            "summary": {
+                "day": self.day,
+                "total": self.total,
+                "status_counts": self.status_counts,
+                "first_at": self.first_at,
+                "first_message": self.first_message,
+                "last_message": self.last_message,
+            },
+        }
+
+
 class WorkflowRun(models.Model):
     workflow = models.ForeignKey(Workflow, on_delete=models.CASCADE, related_name="runs")
     scheduler = models.ForeignKey(
@@ -105,6 +213,8 @@ class WorkflowRun(models.Model):
     status = models.CharField(max_length=50, default="QUEUED")
     output = models.TextField(blank=True, null=True)
     error = models.TextField(blank=True, null=True)
+    # Per-cell [{index, label, depends_on, status, worker, start, end, duration_ms, error}]
+    timeline = models.JSONField(default=list, blank=True)
 
     class Meta:
         db_table = "apiapp_workflow_run"
@@ -115,9 +225,28 @@ class WorkflowRun(models.Model):
         return f"Workflow {self.workflow_id} run @ {self.started_at} -> {self.status}"
 
 
+@receiver(post_save, sender=WorkflowScheduler)
+@receiver(post_delete, sender=WorkflowScheduler)
+def notify_schedule_dispatcher(sender, instance, **kwargs):
+    # Wake run_workflow_scheduler so it reloads next_run times (see services/schedule_dispatcher.py).
+    from apiapp.services.schedule_dispatcher import publish_schedule_change
+
+    transaction.on_commit(lambda: publish_schedule_change(instance.pk))
+
+
+@receiver(post_save, sender=WorkflowRun)
+def publish_workflow_run(sender, instance, **kwargs):
+    # Streamed to the run history view (see services/progress_events.py).
+    from apiapp.services.progress_events import WORKFLOW_RUNS_CHANNEL, publish, workflow_run_event
+
+    transaction.on_commit(lambda: publish(WORKFLOW_RUNS_CHANNEL, workflow_run_event(instance)))
+
+
 __all__ = [
     "Workflow",
+    "WorkflowVersion",
     "WorkflowScheduler",
     "WorkflowSchedulerLog",
+    "WorkflowSchedulerLogSummary",
     "WorkflowRun",
 ]
@@ -39,6 +39,8 @@ class WorkflowSchedulerSerializer(serializers.ModelSerializer):
             "next_run",
             "last_run",
             "is_active",
+            "overlap_policy",
+            "max_queued",
             "created_date",
         ]
 
@@ -62,6 +64,7 @@ class WorkflowRunSerializer(serializers.ModelSerializer):
             "status",
             "output",
             "error",
+            "timeline",
         ]
 
 
@@ -9,6 +9,7 @@ from apiapp.domains.workflow.views import (
     WorkflowSchedulerLogViewSet,
     WorkflowSchedulerViewSet,
     WorkflowViewSet,
+    workflow_run_events,
 )
 
 router = DefaultRouter()
@@ -23,6 +24,7 @@ urlpatterns = [
     path("workflows/workers-status/", WorkersStatusView.as_view(), name="workflow-workers-status"),
     path("workflows/task/<str:task_id>/", TaskManagementView.as_view(), name="workflow-task"),
     path("workers/schedule/", WorkersStatusView.as_view(), name="workers-schedule"),
+    path("workflows/runs/events/", workflow_run_events, name="workflow-run-events"),
 ]
 
 __all__ = ["urlpatterns", "router"]
@@ -1,10 +1,10 @@
+import hashlib
 import json
 import os
+import uuid
 from datetime import datetime
 from pathlib import Path
 
-import nbformat
-import redis
 from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
@@ -15,7 +15,17 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from apiapp.domains.data.models import DataSourceComponent
-from apiapp.domains.workflow.models import Workflow, WorkflowRun, WorkflowScheduler, WorkflowSchedulerLog
+from apiapp.domains.integration.petex_client.license import LicenseSemaphore
+from apiapp.domains.scenario.models import ScenarioClass
+from apiapp.domains.workflow.models import (
+    Workflow,
+    WorkflowRun,
+    WorkflowScheduler,
+    WorkflowSchedulerLog,
+    WorkflowSchedulerLogSummary,
+    WorkflowVersion,
+    workflow_version_file_path,
+)
 from apiapp.domains.workflow.serializers import (
     WorkflowListSerializer,
     WorkflowRunSerializer,
@@ -24,14 +34,27 @@ from apiapp.domains.workflow.serializers import (
     WorkflowSerializer,
 )
 from apiapp.services.scheduler_runner import run_due_workflow_schedules
+from apiapp.services.progress_events import (
+    WORKFLOW_RUNS_CHANNEL,
+    Subscription,
+    event_stream,
+    publish_scenarios,
+    publish_workflow_runs,
+    sse,
+    unauthorized,
+    user_from_query_token,
+)
+from apiapp.services.redis_client import get_redis
+from apiapp.services.task_index import cancel_task, dispatch_task
+from apiapp.services.worker_status import read_worker_status
+from apiapp.services.workflow_dispatch import ACTIVE_STATUSES, AdmissionState, release_runs
 from mainapp.celery import app as celery_app
-from apiapp.utils.notebook_converter import block_to_python, python_to_block
-from apiapp.utils.workflow_tables_bootstrap import build_workflow_tables_bootstrap
-
-
-def workflow_version_path(workflow, ext="py"):
-    ts = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
-    return os.path.join("workflows", str(workflow.id), f"{workflow.id}_{ts}.{ext}")
+from apiapp.utils.notebook_converter import block_to_python, python_to_notebook_json
+from apiapp.utils.workflow_tables_bootstrap import (
+    build_workflow_cells_runner,
+    build_workflow_tables_bootstrap,
+    build_workflow_tables_flush,
+)
 
 
 class WorkflowViewSet(viewsets.ModelViewSet):
@@ -54,105 +77,102 @@ class WorkflowViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["get"], url_path="versions")
     def versions(self, request, component_id=None):
         wf = self.get_object()
-        base = Path(settings.MEDIA_ROOT) / "workflows" / str(wf.id)
-        versions = []
-
-        if base.exists():
-            for f in base.glob(f"{wf.id}_*.py"):
-                ts = f.stem.split("_", 1)[1]
-                versions.append(ts)
-
-        active = ""
-        if wf.code_file:
-            try:
-                active = Path(wf.code_file.name).stem.split("_", 1)[1]
-            except Exception:
-                active = ""
+        versions = list(wf.versions.order_by("-created_at").values_list("label", flat=True))
+        active = (
+            wf.versions.filter(code_file=wf.code_file.name).values_list("label", flat=True).first()
+            if wf.code_file
+            else None
+        )
+        return Response({"versions": versions, "active": active or ""})
 
-        return Response({"versions": sorted(versions, reverse=True), "active": active})
+    def _get_version(self, workflow, data):
+        code_hash = data.get("hash")
+        if code_hash:
+            return workflow.versions.filter(code_hash=code_hash).first()
+        ts = data.get("timestamp")
+        if ts:
+            return workflow.versions.filter(label=ts).order_by("-created_at").first()
+        return None
 
     @action(detail=True, methods=["get"], url_path="load_version")
     def load_version(self, request, component_id=None):
         workflow = self.get_object()
-        ts = request.query_params.get("timestamp")
-        if not ts:
+        if not (request.query_params.get("timestamp") or request.query_params.get("hash")):
             return Response({"error": "timestamp required"}, status=400)
 
-        ipynb_path = Path(settings.MEDIA_ROOT) / "workflows" / str(workflow.id) / f"{workflow.id}_{ts}.ipynb"
-        if not ipynb_path.exists():
+        version = self._get_version(workflow, request.query_params)
+        if version is None:
             return Response({"error": "Version not found"}, status=404)
 
-        nb = nbformat.read(ipynb_path, as_version=4)
-        cells = []
-        for c in nb.cells:
-            if c.cell_type == "code":
-                src = "".join(c.source)
-                block = python_to_block(src)
-                cells.append(block)
-
-        return Response({"cells": cells})
+        return Response({"cells": version.cells})
 
     @action(detail=True, methods=["post"], url_path="register_version")
     def register_version(self, request, component_id=None):
         workflow = self.get_object()
-        ts = request.data.get("timestamp")
-        if not ts:
+        if not (request.data.get("timestamp") or request.data.get("hash")):
             return Response({"error": "timestamp required"}, status=400)
 
-        base_dir = Path(settings.MEDIA_ROOT) / "workflows" / str(workflow.id)
-        keep_py = base_dir / f"{workflow.id}_{ts}.py"
-        keep_ipynb = base_dir / f"{workflow.id}_{ts}.ipynb"
-
-        if not keep_py.exists() or not keep_ipynb.exists():
+        version = self._get_version(workflow, request.data)
+        if version is None:
             return Response({"error": "Version not found"}, status=404)
 
-        nb = nbformat.read(keep_ipynb, as_version=4)
-        cells = []
-        for c in nb.cells:
-            if c.cell_type == "code":
-                src = "".join(c.source)
-                block = python_to_block(src)
-                cells.append(block)
-
-        workflow.cells = cells
-        workflow.code_file.name = str(keep_py.relative_to(Path(settings.MEDIA_ROOT)))
-        workflow.ipynb_file.name = str(keep_ipynb.relative_to(Path(settings.MEDIA_ROOT)))
+        workflow.cells = version.cells
+        workflow.code_file.name = version.code_file
+        workflow.ipynb_file.name = version.ipynb_file
         workflow.save()
 
-        for f in base_dir.glob(f"{workflow.id}_*.*"):
-            if f.stem != f"{workflow.id}_{ts}":
+        media_root = Path(settings.MEDIA_ROOT)
+        for old in workflow.versions.exclude(pk=version.pk):
+            for name in (old.code_file, old.ipynb_file):
                 try:
-                    f.unlink()
+                    (media_root / name).unlink()
                 except Exception:
                     pass
+            old.delete()
 
-        return Response({"status": "registered", "timestamp": ts, "cells": workflow.cells})
+        return Response({"status": "registered", "timestamp": version.label, "cells": workflow.cells})
 
     def perform_update(self, serializer):
         workflow = serializer.save()
 
-        code_lines = []
-        nb = nbformat.v4.new_notebook()
-
-        for cell in workflow.cells:
-            src = block_to_python(cell)
-            code_lines.append(src)
-            nb.cells.append(nbformat.v4.new_code_cell(src))
+        code_lines = [block_to_python(cell) for cell in workflow.cells]
         tz_name = timezone.get_current_timezone_name()
         bootstrap = build_workflow_tables_bootstrap(workflow.inputs_config, workflow.outputs_config, tz_name)
-        code_text = "\n\n".join([bootstrap, "\n\n".join(code_lines)] if bootstrap else ["\n\n".join(code_lines)])
-
-        py_path = Path(settings.MEDIA_ROOT) / workflow_version_path(workflow, "py")
-        py_path.parent.mkdir(parents=True, exist_ok=True)
-        py_path.write_text(code_text, encoding="utf-8")
-
-        ipynb_path = Path(settings.MEDIA_ROOT) / workflow_version_path(workflow, "ipynb")
-        with ipynb_path.open("w", encoding="utf-8") as f:
-            nbformat.write(nb, f)
-
-        workflow.code_file.name = str(py_path.relative_to(Path(settings.MEDIA_ROOT)))
-        workflow.ipynb_file.name = str(ipynb_path.relative_to(Path(settings.MEDIA_ROOT)))
-        workflow.save()
+        if workflow.execution_mode != "sequential":
+            body = build_workflow_cells_runner(workflow.cells, code_lines, workflow.execution_mode)
+        else:
+            body = "\n\n".join(code_lines)
+        code_text = "\n\n".join([bootstrap, build_workflow_tables_flush(body)])
+        code_hash = hashlib.sha256(code_text.encode("utf-8")).hexdigest()
+
+        # Content-addressed: an unchanged save re-uses the stored version and files.
+        version = workflow.versions.filter(code_hash=code_hash).first()
+        if version is None:
+            py_name = workflow_version_file_path(workflow.id, code_hash, "py")
+            ipynb_name = workflow_version_file_path(workflow.id, code_hash, "ipynb")
+
+            py_path = Path(settings.MEDIA_ROOT) / py_name
+            py_path.parent.mkdir(parents=True, exist_ok=True)
+            py_path.write_text(code_text, encoding="utf-8")
+
+            ipynb_path = Path(settings.MEDIA_ROOT) / ipynb_name
+            ipynb_path.write_text(python_to_notebook_json(workflow.cells, code_lines), encoding="utf-8")
+
+            version, _ = WorkflowVersion.objects.get_or_create(
+                workflow=workflow,
+                code_hash=code_hash,
+                defaults={
+                    "label": datetime.now().strftime("%Y-%m-%dT%H-%M-%S"),
+                    "cells": workflow.cells,
+                    "code_file": py_name,
+                    "ipynb_file": ipynb_name,
+                    "created_by": self.request.user if self.request.user.is_authenticated else None,
+                },
+            )
+
+        workflow.code_file.name = version.code_file
+        workflow.ipynb_file.name = version.ipynb_file
+        workflow.save(update_fields=["code_file", "ipynb_file", "updated_at"])
 
 
 class WorkflowSchedulerViewSet(viewsets.ModelViewSet):
@@ -163,17 +183,34 @@ class WorkflowSchedulerViewSet(viewsets.ModelViewSet):
     def run_now(self, request, pk=None):
         scheduler = self.get_object()
         workflow = scheduler.workflow
+        task_id = str(uuid.uuid4())
 
-        task = celery_app.send_task("worker.run_workflow", args=[workflow.id], queue="workflows")
+        admission = AdmissionState({workflow.id})
+        admitted, reason, _ = admission.admit(scheduler, task_id)
+        if not admitted:
+            return Response({"status": "SKIPPED", "reason": reason}, status=status.HTTP_409_CONFLICT)
 
+        admission.revoke_replaced()
         WorkflowRun.objects.create(
             workflow=workflow,
-            task_id=task.id,
+            scheduler=scheduler,
+            task_id=task_id,
             status="QUEUED",
             started_at=timezone.now(),
         )
 
-        return Response({"status": "QUEUED", "task_id": task.id}, status=status.HTTP_200_OK)
+        admission.send_revokes(celery_app)
+        try:
+            dispatch_task("worker.run_workflow", [workflow.id], "workflows", task_id=task_id)
+        except Exception as e:
+            WorkflowRun.objects.filter(task_id=task_id).update(
+                status="ERROR", error="Failed to queue task", finished_at=timezone.now()
+            )
+            publish_workflow_runs([task_id])
+            release_runs([(workflow.id, task_id)])
+            return Response({"error": f"Failed to queue task: {e}"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        return Response({"status": "QUEUED", "task_id": task_id}, status=status.HTTP_200_OK)
 
 
 class WorkflowSchedulerLogViewSet(viewsets.ReadOnlyModelViewSet):
@@ -186,6 +223,20 @@ class WorkflowSchedulerLogViewSet(viewsets.ReadOnlyModelViewSet):
             qs = qs.filter(scheduler_id=scheduler_id)
         return qs
 
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if isinstance(response.data, list):
+            # Older days live in WorkflowSchedulerLogSummary after compaction.
+            summaries = WorkflowSchedulerLogSummary.objects.all()
+            scheduler_id = request.query_params.get("scheduler_id")
+            if scheduler_id:
+                summaries = summaries.filter(scheduler_id=scheduler_id)
+            oldest = self.get_queryset().order_by("timestamp").values_list("timestamp", flat=True).first()
+            if oldest:
+                summaries = summaries.filter(last_at__lt=oldest)
+            response.data += [s.as_log_entry() for s in summaries.order_by("-day")]
+        return response
+
 
 class WorkflowRunViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = WorkflowRun.objects.all().order_by("-started_at")
@@ -198,6 +249,19 @@ class WorkflowRunViewSet(viewsets.ReadOnlyModelViewSet):
             qs = qs.filter(workflow_id=workflow_id)
         return qs
 
+    @action(detail=False, methods=["post"], url_path="timeline")
+    def timeline(self, request):
+        """Store the per-cell timeline reported by a worker for its task."""
+        task_id = request.data.get("task_id")
+        timeline = request.data.get("timeline")
+        if not task_id or not isinstance(timeline, list):
+            return Response({"error": "task_id and timeline required"}, status=400)
+
+        updated = WorkflowRun.objects.filter(task_id=task_id).update(timeline=timeline)
+        if not updated:
+            return Response({"error": "Run not found"}, status=404)
+        return Response({"status": "ok"})
+
 
 class RunWorkflowSchedulesView(APIView):
     permission_classes = [IsAuthenticated]
@@ -207,76 +271,112 @@ class RunWorkflowSchedulesView(APIView):
         return Response(results)
 
 
-class WorkersStatusView(APIView):
-    permission_classes = [IsAuthenticated]
+WORKER_QUEUES = ["scenarios", "workflows"]
+QUEUE_PREVIEW_SIZE = 20
+
+
+def _preview_task(raw):
+    """task_id/args of a raw Celery message from the broker list."""
+    task = json.loads(raw)
+    headers = task.get("headers") or {}
+    return {
+        "task_id": headers.get("id") or (task.get("properties") or {}).get("correlation_id"),
+        "args": headers.get("argsrepr", ""),
+    }
+
+
+def _queue_stats(queue_names):
+    """
+    Length and first QUEUE_PREVIEW_SIZE messages of each broker queue,
+    fetched in a single pipelined round trip.
+    """
+    queues = {q: None for q in queue_names}
+    tasks_preview = {q: [] for q in queue_names}
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for queue in queue_names:
+            pipe.llen(queue)
+            pipe.lrange(queue, 0, QUEUE_PREVIEW_SIZE - 1)
+        replies = pipe.execute()
+    except Exception as e:
+        print(f"Redis error for {', '.join(queue_names)}: {e}")
+        return queues, tasks_preview
+
+    for i, queue in enumerate(queue_names):
+        queues[queue] = replies[2 * i]
+        for raw in replies[2 * i + 1]:
+            try:
+                tasks_preview[queue].append(_preview_task(raw))
+            except Exception as e:
+                print(f"Parse error in queue {queue}: {e}")
+    return queues, tasks_preview
 
-    def get(self, request):
-        insp = celery_app.control.inspect()
 
-        try:
-            ping = insp.ping() or {}
-        except Exception as e:
-            ping = {}
-            print(f"Ping error: {e}")
+async def workflow_run_events(request):
+    """SSE stream of WorkflowRun changes, optionally for one ?workflow_id."""
+    if await user_from_query_token(request) is None:
+        return unauthorized()
+    workflow_id = request.GET.get("workflow_id")
+
+    async def stream():
+        async with Subscription(WORKFLOW_RUNS_CHANNEL) as subscription:
+            async for event in subscription.events():
+                if event is None:
+                    yield ": ping\n\n"
+                elif not workflow_id or str(event.get("workflow")) == workflow_id:
+                    yield sse(event, event.get("id"))
+
+    return event_stream(stream())
 
-        workers = []
-        for worker_name, reply in ping.items():
-            workers.append({"worker": worker_name, "status": reply.get("ok", "offline")})
 
+class WorkersStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        # Snapshot written by mainserver.collect_worker_status; no broadcast here.
+        workers = read_worker_status()
         if not workers:
             workers.append({"worker": "No workers", "status": "offline"})
 
-        queues = {}
-        tasks_preview = {}
+        queues, tasks_preview = _queue_stats(WORKER_QUEUES)
 
-        for queue in ["scenarios", "workflows"]:
-            try:
-                client = redis.Redis.from_url(settings.CELERY_BROKER_URL)
-                length = client.llen(queue)
-                queues[queue] = length
-
-                tasks_preview[queue] = []
-                for raw in client.lrange(queue, 0, 19):
-                    try:
-                        task = json.loads(raw)
-                        task_id = task.get("headers", {}).get("id") or task.get("properties", {}).get("correlation_id")
-                        args = task.get("headers", {}).get("argsrepr", "")
-                        tasks_preview[queue].append({"task_id": task_id, "args": args})
-                    except Exception as e:
-                        print(f"Parse error in queue {queue}: {e}")
-            except Exception as e:
-                queues[queue] = None
-                tasks_preview[queue] = []
-                print(f"Redis error for {queue}: {e}")
+        try:
+            licenses = LicenseSemaphore(client=get_redis(os.environ.get("PETEX_LICENSE_REDIS_URL"))).status()
+        except Exception as e:
+            licenses = None
+            print(f"Redis error for Petex licenses: {e}")
 
-        return Response({"workers": workers, "queues": queues, "tasks": tasks_preview})
+        return Response({"workers": workers, "queues": queues, "tasks": tasks_preview, "licenses": licenses})
 
 
 class TaskManagementView(APIView):
     permission_classes = [IsAuthenticated]
 
     def delete(self, request, task_id):
-        queue = request.query_params.get("queue", "workflows")
+        """
+        Cancel a task. A queued task is marked revoked and dropped by the worker
+        that receives it; with ?revoke=1 a running task is also terminated.
+        """
         revoke_flag = request.query_params.get("revoke")
 
         try:
-            client = redis.Redis.from_url(settings.CELERY_BROKER_URL)
+            entry, was_queued = cancel_task(task_id, terminate=bool(revoke_flag))
         except Exception as e:
-            return Response({"error": f"Redis connection failed: {e}"}, status=500)
+            return Response({"error": f"Failed to revoke: {e}"}, status=500)
 
-        removed = 0
-        try:
-            removed = client.lrem(queue, 0, json.dumps({"headers": {"id": task_id}}))
-        except Exception as e:
-            print(f"Error removing task {task_id} from {queue}: {e}")
-
-        if revoke_flag:
-            try:
-                celery_app.control.revoke(task_id, terminate=True, signal="SIGTERM")
-            except Exception as e:
-                return Response({"error": f"Failed to revoke: {e}"}, status=500)
+        queue = (entry or {}).get("queue") or request.query_params.get("queue", "workflows")
+        if was_queued or revoke_flag:
+            now = timezone.now()
+            WorkflowRun.objects.filter(task_id=task_id, status__in=ACTIVE_STATUSES).update(
+                status="REVOKED", error="Cancelled", finished_at=now
+            )
+            scenarios = ScenarioClass.objects.filter(task_id=task_id, status__in=ACTIVE_STATUSES)
+            scenario_ids = list(scenarios.values_list("pk", flat=True))
+            scenarios.update(status="REVOKED")
+            publish_workflow_runs([task_id])
+            publish_scenarios(scenario_ids)
 
-        return Response({"queue": queue, "removed": removed, "revoked": bool(revoke_flag)})
+        return Response({"queue": queue, "removed": int(was_queued), "revoked": bool(revoke_flag)})
 
 
 __all__ = [
@@ -287,4 +387,5 @@ __all__ = [
     "RunWorkflowSchedulesView",
     "WorkersStatusView",
     "TaskManagementView",
+    "workflow_run_events",
 ]
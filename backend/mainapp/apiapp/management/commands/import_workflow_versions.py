@@ -0,0 +1,54 @@
+from datetime import datetime
+from pathlib import Path
+import hashlib
+
+import nbformat
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apiapp.models import Workflow, WorkflowVersion
+from apiapp.utils.notebook_converter import python_to_block
+
+
+class Command(BaseCommand):
+    help = "Index legacy timestamped workflow files (<id>_<timestamp>.py/.ipynb) as WorkflowVersion rows."
+
+    def handle(self, *args, **options):
+        media_root = Path(settings.MEDIA_ROOT)
+        created = 0
+
+        for workflow in Workflow.objects.all():
+            base = media_root / "workflows" / str(workflow.id)
+            if not base.exists():
+                continue
+
+            for py_path in sorted(base.glob(f"{workflow.id}_*.py")):
+                ipynb_path = py_path.with_suffix(".ipynb")
+                if not ipynb_path.exists():
+                    continue
+
+                code_hash = hashlib.sha256(py_path.read_bytes()).hexdigest()
+                if WorkflowVersion.objects.filter(workflow=workflow, code_hash=code_hash).exists():
+                    continue
+
+                label = py_path.stem.split("_", 1)[1]
+                nb = nbformat.read(ipynb_path, as_version=4)
+                cells = [python_to_block("".join(c.source)) for c in nb.cells if c.cell_type == "code"]
+
+                version = WorkflowVersion.objects.create(
+                    workflow=workflow,
+                    code_hash=code_hash,
+                    label=label,
+                    cells=cells,
+                    code_file=str(py_path.relative_to(media_root)),
+                    ipynb_file=str(ipynb_path.relative_to(media_root)),
+                )
+                try:
+                    ts = timezone.make_aware(datetime.strptime(label, "%Y-%m-%dT%H-%M-%S"))
+                    WorkflowVersion.objects.filter(pk=version.pk).update(created_at=ts)
+                except ValueError:
+                    pass
+                created += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {created} workflow version(s)."))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from apiapp.models import MainClass, ScenarioClass
+from apiapp.services.scenario_purge import DELETING, orphan_results, purge_orphans, purge_scenario
+
+
+class Command(BaseCommand):
+    help = (
+        "Finish purges of scenarios stuck in DELETING and delete orphaned result rows "
+        "(MainClass rows with neither a scenario nor a component)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=None,
+            help="Rows deleted per transaction (default: SCENARIO_PURGE_CHUNK_SIZE).",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be deleted.")
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        deleting = list(ScenarioClass.objects.filter(status=DELETING).values_list("pk", flat=True))
+
+        if options["dry_run"]:
+            pending = MainClass.objects.filter(scenario_id__in=deleting).count() if deleting else 0
+            self.stdout.write(f"Scenarios in {DELETING}: {len(deleting)} ({pending} result rows)")
+            self.stdout.write(f"Orphaned result rows: {orphan_results().count()}")
+            return
+
+        for scenario_id in deleting:
+            removed = purge_scenario(scenario_id, chunk_size=chunk_size)
+            self.stdout.write(f"Scenario {scenario_id}: removed {removed} result rows")
+
+        removed = purge_orphans(chunk_size=chunk_size)
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} orphaned result rows."))
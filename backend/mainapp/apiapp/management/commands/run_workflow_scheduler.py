@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apiapp.services.schedule_dispatcher import ScheduleDispatcher
+
+
+class Command(BaseCommand):
+    help = "Dispatch workflow schedules at their next_run time (event-driven replacement for the beat poll)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--resync",
+            type=int,
+            default=None,
+            help="Seconds between full reloads of the schedule table (default: WORKFLOW_SCHEDULER_RESYNC_SECONDS).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            ScheduleDispatcher(resync_seconds=options["resync"]).run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS("Workflow scheduler stopped."))
@@ -15,11 +15,19 @@ from apiapp.domains.catalog.models import (  # noqa: F401
     GapNetworkData,
 )
 from apiapp.domains.data.models import DataSource, DataSourceComponent, MainClass, MainClassHistory  # noqa: F401
-from apiapp.domains.scenario.models import ScenarioClass, ScenarioLog, ScenarioComponentLink  # noqa: F401
+from apiapp.domains.scenario.models import (  # noqa: F401
+    ScenarioClass,
+    ScenarioLog,
+    ScenarioLogSummary,
+    ScenarioSummary,
+    ScenarioComponentLink,
+)
 from apiapp.domains.workflow.models import (  # noqa: F401
     Workflow,
+    WorkflowVersion,
     WorkflowScheduler,
     WorkflowSchedulerLog,
+    WorkflowSchedulerLogSummary,
     WorkflowRun,
 )
 from apiapp.domains.analytics.models import VisualAnalysisConfig  # noqa: F401
@@ -40,10 +48,14 @@ __all__ = [
     "MainClassHistory",
     "ScenarioClass",
     "ScenarioLog",
+    "ScenarioLogSummary",
+    "ScenarioSummary",
     "ScenarioComponentLink",
     "Workflow",
+    "WorkflowVersion",
     "WorkflowScheduler",
     "WorkflowSchedulerLog",
+    "WorkflowSchedulerLogSummary",
     "WorkflowRun",
     "VisualAnalysisConfig",
 ]
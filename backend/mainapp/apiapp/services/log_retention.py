@@ -0,0 +1,136 @@
+# apiapp/services/log_retention.py
+"""
+Retention for WorkflowSchedulerLog and ScenarioLog.
+
+Rows older than LOG_RETENTION_DAYS are rolled up into per-day summaries
+(WorkflowSchedulerLogSummary / ScenarioLogSummary) and deleted, one chunk
+per transaction so the job never holds long locks. Re-running it merges
+into the existing summaries.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apiapp.models import ScenarioLog, ScenarioLogSummary, WorkflowSchedulerLog, WorkflowSchedulerLogSummary
+
+
+def _merge_day(entry, ts, message):
+    if entry["first_at"] is None or ts < entry["first_at"]:
+        entry["first_at"], entry["first_message"] = ts, message
+    if entry["last_at"] is None or ts >= entry["last_at"]:
+        entry["last_at"], entry["last_message"] = ts, message
+
+
+def _apply(summary, entry, extra_fields):
+    """Merge one chunk's roll-up for a (parent, day) into its summary row."""
+    summary.total += entry["total"]
+    if summary.first_at is None or entry["first_at"] < summary.first_at:
+        summary.first_at, summary.first_message = entry["first_at"], entry["first_message"]
+    if summary.last_at is None or entry["last_at"] >= summary.last_at:
+        summary.last_at, summary.last_message = entry["last_at"], entry["last_message"]
+    for field, merge in extra_fields.items():
+        setattr(summary, field, merge(getattr(summary, field), entry[field]))
+
+
+def _compact(model, summary_model, parent_field, value_fields, fold, extra_fields, cutoff, chunk_size):
+    parent_id = f"{parent_field}_id"
+    compacted = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                model.objects.filter(timestamp__lt=cutoff)
+                .order_by("id")
+                .values("id", parent_id, "timestamp", "message", *value_fields)[:chunk_size]
+            )
+            if not rows:
+                return compacted
+
+            days = {}
+            for row in rows:
+                key = (row[parent_id], timezone.localdate(row["timestamp"]))
+                entry = days.setdefault(key, {
+                    "total": 0, "first_at": None, "last_at": None,
+                    "first_message": None, "last_message": None,
+                    **{f: init() for f, init in fold["init"].items()},
+                })
+                entry["total"] += 1
+                _merge_day(entry, row["timestamp"], row["message"])
+                fold["add"](entry, row)
+
+            existing = {
+                (getattr(s, parent_id), s.day): s
+                for s in summary_model.objects.select_for_update().filter(
+                    **{f"{parent_id}__in": {k[0] for k in days}, "day__in": {k[1] for k in days}}
+                )
+            }
+            new, changed = [], []
+            for (pid, day), entry in days.items():
+                summary = existing.get((pid, day))
+                if summary is None:
+                    summary = summary_model(**{parent_id: pid, "day": day, "total": 0})
+                    for f, init in fold["init"].items():
+                        setattr(summary, f, init())
+                    summary.first_at = summary.last_at = None
+                    _apply(summary, entry, extra_fields)
+                    new.append(summary)
+                else:
+                    _apply(summary, entry, extra_fields)
+                    changed.append(summary)
+
+            summary_model.objects.bulk_create(new)
+            summary_model.objects.bulk_update(
+                changed,
+                ["total", "first_at", "last_at", "first_message", "last_message", *extra_fields],
+            )
+            model.objects.filter(id__in=[r["id"] for r in rows]).delete()
+            compacted += len(rows)
+
+
+def _add_status(entry, row):
+    counts = entry["status_counts"]
+    counts[row["status"]] = counts.get(row["status"], 0) + 1
+
+
+def _merge_counts(a, b):
+    merged = dict(a or {})
+    for k, v in (b or {}).items():
+        merged[k] = merged.get(k, 0) + v
+    return merged
+
+
+def _add_progress(entry, row):
+    entry["max_progress"] = max(entry["max_progress"], row["progress"] or 0)
+
+
+def compact_logs(retention_days=None, chunk_size=None):
+    """Roll up and delete log rows older than retention_days; returns rows removed per table."""
+    retention_days = retention_days if retention_days is not None else settings.LOG_RETENTION_DAYS
+    chunk_size = chunk_size or settings.LOG_RETENTION_CHUNK_SIZE
+    cutoff = timezone.now() - timedelta(days=retention_days)
+
+    scheduler_logs = _compact(
+        WorkflowSchedulerLog,
+        WorkflowSchedulerLogSummary,
+        "scheduler",
+        ["status"],
+        {"init": {"status_counts": dict}, "add": _add_status},
+        {"status_counts": _merge_counts},
+        cutoff,
+        chunk_size,
+    )
+    scenario_logs = _compact(
+        ScenarioLog,
+        ScenarioLogSummary,
+        "scenario",
+        ["progress"],
+        {"init": {"max_progress": int}, "add": _add_progress},
+        {"max_progress": max},
+        cutoff,
+        chunk_size,
+    )
+    return {"workflow_scheduler_logs": scheduler_logs, "scenario_logs": scenario_logs}
+
+
+__all__ = ["compact_logs"]
@@ -0,0 +1,225 @@
+# apiapp/services/progress_events.py
+"""
+Progress events over Redis pub/sub, streamed to browsers as Server-Sent Events.
+
+Saves of ScenarioLog, ScenarioClass and WorkflowRun publish a JSON event after
+commit (receivers in the domain models). QuerySet.update() sends no signal,
+so code changing statuses that way calls publish_scenarios() /
+publish_workflow_runs() afterwards. Workers outside this Django process
+report status changes with the mainserver.report_task_status task, which
+saves (and so publishes) on the server. The async views in scenario/views.py and
+workflow/views.py subscribe to the channels and forward events as they
+arrive, so pages no longer poll. Each stream closes after SSE_MAX_SECONDS;
+EventSource reconnects and the client passes since_id to catch up from the
+database.
+
+EventSource cannot send headers, so the JWT access token is passed as the
+`token` query parameter.
+"""
+import json
+import time
+
+import redis.asyncio as aioredis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from django.db import transaction
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from apiapp.models import ScenarioClass, WorkflowRun
+from apiapp.services.redis_client import get_redis
+
+SCENARIOS_CHANNEL = "prodcast:events:scenarios"
+SCENARIO_LOG_CHANNEL = "prodcast:events:scenario:{}"
+WORKFLOW_RUNS_CHANNEL = "prodcast:events:workflow-runs"
+
+HEARTBEAT_SECONDS = 15
+
+
+def publish(channel, event):
+    """Publish one event; a no-op when Redis is down."""
+    try:
+        get_redis().publish(channel, json.dumps(event, default=str))
+    except Exception as e:
+        print(f"[Progress Events] Failed to publish to {channel}: {e}")
+
+
+def publish_many(channel, events):
+    """Publish several events in one round trip."""
+    if not events:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for event in events:
+            pipe.publish(channel, json.dumps(event, default=str))
+        pipe.execute()
+    except Exception as e:
+        print(f"[Progress Events] Failed to publish {len(events)} event(s) to {channel}: {e}")
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def scenario_log_event(log):
+    return {
+        "type": "scenario_log",
+        "id": log.id,
+        "scenario": log.scenario_id,
+        "timestamp": _iso(log.timestamp),
+        "message": log.message,
+        "progress": log.progress,
+    }
+
+
+def scenario_event(scenario):
+    return {
+        "type": "scenario",
+        "scenario_id": scenario.scenario_id,
+        "status": scenario.status,
+        "task_id": scenario.task_id,
+    }
+
+
+def workflow_run_event(run):
+    return {
+        "type": "workflow_run",
+        "id": run.id,
+        "workflow": run.workflow_id,
+        "scheduler": run.scheduler_id,
+        "task_id": run.task_id,
+        "started_at": _iso(run.started_at),
+        "finished_at": _iso(run.finished_at),
+        "status": run.status,
+        "error": run.error,
+    }
+
+
+def publish_scenarios(scenario_ids):
+    """Publish the current status of scenarios changed with QuerySet.update(), after commit."""
+    scenario_ids = list(scenario_ids)
+    if not scenario_ids:
+        return
+
+    def send():
+        scenarios = ScenarioClass.objects.filter(pk__in=scenario_ids).only("scenario_id", "status", "task_id")
+        publish_many(SCENARIOS_CHANNEL, [scenario_event(s) for s in scenarios])
+
+    transaction.on_commit(send)
+
+
+def publish_workflow_runs(task_ids):
+    """Publish the current state of the runs of tasks changed with QuerySet.update(), after commit."""
+    task_ids = [t for t in task_ids if t]
+    if not task_ids:
+        return
+
+    def send():
+        runs = WorkflowRun.objects.filter(task_id__in=task_ids).defer("output", "timeline")
+        publish_many(WORKFLOW_RUNS_CHANNEL, [workflow_run_event(run) for run in runs])
+
+    transaction.on_commit(send)
+
+
+def _authenticate(raw_token):
+    auth = JWTAuthentication()
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, TokenError):
+        return None
+
+
+async def user_from_query_token(request):
+    token = request.GET.get("token")
+    if not token:
+        return None
+    return await sync_to_async(_authenticate)(token)
+
+
+def sse(event, event_id=None):
+    """Format one SSE message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event.get('type', 'message')}")
+    lines.append(f"data: {json.dumps(event, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    """
+    Async pub/sub subscription. Enter it before reading any backlog from the
+    database, so events published in between are not lost.
+    """
+
+    def __init__(self, *channels):
+        self.channels = channels
+        self._client = None
+        self._pubsub = None
+
+    async def __aenter__(self):
+        self._client = aioredis.Redis.from_url(settings.CELERY_BROKER_URL)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(*self.channels)
+        return self
+
+    async def __aexit__(self, *exc):
+        try:
+            await self._pubsub.aclose()
+            await self._client.aclose()
+        except Exception:
+            pass
+
+    async def events(self):
+        """Yield decoded events, or None when idle (heartbeat); stops after SSE_MAX_SECONDS."""
+        deadline = time.monotonic() + settings.SSE_MAX_SECONDS
+        while time.monotonic() < deadline:
+            msg = await self._pubsub.get_message(timeout=HEARTBEAT_SECONDS)
+            if msg is None:
+                yield None
+                continue
+            try:
+                yield json.loads(msg["data"])
+            except (TypeError, ValueError):
+                continue
+
+
+def event_stream(stream):
+    """StreamingHttpResponse for an async generator of SSE strings."""
+    async def guarded():
+        try:
+            async for chunk in stream:
+                yield chunk
+        except Exception as e:
+            print(f"[Progress Events] Stream error: {e}")
+            # Ask EventSource to come back later instead of hammering a broken Redis.
+            yield "retry: 30000\nevent: unavailable\ndata: {}\n\n"
+
+    response = StreamingHttpResponse(guarded(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def unauthorized():
+    return JsonResponse({"error": "Authentication credentials were not provided or are invalid."}, status=401)
+
+
+__all__ = [
+    "SCENARIOS_CHANNEL",
+    "SCENARIO_LOG_CHANNEL",
+    "WORKFLOW_RUNS_CHANNEL",
+    "Subscription",
+    "event_stream",
+    "publish",
+    "publish_many",
+    "publish_scenarios",
+    "publish_workflow_runs",
+    "scenario_event",
+    "scenario_log_event",
+    "sse",
+    "unauthorized",
+    "user_from_query_token",
+    "workflow_run_event",
+]
@@ -0,0 +1,41 @@
+# apiapp/services/redis_client.py
+"""
+Shared Redis clients for apiapp.
+
+One ConnectionPool per URL per process, so request handlers and services
+reuse sockets instead of opening a connection per call. redis-py resets a
+pool after fork, which keeps this safe under gunicorn/celery prefork.
+"""
+import threading
+
+import redis
+from django.conf import settings
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(url=None) -> redis.ConnectionPool:
+    url = url or settings.CELERY_BROKER_URL
+    pool = _pools.get(url)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(url)
+            if pool is None:
+                pool = redis.ConnectionPool.from_url(
+                    url,
+                    max_connections=settings.REDIS_MAX_CONNECTIONS,
+                    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                    health_check_interval=30,
+                )
+                _pools[url] = pool
+    return pool
+
+
+def get_redis(url=None) -> redis.Redis:
+    """Client for the broker (default) or another Redis URL, backed by the shared pool."""
+    return redis.Redis(connection_pool=get_pool(url))
+
+
+__all__ = ["get_pool", "get_redis"]
@@ -0,0 +1,134 @@
+# apiapp/services/result_cache.py
+"""
+Redis cache of ScenarioResultsView payloads for finished scenarios.
+
+A finished scenario's results do not change until it is re-run, so the
+rendered JSON is stored zlib-compressed under a key derived from the scenario
+and the query (start, end, summary, object_type_property, unit_system),
+filled on the first read once post-processing has set summary_built_at. Entries are listed per scenario so re-running or
+deleting a scenario drops them (and those of delta scenarios built on it).
+
+The cache shares Redis with the broker, so instead of a Redis maxmemory
+policy it keeps its own LRU: a sorted set of keys by last access and a hash
+of their sizes. Storing an entry evicts the least recently read ones until
+the total is under RESULT_CACHE_MAX_BYTES. Both scripts run atomically in
+Redis. Any Redis error just bypasses the cache.
+"""
+import hashlib
+import json
+import time
+import zlib
+
+from django.conf import settings
+
+from apiapp.services.redis_client import get_redis
+
+PREFIX = "prodcast:results-cache"
+LRU_KEY = f"{PREFIX}:lru"
+SIZES_KEY = f"{PREFIX}:sizes"
+TOTAL_KEY = f"{PREFIX}:bytes"
+SCENARIO_KEYS = PREFIX + ":scenario:{}"
+
+CACHE_PARAMS = ("start", "end", "summary", "object_type_property", "unit_system")
+
+# KEYS: entry, lru, sizes, total, scenario set
+# ARGV: payload, size, now, budget, ttl
+_PUT = """
+local old = redis.call('HGET', KEYS[3], KEYS[1])
+if old then redis.call('DECRBY', KEYS[4], old) end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[5])
+redis.call('HSET', KEYS[3], KEYS[1], ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[3], KEYS[1])
+redis.call('SADD', KEYS[5], KEYS[1])
+redis.call('EXPIRE', KEYS[5], ARGV[5])
+local total = redis.call('INCRBY', KEYS[4], ARGV[2])
+local evicted = 0
+while total > tonumber(ARGV[4]) do
+    local oldest = redis.call('ZPOPMIN', KEYS[2])
+    if #oldest == 0 then break end
+    local size = redis.call('HGET', KEYS[3], oldest[1])
+    redis.call('HDEL', KEYS[3], oldest[1])
+    redis.call('DEL', oldest[1])
+    if size then total = redis.call('DECRBY', KEYS[4], size) end
+    evicted = evicted + 1
+end
+return evicted
+"""
+
+# KEYS: scenario set, lru, sizes, total
+_INVALIDATE = """
+local entries = redis.call('SMEMBERS', KEYS[1])
+for _, key in ipairs(entries) do
+    local size = redis.call('HGET', KEYS[3], key)
+    if size then
+        redis.call('DECRBY', KEYS[4], size)
+        redis.call('HDEL', KEYS[3], key)
+    end
+    redis.call('ZREM', KEYS[2], key)
+    redis.call('DEL', key)
+end
+redis.call('DEL', KEYS[1])
+return #entries
+"""
+
+
+def cache_key(scenario_id, params):
+    query = {name: params.get(name, "") for name in CACHE_PARAMS}
+    digest = hashlib.sha1(json.dumps(query, sort_keys=True).encode()).hexdigest()[:20]
+    return f"{PREFIX}:{scenario_id}:{digest}"
+
+
+def get(scenario_id, params):
+    """Cached JSON bytes, or None."""
+    key = cache_key(scenario_id, params)
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.get(key)
+        pipe.zadd(LRU_KEY, {key: time.time()}, xx=True)
+        blob, _ = pipe.execute()
+    except Exception as e:
+        print(f"[Result Cache] Read failed for scenario {scenario_id}: {e}")
+        return None
+    return zlib.decompress(blob) if blob else None
+
+
+def put(scenario_id, params, payload):
+    """Store rendered JSON bytes; entries over a quarter of the budget are not cached."""
+    blob = zlib.compress(payload, settings.RESULT_CACHE_COMPRESSION_LEVEL)
+    budget = settings.RESULT_CACHE_MAX_BYTES
+    if not budget or len(blob) > budget // 4:
+        return
+    key = cache_key(scenario_id, params)
+    try:
+        get_redis().eval(
+            _PUT, 5, key, LRU_KEY, SIZES_KEY, TOTAL_KEY, SCENARIO_KEYS.format(scenario_id),
+            blob, len(blob), time.time(), budget, settings.RESULT_CACHE_TTL_SECONDS,
+        )
+    except Exception as e:
+        print(f"[Result Cache] Write failed for scenario {scenario_id}: {e}")
+
+
+def invalidate(scenario_id):
+    """Drop cached results of a scenario and of delta scenarios built on it."""
+    from apiapp.services.scenario_storage import delta_dependents
+
+    pending, seen = [scenario_id], set()
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        try:
+            get_redis().eval(_INVALIDATE, 4, SCENARIO_KEYS.format(current), LRU_KEY, SIZES_KEY, TOTAL_KEY)
+        except Exception as e:
+            print(f"[Result Cache] Invalidation failed for scenario {current}: {e}")
+            return
+        pending.extend(delta_dependents(current).values_list("pk", flat=True))
+
+
+def stats():
+    client = get_redis()
+    return {"bytes": int(client.get(TOTAL_KEY) or 0), "entries": client.zcard(LRU_KEY)}
+
+
+__all__ = ["cache_key", "get", "invalidate", "put", "stats"]
@@ -0,0 +1,175 @@
+# apiapp/services/result_export.py
+"""
+Streaming exports of MainClass rows (scenario results, component records).
+
+Rows are read with a server-side cursor (QuerySet.iterator) in chunks of
+EXPORT_CHUNK_ROWS, with object, property and component names resolved by
+join in the same query, and written out chunk by chunk:
+
+    csv      streamed straight to the client
+    xlsx     openpyxl write-only workbook in a temporary file, then streamed
+    parquet  one row group per chunk (pyarrow) in a temporary file, then streamed
+
+The temporary files are built inside the response generator, so the view
+returns at once and the work happens while the response is being sent.
+
+Response bodies are async iterators so the ASGI server sends them as they
+are produced instead of collecting them first. Browser downloads cannot set
+headers, so the export views also accept the JWT access token as ?token=.
+"""
+import csv
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+COLUMNS = [
+    ("date_time", "date_time"),
+    ("object_type", "object_type__object_type_name"),
+    ("object_instance", "object_instance__object_instance_name"),
+    ("property", "object_type_property__object_type_property_name"),
+    ("value", "value"),
+    ("tag", "tag"),
+    ("description", "description"),
+    ("component", "component__name"),
+    ("data_source", "component__data_source__data_source_name"),
+]
+HEADER = [name for name, _ in COLUMNS]
+FILE_BLOCK_BYTES = 256 * 1024
+
+
+class QueryTokenAuthentication(JWTAuthentication):
+    """JWT from the Authorization header or, for plain download links, the `token` query parameter."""
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            return result
+        raw_token = request.query_params.get("token")
+        if not raw_token:
+            return None
+        validated = self.get_validated_token(raw_token)
+        return self.get_user(validated), validated
+
+
+def unavailable_reason(fmt):
+    """Why `fmt` cannot be exported here, or None."""
+    if fmt not in FORMATS:
+        return f"format must be one of {', '.join(FORMATS)}"
+    return None
+
+
+def _local(value):
+    return timezone.localtime(value) if value is not None and timezone.is_aware(value) else value
+
+
+def _chunks(qs):
+    """Lists of row tuples (HEADER order) read through a server-side cursor."""
+    chunk_size = settings.EXPORT_CHUNK_ROWS
+    rows = qs.order_by("date_time", "pk").values_list(*[lookup for _, lookup in COLUMNS])
+    chunk = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        chunk.append((_local(row[0]),) + row[1:])
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _csv_parts(qs):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(HEADER)
+    for chunk in _chunks(qs):
+        yield "".join(
+            writer.writerow([row[0].isoformat() if row[0] else ""] + list(row[1:])) for row in chunk
+        )
+
+
+def _xlsx_file(qs):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("records")
+    sheet.append(HEADER)
+    for chunk in _chunks(qs):
+        for row in chunk:
+            # Excel has no time zones.
+            sheet.append([row[0].replace(tzinfo=None) if row[0] else None, *row[1:]])
+    tmp = tempfile.TemporaryFile()
+    workbook.save(tmp)
+    return tmp
+
+
+def _parquet_file(qs):
+    schema = pa.schema(
+        [("date_time", pa.timestamp("us", tz=settings.TIME_ZONE))]
+        + [(name, pa.string()) for name in HEADER[1:]]
+    )
+    tmp = tempfile.TemporaryFile()
+    with pq.ParquetWriter(tmp, schema) as writer:
+        for chunk in _chunks(qs):
+            columns = list(zip(*chunk))
+            writer.write_table(pa.table([list(col) for col in columns], schema=schema))
+    return tmp
+
+
+def _file_parts(build_file, qs):
+    tmp = build_file(qs)
+    try:
+        tmp.seek(0)
+        while True:
+            block = tmp.read(FILE_BLOCK_BYTES)
+            if not block:
+                return
+            yield block
+    finally:
+        tmp.close()
+
+
+def _async_parts(parts):
+    """Drive a sync generator from the event loop one part at a time, on the thread that owns the DB cursor."""
+    get_next = sync_to_async(lambda: next(parts, None), thread_sensitive=True)
+
+    async def stream():
+        while True:
+            part = await get_next()
+            if part is None:
+                return
+            yield part
+
+    return stream()
+
+
+def export_response(qs, fmt, filename):
+    """Streaming download of the rows of `qs` in `fmt` (check unavailable_reason() first)."""
+    if fmt == "csv":
+        parts = _csv_parts(qs)
+    elif fmt == "xlsx":
+        parts = _file_parts(_xlsx_file, qs)
+    else:
+        parts = _file_parts(_parquet_file, qs)
+
+    response = StreamingHttpResponse(_async_parts(parts), content_type=FORMATS[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+__all__ = ["FORMATS", "QueryTokenAuthentication", "export_response", "unavailable_reason"]
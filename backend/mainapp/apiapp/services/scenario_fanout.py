@@ -0,0 +1,171 @@
+# apiapp/services/scenario_fanout.py
+"""
+Date-range fan-out for scenario runs.
+
+When every component of a scenario is marked independent_periods, the
+start_date..end_date range is split into windows of SCENARIO_CHUNK_MONTHS and
+each window runs as its own worker.run_scenario task on the scenarios queue,
+so several workers share one long forecast. The tasks form a Celery chord:
+
+    group(worker.run_scenario(id, window_start, window_end) ...)
+        each linked to mainserver.scenario_chunk_done (progress)
+    -> mainserver.merge_scenario_chunks (boundary de-duplication, final status)
+       with mainserver.scenario_chunks_failed as errback
+
+Windows share their boundary instant, so a row for that date may be written by
+both neighbours; the merge keeps the newest one. Progress is the share of
+finished windows, counted in Redis and written to ScenarioLog.
+
+Other scenarios (or ranges shorter than one window) are sent as a single
+task, with mainserver.build_scenario_summary linked as its post-processing.
+"""
+import uuid
+
+from celery import chord, signature
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from apiapp.models import MainClass, ScenarioComponentLink, ScenarioLog
+from apiapp.services.redis_client import get_redis
+from apiapp.services.task_index import dispatch_task, index_tasks
+
+PROGRESS_KEY = "prodcast:scenario-fanout:{}"
+_KEY = ("component_id", "object_instance_id", "object_type_property_id", "date_time")
+
+
+def _parse(value):
+    if hasattr(value, "isoformat"):
+        return value
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value}")
+        parsed = parse_datetime(f"{day.isoformat()}T00:00")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def split_range(start_date, end_date, months=None):
+    """[(start, end), ...] windows of `months` months covering start..end; neighbours share a boundary."""
+    months = months or settings.SCENARIO_CHUNK_MONTHS
+    start, end = _parse(start_date), _parse(end_date)
+    if end <= start:
+        return [(start, end)]
+
+    windows = []
+    cursor = start
+    while cursor < end:
+        nxt = min(cursor + relativedelta(months=months), end)
+        windows.append((cursor, nxt))
+        cursor = nxt
+
+    # Stay under SCENARIO_MAX_CHUNKS by merging neighbouring windows.
+    max_chunks = settings.SCENARIO_MAX_CHUNKS
+    if max_chunks and len(windows) > max_chunks:
+        per = -(-len(windows) // max_chunks)
+        windows = [(windows[i][0], windows[min(i + per, len(windows)) - 1][1]) for i in range(0, len(windows), per)]
+    return windows
+
+
+def supports_fanout(scenario_id):
+    flags = list(
+        ScenarioComponentLink.objects.filter(scenario_id=scenario_id).values_list(
+            "component__independent_periods", flat=True
+        )
+    )
+    return bool(flags) and all(flags)
+
+
+def dispatch_scenario(scenario_id, start_date, end_date):
+    """
+    Queue a scenario run; returns (task_id, chunk count). For a fan-out the
+    task id is the merge callback's, which finishes when the whole range is done.
+    """
+    windows = split_range(start_date, end_date) if supports_fanout(scenario_id) else []
+    if len(windows) < 2:
+        # The worker queues the post-processing itself when the run succeeds.
+        finished = signature("mainserver.build_scenario_summary", args=[scenario_id], queue="default", immutable=True)
+        return dispatch_task("worker.run_scenario", [scenario_id, start_date, end_date], "scenarios", link=finished), 1
+
+    fanout_id = uuid.uuid4().hex
+    progress_key = PROGRESS_KEY.format(fanout_id)
+    boundaries = [w[1].isoformat() for w in windows[:-1]]
+
+    header, entries = [], []
+    for w_start, w_end in windows:
+        task_id = str(uuid.uuid4())
+        args = [scenario_id, w_start.isoformat(), w_end.isoformat()]
+        sig = signature("worker.run_scenario", args=args, queue="scenarios", task_id=task_id)
+        sig.link(signature(
+            "mainserver.scenario_chunk_done",
+            args=[scenario_id, progress_key, len(windows), args[1], args[2]],
+            queue="default",
+        ))
+        header.append(sig)
+        entries.append((task_id, "worker.run_scenario", args, "scenarios"))
+
+    callback_id = str(uuid.uuid4())
+    callback = signature(
+        "mainserver.merge_scenario_chunks",
+        args=[scenario_id, progress_key, boundaries],
+        queue="default",
+        task_id=callback_id,
+    )
+    callback.link_error(signature("mainserver.scenario_chunks_failed", args=[scenario_id, progress_key], queue="default"))
+
+    # Cancelling the scenario (its task_id is the callback's) revokes the windows too.
+    children = [entry[0] for entry in entries]
+    index_tasks(entries + [(callback_id, "mainserver.merge_scenario_chunks", [scenario_id], "default", children)])
+    ScenarioLog.objects.create(
+        scenario_id=scenario_id,
+        message=f"Split {start_date} - {end_date} into {len(windows)} periods",
+        progress=0,
+    )
+    chord(header)(callback)
+    return callback_id, len(windows)
+
+
+def record_chunk_done(scenario_id, progress_key, total, window_start, window_end):
+    try:
+        client = get_redis()
+        done = client.incr(progress_key)
+        client.expire(progress_key, settings.TASK_INDEX_TTL_SECONDS)
+    except Exception as e:
+        print(f"[Scenario Fan-out] Redis error for {progress_key}: {e}")
+        done = None
+    progress = int(done * 100 / total) if done else 0
+    ScenarioLog.objects.create(
+        scenario_id=scenario_id,
+        message=f"Period {window_start} - {window_end} finished ({done or '?'}/{total})",
+        progress=min(progress, 99),
+    )
+
+
+def merge_chunks(scenario_id, boundaries):
+    """Drop the older of duplicate rows written by two windows for a shared boundary; returns rows removed."""
+    dates = [_parse(b) for b in boundaries]
+    if not dates:
+        return 0
+    # Keep Max(data_set_id) per key: delete every boundary row that has a newer twin.
+    newer = MainClass.objects.filter(
+        scenario_id=scenario_id,
+        data_set_id__gt=OuterRef("data_set_id"),
+        **{field: OuterRef(field) for field in _KEY},
+    )
+    _, counts = MainClass.objects.filter(scenario_id=scenario_id, date_time__in=dates).filter(Exists(newer)).delete()
+    return counts.get(MainClass._meta.label, 0)
+
+
+def clear_progress(progress_key):
+    try:
+        get_redis().delete(progress_key)
+    except Exception:
+        pass
+
+
+__all__ = ["dispatch_scenario", "merge_chunks", "record_chunk_done", "split_range", "supports_fanout"]
@@ -0,0 +1,62 @@
+# apiapp/services/scenario_purge.py
+"""
+Background removal of deleted scenarios and their result rows.
+
+ScenarioDeleteView only marks a scenario DELETING and queues
+mainserver.purge_scenario. The task deletes the scenario's MainClass rows
+(and their history) in chunks of SCENARIO_PURGE_CHUNK_SIZE picked through
+the scenario index, one transaction per chunk, then deletes the scenario
+itself. A purge interrupted by a worker restart is resumed by
+`manage.py purge_orphan_results`, which also removes result rows left
+behind by scenarios deleted before this existed.
+
+Orphans are MainClass rows with neither a scenario nor a component: no view
+can reach them (data source pages read by component, scenario pages by
+scenario).
+"""
+from django.conf import settings
+from django.db import transaction
+
+from apiapp.models import MainClass, ScenarioClass
+
+DELETING = "DELETING"
+
+
+def _delete_in_chunks(qs, chunk_size):
+    removed = 0
+    while True:
+        ids = list(qs.order_by().values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            return removed
+        with transaction.atomic():
+            _, counts = MainClass.objects.filter(pk__in=ids).delete()
+        removed += counts.get(MainClass._meta.label, 0)
+
+
+def purge_scenario(scenario_id, chunk_size=None):
+    """Delete a DELETING scenario's result rows chunk by chunk, then the scenario; returns rows removed."""
+    chunk_size = chunk_size or settings.SCENARIO_PURGE_CHUNK_SIZE
+    if not ScenarioClass.objects.filter(pk=scenario_id, status=DELETING).exists():
+        print(f"[Scenario Purge] Scenario {scenario_id} is not marked {DELETING}, skipping")
+        return 0
+    # The baseline FK is PROTECT; check before removing any rows.
+    if ScenarioClass.objects.filter(baseline_id=scenario_id).exists():
+        print(f"[Scenario Purge] Scenario {scenario_id} is the baseline of other scenarios, skipping")
+        return 0
+
+    removed = _delete_in_chunks(MainClass.objects.filter(scenario_id=scenario_id), chunk_size)
+    ScenarioClass.objects.filter(pk=scenario_id, status=DELETING).delete()
+    print(f"[Scenario Purge] Scenario {scenario_id}: removed {removed} result rows")
+    return removed
+
+
+def orphan_results():
+    return MainClass.objects.filter(scenario__isnull=True, component__isnull=True)
+
+
+def purge_orphans(chunk_size=None):
+    """Delete orphaned result rows; returns rows removed."""
+    return _delete_in_chunks(orphan_results(), chunk_size or settings.SCENARIO_PURGE_CHUNK_SIZE)
+
+
+__all__ = ["DELETING", "orphan_results", "purge_orphans", "purge_scenario"]
@@ -0,0 +1,117 @@
+# apiapp/services/scenario_storage.py
+"""
+Copy-on-write result storage for scenarios derived from a baseline.
+
+A scenario with a baseline and storage_mode "delta" keeps in MainClass only
+the result rows that differ from its baseline. Its results are read through
+results_queryset(), which returns the scenario's own rows plus the baseline's
+rows for keys (object instance, property, date) the scenario does not
+override, inside the scenario's start_date..end_date. Baselines may
+themselves be delta scenarios; the chain is resolved in the same query.
+
+Workers still write a full copy. compact_results() runs when the scenario
+finishes and deletes the rows that match the baseline: text values must be
+equal, numeric values within delta_tolerance (relative to the baseline value).
+"""
+from django.db.models import Case, Exists, ExpressionWrapper, F, FloatField, OuterRef, Q, When
+from django.db.models.functions import Abs, Cast
+
+from apiapp.models import MainClass, ScenarioClass
+
+NUMERIC_RE = r"^\s*[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?\s*$"
+MAX_BASELINE_DEPTH = 5
+DELETE_BATCH = 5000
+
+_KEY = ("object_type_id", "object_instance_id", "object_type_property_id", "date_time")
+
+
+def numeric_value():
+    """MainClass.value as a float, NULL when it is not a number (safe to cast in any clause)."""
+    return Case(When(value__regex=NUMERIC_RE, then=Cast("value", FloatField())), default=None, output_field=FloatField())
+
+
+def baseline_chain(scenario):
+    """[scenario, baseline, baseline's baseline, ...] as far as rows are stored relative to a baseline."""
+    chain = [scenario]
+    while (
+        chain[-1].storage_mode == "delta"
+        and chain[-1].baseline_id
+        and len(chain) <= MAX_BASELINE_DEPTH
+    ):
+        baseline = ScenarioClass.objects.filter(pk=chain[-1].baseline_id).first()
+        if baseline is None or baseline in chain:
+            break
+        chain.append(baseline)
+    return chain
+
+
+def _same_key(scenario_ids):
+    return MainClass.objects.filter(
+        scenario_id__in=scenario_ids, **{field: OuterRef(field) for field in _KEY}
+    )
+
+
+def results_queryset(scenario):
+    """MainClass rows that make up a scenario's results, with delta storage resolved."""
+    chain = baseline_chain(scenario)
+    if len(chain) == 1:
+        return MainClass.objects.filter(scenario_id=scenario.pk)
+
+    condition = Q(scenario_id=scenario.pk)
+    for depth, baseline in enumerate(chain[1:], start=1):
+        overriding = [s.pk for s in chain[:depth]]
+        condition |= Q(scenario_id=baseline.pk) & ~Exists(_same_key(overriding))
+
+    # Baseline rows outside the derived scenario's own period are not its results.
+    inherited = ~Q(scenario_id=scenario.pk)
+    qs = MainClass.objects.filter(condition)
+    if scenario.start_date:
+        qs = qs.exclude(inherited & Q(date_time__lt=scenario.start_date))
+    if scenario.end_date:
+        qs = qs.exclude(inherited & Q(date_time__gt=scenario.end_date))
+    return qs
+
+
+def compact_results(scenario_id):
+    """Delete a delta scenario's rows that its baseline already holds; returns rows removed."""
+    scenario = ScenarioClass.objects.filter(pk=scenario_id).first()
+    if scenario is None or scenario.storage_mode != "delta" or not scenario.baseline_id:
+        return 0
+
+    baseline_rows = results_queryset(scenario.baseline).filter(**{field: OuterRef(field) for field in _KEY})
+    duplicate = Exists(baseline_rows.filter(value=OuterRef("value")))
+    if scenario.delta_tolerance > 0:
+        within = (
+            baseline_rows.annotate(bv=numeric_value())
+            .filter(bv__isnull=False)
+            .annotate(diff=Abs(ExpressionWrapper(F("bv") - OuterRef("v"), output_field=FloatField())))
+            .filter(diff__lte=Abs(F("bv")) * scenario.delta_tolerance)
+        )
+        duplicate = duplicate | (Q(v__isnull=False) & Exists(within))
+
+    ids = list(
+        MainClass.objects.filter(scenario_id=scenario_id)
+        .annotate(v=numeric_value())
+        .filter(duplicate)
+        .values_list("pk", flat=True)
+    )
+    removed = 0
+    for i in range(0, len(ids), DELETE_BATCH):
+        _, counts = MainClass.objects.filter(pk__in=ids[i:i + DELETE_BATCH]).delete()
+        removed += counts.get(MainClass._meta.label, 0)
+    print(f"[Scenario Storage] Scenario {scenario_id}: removed {removed} rows equal to baseline {scenario.baseline_id}")
+    return removed
+
+
+def delta_dependents(scenario):
+    """Delta scenarios whose results would be lost if this scenario's rows went away."""
+    return ScenarioClass.objects.filter(baseline=scenario, storage_mode="delta")
+
+
+__all__ = [
+    "baseline_chain",
+    "compact_results",
+    "delta_dependents",
+    "numeric_value",
+    "results_queryset",
+]
@@ -0,0 +1,147 @@
+# apiapp/services/scenario_summary.py
+"""
+Monthly summaries of scenario results.
+
+When a scenario finishes, its numeric MainClass rows are rolled up into
+ScenarioSummary: per (instance, property, month) the sample count, total,
+average, min/max, first and last value, and the cumulative total up to the
+end of the month. The roll-up is one windowed query in the database; Python
+only copies the resulting rows. Overview charts (results and comparison
+endpoints with ?summary=<metric>) read these rows instead of the raw results.
+
+MainClass.value is text, so only rows matching NUMERIC_RE are counted.
+Delta scenarios are summarised over their merged results (see
+services/scenario_storage.py).
+"""
+from django.db import transaction
+from django.db.models import Avg, Count, DateField, F, Max, Min, Sum, Window
+from django.db.models.functions import FirstValue, RowNumber, TruncMonth
+from django.utils import timezone
+
+from apiapp.models import ScenarioClass, ScenarioSummary
+from apiapp.services.scenario_storage import NUMERIC_RE, numeric_value, results_queryset
+
+METRICS = {
+    "total": "total",
+    "average": "average",
+    "min": "minimum",
+    "max": "maximum",
+    "first": "first_value",
+    "last": "last_value",
+    "cumulative": "cumulative",
+}
+
+_GROUP = ["object_instance_id", "object_type_property_id"]
+
+
+def numeric_results(scenario):
+    """Numeric result rows of a scenario with `v` (float) and `period` (month) annotated."""
+    return (
+        results_queryset(scenario)
+        .filter(date_time__isnull=False, value__regex=NUMERIC_RE)
+        .annotate(v=numeric_value(), period=TruncMonth("date_time", output_field=DateField()))
+    )
+
+
+def compute_summary(rows):
+    """
+    Roll up a queryset from numeric_results(); returns dicts with the
+    ScenarioSummary fields. Window functions over (instance, property, month)
+    give the month's aggregates on every row; the last row of each month is kept.
+    """
+    period = _GROUP + ["period"]
+    latest_first = [F("date_time").desc(), F("data_set_id").desc()]
+    return (
+        rows.annotate(
+            rn=Window(RowNumber(), partition_by=period, order_by=latest_first),
+            samples=Window(Count("data_set_id"), partition_by=period),
+            total=Window(Sum("v"), partition_by=period),
+            average=Window(Avg("v"), partition_by=period),
+            minimum=Window(Min("v"), partition_by=period),
+            maximum=Window(Max("v"), partition_by=period),
+            first_value=Window(FirstValue("v"), partition_by=period, order_by=[F("date_time").asc(), F("data_set_id").asc()]),
+            # Running total over the whole series; read on the month's last row.
+            cumulative=Window(Sum("v"), partition_by=_GROUP, order_by=[F("date_time").asc(), F("data_set_id").asc()]),
+        )
+        .filter(rn=1)
+        .values(
+            "object_type_id", "object_instance_id", "object_type_property_id", "period",
+            "samples", "total", "average", "minimum", "maximum", "first_value", "v", "cumulative",
+        )
+        .order_by()
+    )
+
+
+def build_summary(scenario_id):
+    """Replace a scenario's ScenarioSummary rows; returns the number of rows written."""
+    scenario = ScenarioClass.objects.get(pk=scenario_id)
+    rows = [
+        ScenarioSummary(scenario_id=scenario_id, last_value=row.pop("v"), **row)
+        for row in compute_summary(numeric_results(scenario)).iterator(chunk_size=2000)
+    ]
+    with transaction.atomic():
+        ScenarioSummary.objects.filter(scenario_id=scenario_id).delete()
+        ScenarioSummary.objects.bulk_create(rows, batch_size=1000)
+        ScenarioClass.objects.filter(pk=scenario_id).update(summary_built_at=timezone.now())
+    print(f"[Scenario Summary] Scenario {scenario_id}: {len(rows)} summary rows")
+    return len(rows)
+
+
+def summary_rows(scenario, start=None, end=None, property_ids=None):
+    """
+    Summary rows of a scenario as dicts, optionally limited to months
+    overlapping start..end and to some properties. Built on first use for
+    finished scenarios that have none yet; computed on the fly (not stored)
+    while a scenario is still running.
+    """
+    first_period = start.date().replace(day=1) if start else None
+    last_period = end.date() if end else None
+
+    if scenario.summary_built_at is None and scenario.status != "SUCCESS":
+        rows = numeric_results(scenario)
+        if property_ids:
+            rows = rows.filter(object_type_property_id__in=property_ids)
+        return [
+            dict(row, last_value=row.pop("v"), scenario_id=scenario.pk)
+            for row in compute_summary(rows)
+            if (first_period is None or row["period"] >= first_period)
+            and (last_period is None or row["period"] <= last_period)
+        ]
+
+    if scenario.summary_built_at is None:
+        build_summary(scenario.pk)
+    qs = ScenarioSummary.objects.filter(scenario_id=scenario.pk)
+    if first_period:
+        qs = qs.filter(period__gte=first_period)
+    if last_period:
+        qs = qs.filter(period__lte=last_period)
+    if property_ids:
+        qs = qs.filter(object_type_property_id__in=property_ids)
+    return list(qs.order_by("period").values())
+
+
+def as_records(rows, metric):
+    """Summary rows in the shape of result records (one point per month), for the charts."""
+    field = METRICS[metric]
+    return [
+        {
+            "scenario": row["scenario_id"],
+            "object_type": row["object_type_id"],
+            "object_instance": row["object_instance_id"],
+            "object_type_property": row["object_type_property_id"],
+            "date_time": row["period"],
+            "value": row[field],
+            "samples": row["samples"],
+        }
+        for row in rows
+    ]
+
+
+__all__ = [
+    "METRICS",
+    "as_records",
+    "build_summary",
+    "compute_summary",
+    "numeric_results",
+    "summary_rows",
+]
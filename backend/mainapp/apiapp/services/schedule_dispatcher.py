@@ -0,0 +1,168 @@
+# apiapp/services/schedule_dispatcher.py
+"""
+Event-driven dispatcher for WorkflowScheduler.
+
+Keeps a min-heap of (next_run, scheduler id) for active schedules and sleeps
+until the earliest one is due, then queues it through
+run_due_workflow_schedules (which claims rows with SKIP LOCKED, so running
+this next to beat or a second dispatcher is safe).
+
+Schedule changes are published on a Redis channel by the WorkflowScheduler
+post_save/post_delete receivers; the dispatcher reloads its heap when one
+arrives. Between runs it makes no queries, except for a periodic resync in
+case a notification was lost. Schedules deferred by the runner (no free slot)
+are retried every WORKFLOW_DEFER_RETRY_SECONDS.
+
+Run with: python manage.py run_workflow_scheduler
+"""
+import heapq
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from apiapp.models import WorkflowScheduler
+from apiapp.services.redis_client import get_redis
+from apiapp.services.scheduler_runner import run_due_workflow_schedules
+
+CHANNEL = "prodcast:workflow-schedules"
+
+
+def publish_schedule_change(scheduler_id=None):
+    """Tell running dispatchers to reload their heap; a no-op when Redis is down."""
+    try:
+        get_redis().publish(CHANNEL, str(scheduler_id or ""))
+    except Exception as e:
+        print(f"[Workflow Scheduler] Failed to publish schedule change: {e}")
+
+
+class ScheduleDispatcher:
+    def __init__(self, resync_seconds=None, idle_seconds=None):
+        self.resync_seconds = resync_seconds or settings.WORKFLOW_SCHEDULER_RESYNC_SECONDS
+        # Upper bound for a single wait, so the loop notices a lost Redis connection.
+        self.idle_seconds = idle_seconds or 60
+        self.heap = []
+        self.loaded_at = 0.0
+        # Due rows the runner could not advance (invalid cron); ignored until the schedule changes.
+        self.failed = set()
+        # Due rows waiting for a free slot: {scheduler id: retry at (epoch seconds)}.
+        self.deferred = {}
+        self._pubsub = None
+
+    # --- state ---------------------------------------------------------------
+    def reload(self):
+        close_old_connections()
+        rows = WorkflowScheduler.objects.filter(is_active=True).values_list("id", "next_run")
+        heap = []
+        missing = False
+        now = timezone.now()
+        for sched_id, next_run in rows:
+            if next_run is None:
+                missing = True
+                continue
+            if sched_id in self.failed and next_run <= now:
+                continue
+            heap.append((max(next_run.timestamp(), self.deferred.get(sched_id, 0.0)), sched_id))
+        heapq.heapify(heap)
+        self.heap = heap
+        self.loaded_at = time.monotonic()
+        return missing
+
+    def seconds_until_due(self):
+        if not self.heap:
+            return None
+        return max(self.heap[0][0] - timezone.now().timestamp(), 0.0)
+
+    # --- notifications -------------------------------------------------------
+    def _subscribe(self):
+        if self._pubsub is not None:
+            return self._pubsub
+        try:
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CHANNEL)
+            self._pubsub = pubsub
+        except Exception as e:
+            print(f"[Workflow Scheduler] Redis unavailable, falling back to resync every {self.resync_seconds}s: {e}")
+            self._pubsub = None
+        return self._pubsub
+
+    def _wait(self, timeout):
+        """Wait up to timeout seconds; True when a schedule change was announced."""
+        pubsub = self._subscribe()
+        if pubsub is None:
+            time.sleep(timeout)
+            return False
+        try:
+            msg = pubsub.get_message(timeout=timeout)
+        except Exception as e:
+            print(f"[Workflow Scheduler] Lost Redis subscription: {e}")
+            self._pubsub = None
+            return True
+        if msg is None:
+            return False
+        # Drain a burst of changes (bulk edits) into one reload.
+        while True:
+            try:
+                if pubsub.get_message(timeout=0) is None:
+                    break
+            except Exception:
+                break
+        return True
+
+    # --- loop ----------------------------------------------------------------
+    def dispatch_due(self):
+        close_old_connections()
+        results = run_due_workflow_schedules()
+        queued = [r for r in results if r.get("status") == "QUEUED"]
+        self.failed |= {r["id"] for r in results if r.get("status") == "ERROR" and "error" in r and "task_id" not in r}
+        retry_at = time.time() + settings.WORKFLOW_DEFER_RETRY_SECONDS
+        for r in results:
+            if r.get("status") == "DEFERRED":
+                self.deferred[r["id"]] = retry_at
+            else:
+                self.deferred.pop(r["id"], None)
+        deferred = sum(1 for r in results if r.get("status") == "DEFERRED")
+        if results:
+            print(
+                f"[Workflow Scheduler] Queued {len(queued)} workflow(s), {deferred} deferred, "
+                f"{len(results) - len(queued) - deferred} skipped or failed"
+            )
+        return results
+
+    def run_forever(self):
+        print("[Workflow Scheduler] Started")
+        if self.reload():
+            # Schedules without next_run are initialised by the runner.
+            self.dispatch_due()
+            self.reload()
+
+        while True:
+            wait = self.seconds_until_due()
+            since_load = time.monotonic() - self.loaded_at
+            resync_in = max(self.resync_seconds - since_load, 0.0)
+            timeout = min(x for x in (wait, resync_in, self.idle_seconds) if x is not None)
+
+            changed = self._wait(timeout) if timeout > 0 else False
+            if changed:
+                self.failed.clear()
+                self.deferred.clear()
+            if changed or time.monotonic() - self.loaded_at >= self.resync_seconds:
+                if self.reload():
+                    self.dispatch_due()
+                    self.reload()
+                continue
+
+            wait = self.seconds_until_due()
+            if wait is not None and wait <= 0:
+                self.dispatch_due()
+                self.reload()
+                if self.seconds_until_due() == 0:
+                    # Still due: another node holds the rows and has not committed yet.
+                    if self._wait(0.5):
+                        self.failed.clear()
+                        self.deferred.clear()
+                        self.reload()
+
+
+__all__ = ["CHANNEL", "ScheduleDispatcher", "publish_schedule_change"]
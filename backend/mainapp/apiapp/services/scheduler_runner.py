@@ -1,66 +1,200 @@
 # apiapp/services/scheduler_runner.py
+import uuid
+
+from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
 from apiapp.models import WorkflowScheduler, WorkflowSchedulerLog
 from celery import current_app as app
 from croniter import croniter
 from apiapp.models import WorkflowRun
+from apiapp.services.progress_events import WORKFLOW_RUNS_CHANNEL, publish_many, publish_workflow_runs, workflow_run_event
+from apiapp.services.task_index import index_tasks
+from apiapp.services.workflow_dispatch import AdmissionState, release_runs
+
+# Rows claimed per transaction; the runner loops until no due rows are left.
+CLAIM_BATCH_SIZE = 200
+
+
+def _claim(qs, batch_size):
+    """Lock up to batch_size rows; rows locked by another runner are skipped, not waited on."""
+    return list(qs.select_for_update(skip_locked=True).order_by("id")[:batch_size])
+
+
+def _init_next_runs(now, batch_size):
+    # 1️⃣ Initialize next_run for any active schedules missing it
+    failed = set()
+    while True:
+        with transaction.atomic():
+            qs = WorkflowScheduler.objects.filter(is_active=True, next_run__isnull=True).exclude(id__in=failed)
+            batch = _claim(qs, batch_size)
+            updated, logs = [], []
+            for sched in batch:
+                try:
+                    sched.next_run = croniter(sched.cron_expression, now).get_next(timezone.datetime)
+                    updated.append(sched)
+                except Exception as e:
+                    failed.add(sched.id)
+                    logs.append(WorkflowSchedulerLog(
+                        scheduler=sched,
+                        status="ERROR",
+                        message=f"Exception setting next_run: {e}",
+                    ))
+            WorkflowScheduler.objects.bulk_update(updated, ["next_run"])
+            WorkflowSchedulerLog.objects.bulk_create(logs)
+        if len(batch) < batch_size:
+            return
+
+
+def _send_claimed(dispatch):
+    """Send the tasks of a committed batch; failures are recorded on the run and the log."""
+    failed_runs, logs = [], []
+    index_tasks([(task_id, "worker.run_workflow", [sched.workflow_id, sched.id], "workflows") for sched, task_id, _ in dispatch])
+    for sched, task_id, result in dispatch:
+        try:
+            app.send_task(
+                "worker.run_workflow",
+                args=[sched.workflow_id, sched.id],
+                queue="workflows",
+                task_id=task_id,
+            )
+        except Exception as e:
+            failed_runs.append(task_id)
+            logs.append(WorkflowSchedulerLog(scheduler=sched, status="ERROR", message=f"Exception: {e}"))
+            result.update({"status": "ERROR", "error": str(e)})
+            result.pop("task_id", None)
+    if failed_runs:
+        WorkflowRun.objects.filter(task_id__in=failed_runs).update(
+            status="ERROR", error="Failed to queue task", finished_at=timezone.now()
+        )
+        publish_workflow_runs(failed_runs)
+        release_runs([(sched.workflow_id, task_id) for sched, task_id, _ in dispatch if task_id in failed_runs])
+        WorkflowSchedulerLog.objects.bulk_create(logs)
+
+
+def _deferred_logs(waiting):
+    """DEFERRED logs for (schedule, reason) pairs not already logged since their due time."""
+    if not waiting:
+        return []
+    logged = set(
+        WorkflowSchedulerLog.objects.filter(
+            scheduler_id__in=[sched.id for sched, _ in waiting],
+            status="DEFERRED",
+            timestamp__gte=F("scheduler__next_run"),
+        ).values_list("scheduler_id", flat=True)
+    )
+    return [
+        WorkflowSchedulerLog(scheduler=sched, status="DEFERRED", message=f"Deferred: {reason}")
+        for sched, reason in waiting
+        if sched.id not in logged
+    ]
+
 
-def run_due_workflow_schedules():
+def run_due_workflow_schedules(batch_size=CLAIM_BATCH_SIZE):
     """
     Core logic: checks WorkflowScheduler table and queues due workflows.
     Returns a list of result dicts for logging or API responses.
+
+    Due rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several
+    beat workers / API calls can run this concurrently without queueing a
+    schedule twice. Each batch advances next_run, writes its logs and
+    WorkflowRun rows in bulk, and sends the tasks once the batch commits.
+    Runs rejected by the "skip" overlap policy are logged as SKIPPED. Runs
+    held back by the "queue" policy or the global cap are DEFERRED: next_run
+    is left as is, so the schedule stays due and is retried on a later call
+    (see services/workflow_dispatch.py). The DEFERRED log is written once
+    per due time.
     """
     now = timezone.now()
     results = []
 
-    # 1️⃣ Initialize next_run for any active schedules missing it
-    for sched in WorkflowScheduler.objects.filter(is_active=True, next_run__isnull=True):
-        try:
-            sched.next_run = croniter(sched.cron_expression, now).get_next(timezone.datetime)
-            sched.save()
-        except Exception as e:
-            WorkflowSchedulerLog.objects.create(
-                scheduler=sched,
-                status="ERROR",
-                message=f"Exception setting next_run: {e}",
-            )
+    _init_next_runs(now, batch_size)
 
     # 2️⃣ Queue due schedules
-    for sched in WorkflowScheduler.objects.filter(is_active=True, next_run__lte=now):
-        try:
-            task = app.send_task(
-                "worker.run_workflow",
-                args=[sched.workflow.id, sched.id],
-                queue="workflows",
-            )
+    failed = set()  # broken cron expressions keep their next_run; don't re-claim them in this call
+    deferred = set()  # likewise for runs waiting for a slot
+    while True:
+        dispatch = []
+        with transaction.atomic():
+            qs = WorkflowScheduler.objects.filter(is_active=True, next_run__lte=now).exclude(id__in=failed | deferred)
+            batch = _claim(qs, batch_size)
+            admission = AdmissionState({sched.workflow_id for sched in batch})
+            updated, logs, runs, waiting = [], [], [], []
 
-            sched.last_run = now
-            sched.next_run = croniter(sched.cron_expression, now).get_next(timezone.datetime)
-            sched.save()
+            for sched in batch:
+                try:
+                    next_run = croniter(sched.cron_expression, now).get_next(timezone.datetime)
+                except Exception as e:
+                    failed.add(sched.id)
+                    logs.append(WorkflowSchedulerLog(scheduler=sched, status="ERROR", message=f"Exception: {e}"))
+                    results.append({
+                        "id": sched.id,
+                        "status": "ERROR",
+                        "error": str(e),
+                        "workflow_id": sched.workflow_id,
+                    })
+                    continue
 
-            WorkflowSchedulerLog.objects.create(
-                scheduler=sched,
-                status="QUEUED",
-                message=f"Task {task.id} queued for workflow {sched.workflow.id}",
-            )
+                task_id = str(uuid.uuid4())
+                admitted, reason, retry = admission.admit(sched, task_id)
+                if retry:
+                    deferred.add(sched.id)
+                    waiting.append((sched, reason))
+                    results.append({
+                        "id": sched.id,
+                        "status": "DEFERRED",
+                        "reason": reason,
+                        "workflow_id": sched.workflow_id,
+                    })
+                    continue
 
-            results.append({
-                "id": sched.id,
-                "task_id": task.id,
-                "status": "QUEUED",
-                "workflow_id": sched.workflow.id,
-            })
-        except Exception as e:
-            WorkflowSchedulerLog.objects.create(
-                scheduler=sched,
-                status="ERROR",
-                message=f"Exception: {e}",
-            )
-            results.append({
-                "id": sched.id,
-                "status": "ERROR",
-                "error": str(e),
-                "workflow_id": sched.workflow.id,
-            })
-
-    return results
+                sched.last_run = now
+                sched.next_run = next_run
+                updated.append(sched)
+
+                if not admitted:
+                    logs.append(WorkflowSchedulerLog(scheduler=sched, status="SKIPPED", message=reason))
+                    results.append({
+                        "id": sched.id,
+                        "status": "SKIPPED",
+                        "reason": reason,
+                        "workflow_id": sched.workflow_id,
+                    })
+                    continue
+
+                logs.append(WorkflowSchedulerLog(
+                    scheduler=sched,
+                    status="QUEUED",
+                    message=f"Task {task_id} queued for workflow {sched.workflow_id}",
+                ))
+                runs.append(WorkflowRun(
+                    workflow_id=sched.workflow_id,
+                    scheduler=sched,
+                    task_id=task_id,
+                    status="QUEUED",
+                ))
+                result = {
+                    "id": sched.id,
+                    "task_id": task_id,
+                    "status": "QUEUED",
+                    "workflow_id": sched.workflow_id,
+                }
+                results.append(result)
+                dispatch.append((sched, task_id, result))
+
+            WorkflowScheduler.objects.bulk_update(updated, ["last_run", "next_run"])
+            logs.extend(_deferred_logs(waiting))
+            WorkflowSchedulerLog.objects.bulk_create(logs)
+            WorkflowRun.objects.bulk_create(runs)
+            admission.revoke_replaced()
+
+            # Publish only what this transaction committed; a rollback sends nothing.
+            # bulk_create skips post_save, so announce the new runs here.
+            transaction.on_commit(lambda d=dispatch, a=admission, r=runs: (
+                a.send_revokes(app),
+                _send_claimed(d),
+                publish_many(WORKFLOW_RUNS_CHANNEL, [workflow_run_event(run) for run in r]),
+            ))
+
+        if len(batch) < batch_size:
+            return results
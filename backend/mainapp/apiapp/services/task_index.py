@@ -0,0 +1,109 @@
+# apiapp/services/task_index.py
+"""
+Index of dispatched Celery tasks and a persistent revoked-id set.
+
+dispatch_task() sends a task and records task id -> {name, args, queue}
+under its own Redis key, so a queued task can be looked up without scanning
+the broker list. cancel_task() adds the id, and the ids of any children
+indexed with it (the windows of a fanned-out scenario), to a sorted set of
+revoked ids (scored by revoke time) and broadcasts the revoke; workers keep revoked ids
+in memory and drop the message when they receive it. Workers that were down
+during the broadcast load the set on startup: worker apps import
+workflow_runtime.revoked, which restores it on worker_ready.
+
+A task counts as queued only while its state is PENDING (workers run with
+task_track_started, so a running task is STARTED: the mainserver worker from
+settings, external workers through workflow_runtime.revoked) and it is not
+among the active tasks of the last worker-status snapshot
+(services/worker_status.py).
+The cancel never waits on a broadcast to the workers.
+
+Both structures expire after TASK_INDEX_TTL_SECONDS.
+"""
+import json
+import time
+import uuid
+
+from celery import current_app as app
+from django.conf import settings
+
+from apiapp.domains.integration.workflow_runtime import revoked
+from apiapp.domains.integration.workflow_runtime.revoked import REVOKED_KEY
+from apiapp.services.redis_client import get_redis
+from apiapp.services.task_status import fetch_task_states
+from apiapp.services.worker_status import read_active_task_ids
+
+TASK_KEY_PREFIX = "prodcast:task:"
+
+
+def index_tasks(entries):
+    """
+    Index (task_id, name, args, queue[, children]) tuples in one round trip;
+    a no-op when Redis is down. `children` are task ids cancelled together
+    with this one (the header of a chord whose callback this is).
+    """
+    if not entries:
+        return
+    now = time.time()
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for task_id, name, args, queue, *children in entries:
+            entry = {"name": name, "args": list(args), "queue": queue, "sent_at": now}
+            if children:
+                entry["children"] = list(children[0])
+            pipe.set(f"{TASK_KEY_PREFIX}{task_id}", json.dumps(entry, default=str), ex=settings.TASK_INDEX_TTL_SECONDS)
+        pipe.execute()
+    except Exception as e:
+        print(f"[Task Index] Failed to index {len(entries)} task(s): {e}")
+
+
+def dispatch_task(name, args, queue, task_id=None, link=None):
+    """app.send_task plus an index entry; returns the task id. Raises if the send fails."""
+    task_id = task_id or str(uuid.uuid4())
+    index_tasks([(task_id, name, args, queue)])
+    app.send_task(name, args=args, queue=queue, task_id=task_id, link=link)
+    return task_id
+
+
+def get_task(task_id):
+    raw = get_redis().get(f"{TASK_KEY_PREFIX}{task_id}")
+    return json.loads(raw) if raw else None
+
+
+def cancel_task(task_id, terminate=False):
+    """
+    Revoke a task by id, together with the children recorded in its index
+    entry. Returns (entry, was_queued): the index entry (None for unknown
+    ids) and whether none of the tasks had started yet.
+    """
+    client = get_redis()
+    now = time.time()
+    raw = client.get(f"{TASK_KEY_PREFIX}{task_id}")
+    entry = json.loads(raw) if raw else None
+    children = (entry or {}).get("children") or []
+    task_ids = [task_id, *children]
+
+    pipe = client.pipeline(transaction=False)
+    pipe.zadd(REVOKED_KEY, {i: now for i in task_ids})
+    pipe.zremrangebyscore(REVOKED_KEY, "-inf", now - settings.TASK_INDEX_TTL_SECONDS)
+    pipe.execute()
+
+    app.control.revoke(task_ids, terminate=terminate, signal="SIGTERM")
+
+    # A chord callback stays PENDING until its header is done; its children tell whether work started.
+    watched = children or [task_id]
+    states = fetch_task_states(watched)
+    was_queued = (
+        entry is not None
+        and all(state == "PENDING" for state in states.values())
+        and not read_active_task_ids().intersection(watched)
+    )
+    return entry, was_queued
+
+
+def load_revoked_ids():
+    """Ids revoked within TASK_INDEX_TTL_SECONDS."""
+    return revoked.load_revoked_ids(get_redis(), settings.TASK_INDEX_TTL_SECONDS)
+
+
+__all__ = ["cancel_task", "dispatch_task", "get_task", "index_tasks", "load_revoked_ids"]
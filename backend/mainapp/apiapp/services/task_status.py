@@ -0,0 +1,37 @@
+# apiapp/services/task_status.py
+"""
+Batched Celery task state lookups.
+
+With the Redis result backend every state is one `celery-task-meta-<id>` key,
+so the states of any number of tasks come from a single MGET. Other backends
+fall back to one lookup per task.
+"""
+import json
+
+from celery import current_app as app
+from django.conf import settings
+
+from apiapp.services.redis_client import get_redis
+
+
+def fetch_task_states(task_ids):
+    """{task_id: state}; tasks the backend doesn't know yet are PENDING (Celery's convention)."""
+    task_ids = [t for t in dict.fromkeys(task_ids) if t]
+    if not task_ids:
+        return {}
+
+    backend = app.backend
+    if not settings.CELERY_RESULT_BACKEND.startswith(("redis://", "rediss://")):
+        return {t: backend.get_state(t) for t in task_ids}
+
+    raw = get_redis(settings.CELERY_RESULT_BACKEND).mget([backend.get_key_for_task(t) for t in task_ids])
+    states = {}
+    for task_id, value in zip(task_ids, raw):
+        try:
+            states[task_id] = json.loads(value)["status"] if value else "PENDING"
+        except (TypeError, ValueError, KeyError):
+            states[task_id] = "PENDING"
+    return states
+
+
+__all__ = ["fetch_task_states"]
@@ -0,0 +1,95 @@
+# apiapp/services/worker_status.py
+"""
+Cached Celery worker status.
+
+mainserver.collect_worker_status (beat, every WORKER_STATUS_INTERVAL_SECONDS)
+broadcasts inspect().active() once and stores a snapshot in Redis: one entry
+per worker with its status, number of active tasks and last-seen time,
+plus the ids of the active tasks (read by task_index.cancel_task).
+Workers that stop replying stay in the snapshot as offline for a day.
+WorkersStatusView only reads the snapshot, so the HTTP request never waits
+on a broadcast reply timeout.
+"""
+import json
+from datetime import datetime, timedelta
+
+from celery import current_app as app
+from django.conf import settings
+from django.utils import timezone
+
+from apiapp.services.redis_client import get_redis
+
+WORKER_STATUS_KEY = "prodcast:worker-status"
+FORGET_OFFLINE_AFTER = timedelta(days=1)
+
+
+def _load(client):
+    raw = client.get(WORKER_STATUS_KEY)
+    return json.loads(raw) if raw else None
+
+
+def collect_worker_status():
+    """Broadcast one inspect().active() and store the snapshot; returns it."""
+    now = timezone.now()
+    try:
+        active = app.control.inspect(timeout=settings.WORKER_STATUS_INSPECT_TIMEOUT).active() or {}
+    except Exception as e:
+        print(f"[Worker Status] Inspect error: {e}")
+        active = {}
+
+    client = get_redis()
+    previous = (_load(client) or {}).get("workers", {})
+
+    workers = {}
+    for name, tasks in active.items():
+        workers[name] = {
+            "worker": name,
+            "status": "online",
+            "active_tasks": len(tasks or []),
+            "last_seen": now.isoformat(),
+        }
+    for name, entry in previous.items():
+        if name in workers:
+            continue
+        last_seen = datetime.fromisoformat(entry["last_seen"])
+        if now - last_seen < FORGET_OFFLINE_AFTER:
+            workers[name] = {**entry, "status": "offline", "active_tasks": 0}
+
+    active_ids = sorted({task.get("id") for tasks in active.values() for task in tasks or [] if task.get("id")})
+    snapshot = {"collected_at": now.isoformat(), "workers": workers, "active_task_ids": active_ids}
+    client.set(WORKER_STATUS_KEY, json.dumps(snapshot), ex=int(FORGET_OFFLINE_AFTER.total_seconds()))
+    return snapshot
+
+
+def read_worker_status():
+    """
+    Worker rows from the last snapshot. Rows are reported offline when the
+    snapshot is older than three collector intervals (collector not running).
+    """
+    try:
+        snapshot = _load(get_redis())
+    except Exception as e:
+        print(f"[Worker Status] Redis error: {e}")
+        snapshot = None
+    if not snapshot:
+        return []
+
+    collected_at = datetime.fromisoformat(snapshot["collected_at"])
+    stale = timezone.now() - collected_at > timedelta(seconds=3 * settings.WORKER_STATUS_INTERVAL_SECONDS)
+    workers = sorted(snapshot.get("workers", {}).values(), key=lambda w: w["worker"])
+    if stale:
+        workers = [{**w, "status": "offline", "active_tasks": 0} for w in workers]
+    return workers
+
+
+def read_active_task_ids():
+    """Ids of the tasks workers were running at the last snapshot; empty when there is none."""
+    try:
+        snapshot = _load(get_redis())
+    except Exception as e:
+        print(f"[Worker Status] Redis error: {e}")
+        snapshot = None
+    return set((snapshot or {}).get("active_task_ids") or [])
+
+
+__all__ = ["WORKER_STATUS_KEY", "collect_worker_status", "read_active_task_ids", "read_worker_status"]
@@ -0,0 +1,219 @@
+# apiapp/services/workflow_dispatch.py
+"""
+Admission control for workflow runs.
+
+Before a run of worker.run_workflow is queued (by the scheduler runner or
+run_now) the dispatcher checks the schedule's overlap policy against the
+workflow's active runs and the global WORKFLOW_MAX_CONCURRENT_RUNS cap:
+
+    allow    always queue (previous behaviour)
+    skip     do not queue while a run of the workflow is queued or running
+    queue    queue while fewer than max_queued runs are active, else wait
+    replace  queue, revoking the oldest active runs beyond max_queued - 1
+
+Active runs are WorkflowRun rows in QUEUED/PENDING/STARTED younger than
+WORKFLOW_RUN_STALE_MINUTES, so a run whose worker died stops counting.
+A run held back by the queue policy or the global cap is retried: the
+scheduler runner leaves its schedule due instead of dropping the run.
+Each admission is one Lua script on Redis that counts and records the run in
+a sorted set per workflow (plus one for the global cap), so dispatchers on
+several nodes never admit the same slot twice and no lock is held around the
+row claim. The sets are reconciled with the WorkflowRun rows whenever a batch
+starts: entries older than ADMISSION_GRACE_SECONDS whose run is no longer
+active are dropped, so a lost release (dead worker, rolled back transaction)
+does not leak a slot. Without Redis the counts come from the rows alone.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from apiapp.models import WorkflowRun
+from apiapp.services.progress_events import publish_workflow_runs
+from apiapp.services.redis_client import get_redis
+
+ACTIVE_STATUSES = ("QUEUED", "PENDING", "STARTED")
+ADMISSION_KEY = "prodcast:workflow-admission:{}"
+GLOBAL_ADMISSION_KEY = "prodcast:workflow-admission:all"
+# Admitted runs whose WorkflowRun row may not be committed yet.
+ADMISSION_GRACE_SECONDS = 120
+
+# KEYS: workflow set, global set
+# ARGV: task id, now, policy, limit, cap
+# Returns {1, replaced task ids...} or {0, reason, active count}.
+_ADMIT = """
+local active = redis.call('ZCARD', KEYS[1])
+local limit = tonumber(ARGV[4])
+local replaced = {}
+if ARGV[3] == 'skip' and active > 0 then return {0, 'skip', active} end
+if ARGV[3] == 'queue' and active >= limit then return {0, 'queue', active} end
+if ARGV[3] == 'replace' and active >= limit then
+    replaced = redis.call('ZRANGE', KEYS[1], 0, active - limit)
+end
+local cap = tonumber(ARGV[5])
+if cap > 0 then
+    local total = redis.call('ZCARD', KEYS[2])
+    if total - #replaced >= cap then return {0, 'cap', total} end
+    redis.call('ZADD', KEYS[2], ARGV[2], ARGV[1])
+end
+for _, task_id in ipairs(replaced) do
+    redis.call('ZREM', KEYS[1], task_id)
+    redis.call('ZREM', KEYS[2], task_id)
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+local result = {1}
+for _, task_id in ipairs(replaced) do table.insert(result, task_id) end
+return result
+"""
+
+
+def active_runs():
+    stale_after = timezone.now() - timedelta(minutes=settings.WORKFLOW_RUN_STALE_MINUTES)
+    return WorkflowRun.objects.filter(status__in=ACTIVE_STATUSES, started_at__gte=stale_after)
+
+
+def release_runs(runs):
+    """Free the admission slots of finished or failed runs; `runs` are (workflow_id, task_id) pairs."""
+    runs = [(workflow_id, task_id) for workflow_id, task_id in runs if task_id]
+    if not runs:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for workflow_id, task_id in runs:
+            pipe.zrem(ADMISSION_KEY.format(workflow_id), task_id)
+            pipe.zrem(GLOBAL_ADMISSION_KEY, task_id)
+        pipe.execute()
+    except Exception as e:
+        print(f"[Workflow Dispatch] Failed to release admission slots: {e}")
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class AdmissionState:
+    """Admission decisions for a batch of runs, counted in Redis (or in the rows when Redis is down)."""
+
+    def __init__(self, workflow_ids):
+        self.cap = settings.WORKFLOW_MAX_CONCURRENT_RUNS
+        qs = active_runs()
+        self.by_workflow = {wid: [] for wid in workflow_ids}
+        rows = qs.filter(workflow_id__in=list(workflow_ids)).order_by("started_at", "id").values_list(
+            "workflow_id", "task_id", "started_at"
+        )
+        started = {}
+        for workflow_id, task_id, started_at in rows:
+            self.by_workflow[workflow_id].append(task_id)
+            started[task_id] = started_at
+        global_ids = {}
+        if self.cap:
+            global_ids = dict(qs.values_list("task_id", "started_at"))
+        self.global_active = len(global_ids)
+        self.revoke = []  # task ids replaced by newer runs
+
+        self.redis = None
+        try:
+            client = get_redis()
+            self._reconcile(client, started, global_ids)
+            self.redis = client
+        except Exception as e:
+            print(f"[Workflow Dispatch] Redis unavailable, admitting from WorkflowRun rows only: {e}")
+
+    def _reconcile(self, client, started, global_ids):
+        """Add active runs missing from the admission sets and drop settled entries that are not active."""
+        now = time.time()
+        stale_before = now - settings.WORKFLOW_RUN_STALE_MINUTES * 60
+        settled_before = now - ADMISSION_GRACE_SECONDS
+        sets = {ADMISSION_KEY.format(wid): {t: started[t] for t in ids if t} for wid, ids in self.by_workflow.items()}
+        if self.cap:
+            sets[GLOBAL_ADMISSION_KEY] = {t: at for t, at in global_ids.items() if t}
+
+        pipe = client.pipeline(transaction=False)
+        for key, active in sets.items():
+            if active:
+                pipe.zadd(key, {t: at.timestamp() if at else now for t, at in active.items()}, nx=True)
+            pipe.zremrangebyscore(key, "-inf", stale_before)
+            pipe.zrangebyscore(key, "-inf", settled_before)
+        replies = iter(pipe.execute())
+
+        pipe = client.pipeline(transaction=False)
+        for key, active in sets.items():
+            if active:
+                next(replies)
+            next(replies)
+            gone = [m for m in (_decode(m) for m in next(replies)) if m not in active]
+            if gone:
+                pipe.zrem(key, *gone)
+        pipe.execute()
+
+    def admit(self, scheduler, task_id):
+        """
+        Return (True, None, False) and record the run if it may be queued,
+        or (False, reason, retry) when the policy or the global cap rejects
+        it; retry is True when the run should be tried again later.
+        """
+        policy = getattr(scheduler, "overlap_policy", "allow") or "allow"
+        limit = max(int(getattr(scheduler, "max_queued", 1) or 1), 1)
+
+        if self.redis is not None:
+            try:
+                reply = self.redis.eval(
+                    _ADMIT, 2, ADMISSION_KEY.format(scheduler.workflow_id), GLOBAL_ADMISSION_KEY,
+                    task_id, time.time(), policy, limit, self.cap or 0,
+                )
+            except Exception as e:
+                print(f"[Workflow Dispatch] Redis admission failed, admitting from WorkflowRun rows only: {e}")
+                self.redis = None
+            else:
+                if int(reply[0]) == 1:
+                    self.revoke.extend(_decode(t) for t in reply[1:])
+                    return True, None, False
+                return self._reject(_decode(reply[1]), scheduler.workflow_id, int(reply[2]), limit)
+
+        active = self.by_workflow.setdefault(scheduler.workflow_id, [])
+        replaced = []
+        if policy == "skip" and active:
+            return self._reject("skip", scheduler.workflow_id, len(active), limit)
+        if policy == "queue" and len(active) >= limit:
+            return self._reject("queue", scheduler.workflow_id, len(active), limit)
+        if policy == "replace" and len(active) >= limit:
+            replaced = active[: len(active) - limit + 1]
+
+        if self.cap and self.global_active - len(replaced) >= self.cap:
+            return self._reject("cap", scheduler.workflow_id, self.global_active, limit)
+
+        if replaced:
+            del active[: len(replaced)]
+            self.global_active -= len(replaced)
+            self.revoke.extend(t for t in replaced if t)
+        active.append(task_id)
+        self.global_active += 1
+        return True, None, False
+
+    def _reject(self, code, workflow_id, active, limit):
+        if code == "skip":
+            return False, f"Skipped: workflow {workflow_id} already has {active} active run(s)", False
+        if code == "queue":
+            return False, f"Workflow {workflow_id} already has {active} of {limit} run(s) queued", True
+        return False, f"{active} workflow runs active, limit is {self.cap}", True
+
+    def revoke_replaced(self):
+        """Mark replaced runs REVOKED; call inside the dispatch transaction."""
+        if self.revoke:
+            WorkflowRun.objects.filter(task_id__in=self.revoke, status__in=ACTIVE_STATUSES).update(
+                status="REVOKED", error="Replaced by a newer run", finished_at=timezone.now()
+            )
+            publish_workflow_runs(self.revoke)
+
+    def send_revokes(self, app):
+        """Revoke replaced tasks on the workers; call after commit."""
+        if not self.revoke:
+            return
+        try:
+            app.control.revoke(list(self.revoke), terminate=True, signal="SIGTERM")
+        except Exception as e:
+            print(f"[Workflow Dispatch] Failed to revoke replaced runs {self.revoke}: {e}")
+
+
+__all__ = ["ACTIVE_STATUSES", "AdmissionState", "active_runs", "release_runs"]
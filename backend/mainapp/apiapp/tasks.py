@@ -1,6 +1,15 @@
 # apiapp/tasks.py
 from celery import shared_task
+from django.utils import timezone
+from apiapp.models import ScenarioClass, ScenarioLog, WorkflowRun
+from apiapp.services import result_cache, scenario_fanout, scenario_purge, scenario_storage, scenario_summary
+from apiapp.services.log_retention import compact_logs as compact_old_logs
+from apiapp.services.progress_events import publish_scenarios
 from apiapp.services.scheduler_runner import run_due_workflow_schedules
+from apiapp.services.worker_status import collect_worker_status as collect_worker_snapshot
+from apiapp.services.workflow_dispatch import release_runs
+# Restores revoked task ids on worker_ready; external worker apps import the same module.
+from apiapp.domains.integration.workflow_runtime import revoked as _revoked  # noqa: F401
 
 @shared_task(name="mainserver.run_workflow_schedules")
 def run_workflow_schedules():
@@ -12,3 +21,120 @@ def run_workflow_schedules():
     results = run_due_workflow_schedules()
     print(f"[Celery Scheduler] Results: {results}")
     return results
+
+
+@shared_task(name="mainserver.compact_logs")
+def compact_logs():
+    """
+    Daily retention for WorkflowSchedulerLog / ScenarioLog:
+    rolls rows older than LOG_RETENTION_DAYS into per-day summaries.
+    """
+    results = compact_old_logs()
+    print(f"[Log Retention] Compacted: {results}")
+    return results
+
+
+@shared_task(name="mainserver.collect_worker_status", ignore_result=True)
+def collect_worker_status():
+    """
+    Triggered by Beat every WORKER_STATUS_INTERVAL_SECONDS.
+    Stores the worker snapshot read by WorkersStatusView.
+    """
+    snapshot = collect_worker_snapshot()
+    return len(snapshot["workers"])
+
+
+
+@shared_task(name="mainserver.scenario_chunk_done", ignore_result=True)
+def scenario_chunk_done(result, scenario_id, progress_key, total, window_start, window_end):
+    """Linked to each window of a fanned-out scenario run; logs overall progress."""
+    scenario_fanout.record_chunk_done(scenario_id, progress_key, total, window_start, window_end)
+
+
+@shared_task(name="mainserver.merge_scenario_chunks")
+def merge_scenario_chunks(results, scenario_id, progress_key, boundaries):
+    """Chord callback of a fanned-out scenario run: merges the windows and marks it finished."""
+    removed = scenario_fanout.merge_chunks(scenario_id, boundaries)
+    scenario_fanout.clear_progress(progress_key)
+    ScenarioClass.objects.filter(pk=scenario_id).update(status="SUCCESS")
+    publish_scenarios([scenario_id])
+    ScenarioLog.objects.create(
+        scenario_id=scenario_id,
+        message=f"All {len(results)} periods finished ({removed} duplicate boundary rows merged)",
+        progress=100,
+    )
+    scenario_storage.compact_results(scenario_id)
+    scenario_summary.build_summary(scenario_id)
+    result_cache.invalidate(scenario_id)
+    print(f"[Scenario Fan-out] Scenario {scenario_id}: merged {len(results)} periods")
+    return {"scenario_id": scenario_id, "periods": len(results), "merged": removed}
+
+
+@shared_task(name="mainserver.scenario_chunks_failed", ignore_result=True)
+def scenario_chunks_failed(request, exc, traceback, scenario_id, progress_key):
+    """Errback of the chord: a window failed, so the scenario run failed."""
+    scenario_fanout.clear_progress(progress_key)
+    ScenarioClass.objects.filter(pk=scenario_id).update(status="FAILURE")
+    publish_scenarios([scenario_id])
+    ScenarioLog.objects.create(scenario_id=scenario_id, message=f"Period run failed: {exc}", progress=0)
+    print(f"[Scenario Fan-out] Scenario {scenario_id} failed: {exc}")
+
+
+@shared_task(name="mainserver.build_scenario_summary", ignore_result=True)
+def build_scenario_summary(scenario_id):
+    """
+    Linked to a single-task worker.run_scenario, so it runs when the run
+    succeeds: drops rows equal to the baseline (delta storage), then rolls
+    the results up into ScenarioSummary. Fanned-out runs do the same in
+    merge_scenario_chunks.
+    """
+    scenario_storage.compact_results(scenario_id)
+    rows = scenario_summary.build_summary(scenario_id)
+    result_cache.invalidate(scenario_id)
+    return rows
+
+
+@shared_task(name="mainserver.purge_scenario", ignore_result=True)
+def purge_scenario(scenario_id):
+    """Queued by ScenarioDeleteView: removes a DELETING scenario's results in chunks, then the scenario."""
+    return scenario_purge.purge_scenario(scenario_id)
+
+
+# Statuses a worker may report; the last three finish a run.
+REPORTED_STATUSES = {"STARTED", "RETRY", "SUCCESS", "FAILURE", "REVOKED"}
+FINISHED_STATUSES = {"SUCCESS", "FAILURE", "REVOKED"}
+
+
+@shared_task(name="mainserver.report_task_status", ignore_result=True)
+def report_task_status(task_id, status, error=None):
+    """
+    Sent by workers (app.send_task) when a worker.run_workflow or
+    worker.run_scenario task changes state. Saves the WorkflowRun /
+    ScenarioClass rows of that task, so the change is published to the
+    event streams like any other save.
+    """
+    if status not in REPORTED_STATUSES:
+        print(f"[Task Status] Ignoring status {status!r} reported for {task_id}")
+        return 0
+
+    updated = 0
+    finished = []
+    for run in WorkflowRun.objects.filter(task_id=task_id).defer("output", "timeline"):
+        run.status = status
+        fields = ["status"]
+        if error:
+            run.error = error
+            fields.append("error")
+        if status in FINISHED_STATUSES and not run.finished_at:
+            run.finished_at = timezone.now()
+            fields.append("finished_at")
+        run.save(update_fields=fields)
+        if status in FINISHED_STATUSES:
+            finished.append((run.workflow_id, task_id))
+        updated += 1
+    release_runs(finished)
+    for scenario in ScenarioClass.objects.filter(task_id=task_id).exclude(status=scenario_purge.DELETING):
+        scenario.status = status
+        scenario.save(update_fields=["status"])
+        updated += 1
+    return updated
@@ -1,3 +1,74 @@
-from django.test import TestCase
+import os
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from apiapp.domains.integration.workflow_runtime.dag import analyze_cell, build_dag, run_cells
+
+
+class AnalyzeCellTests(SimpleTestCase):
+    def test_reads_and_writes(self):
+        a = analyze_cell("import math\ny = x + math.pi\nrows[0] = y")
+        self.assertEqual(a.reads, {"x", "rows", "y"})
+        self.assertEqual(a.writes, {"math", "y", "rows"})
+        self.assertEqual(a.imports, {"math"})
+        self.assertFalse(a.barrier)
+
+    def test_function_locals_are_not_globals(self):
+        a = analyze_cell("def f(v):\n    tmp = v * k\n    return tmp\n")
+        self.assertEqual(a.writes, {"f"})
+        self.assertIn("k", a.reads)
+        self.assertNotIn("tmp", a.writes)
+        self.assertTrue(a.defines)
+
+    def test_barriers(self):
+        self.assertTrue(analyze_cell("exec('x = 1')").barrier)
+        self.assertTrue(analyze_cell("from os import *").barrier)
+        self.assertTrue(analyze_cell("x = (").barrier)
+
+
+class RunCellsTests(SimpleTestCase):
+    CELLS = [
+        ("a", "x = 1"),
+        ("b", "y = x + 1"),
+        ("c", "z = 10"),
+        ("d", "w = y + z"),
+    ]
+
+    def test_dependency_order(self):
+        self.assertEqual(build_dag([src for _, src in self.CELLS]), [set(), {0}, set(), {1, 2}])
+        ns = {}
+        timeline = run_cells(ns, self.CELLS, mode="threads")
+        self.assertEqual(ns["w"], 12)
+        self.assertEqual([e["status"] for e in timeline], ["ok"] * 4)
+        self.assertEqual(timeline[3]["depends_on"], [1, 2])
+        for i, entry in enumerate(timeline):
+            for dep in entry["depends_on"]:
+                self.assertLessEqual(timeline[dep]["end"], entry["start"], (dep, i))
+
+    def test_processes_mode(self):
+        ns = {}
+        run_cells(ns, self.CELLS, mode="processes", max_workers=2)
+        self.assertEqual(ns["w"], 12)
+
+    def test_broken_process_pool_falls_back_to_threads(self):
+        # Both cells kill their worker process while in flight; they rerun in threads.
+        kill = "import os\nif os.getpid() != main_pid:\n    os._exit(1)\n{name} = 1"
+        ns = {"main_pid": os.getpid()}
+        timeline = run_cells(
+            ns,
+            [("k1", kill.format(name="k1")), ("k2", kill.format(name="k2"))],
+            mode="processes",
+            max_workers=2,
+        )
+        self.assertEqual((ns["k1"], ns["k2"]), (1, 1))
+        self.assertEqual([e["status"] for e in timeline], ["ok", "ok"])
+
+    def test_cell_exception_stops_dependents(self):
+        reported = []
+        cells = [("a", "x = 1"), ("bad", "y = x / 0"), ("after", "z = y + 1"), ("free", "q = 2")]
+        with self.assertRaises(ZeroDivisionError):
+            run_cells({}, cells, mode="threads", report=reported.extend)
+        statuses = {e["label"]: e["status"] for e in reported}
+        self.assertEqual(statuses["bad"], "error")
+        self.assertEqual(statuses["after"], "skipped")
+        self.assertIn("ZeroDivisionError", next(e["error"] for e in reported if e["label"] == "bad"))
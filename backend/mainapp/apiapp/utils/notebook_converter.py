@@ -4,6 +4,7 @@ import re
 import uuid
 
 LABEL_RE = re.compile(r"^#\s*(.+?)\s+Cell\s*$", re.IGNORECASE)
+NB_CELL_ID_RE = re.compile(r"^[a-zA-Z0-9-_]{1,64}$")
 
 
 def block_to_python(cell):
@@ -35,6 +36,34 @@ def block_to_python(cell):
     return "# Unknown cell type"
 
 
+def python_to_notebook_json(cells, sources) -> str:
+    """
+    Serialize sources as an nbformat v4 notebook.
+
+    Cells are assembled as plain dicts and written without per-cell schema
+    validation; the shape is fixed so there is nothing to validate.
+    """
+    nb_cells = []
+    seen = set()
+    for i, (cell, src) in enumerate(zip(cells, sources)):
+        cid = str(cell.get("id") or "")
+        if not NB_CELL_ID_RE.match(cid) or cid in seen:
+            cid = f"cell-{i}"
+        seen.add(cid)
+        nb_cells.append(
+            {
+                "cell_type": "code",
+                "execution_count": None,
+                "id": cid,
+                "metadata": {},
+                "outputs": [],
+                "source": src,
+            }
+        )
+    nb = {"cells": nb_cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5}
+    return json.dumps(nb, indent=1, ensure_ascii=False) + "\n"
+
+
 def _strip_first_indent_block(src: str) -> str:
     lines = src.splitlines()
     if not lines:
@@ -13,6 +13,7 @@ from apiapp.domains.catalog.views import (
     update_equip_types_and_instances,
 )
 from apiapp.domains.data.views import (
+    ComponentExportView,
     DataSourceComponentCreateView,
     DataSourceComponentDetailView,
     DataSourceComponentsBySourceView,
@@ -27,11 +28,16 @@ from apiapp.domains.data.views import (
 from apiapp.domains.scenario.views import (
     ComponentsByDataSourceView,
     RunScenarioView,
+    ScenarioCompareView,
     ScenarioCreateView,
     ScenarioDeleteView,
+    ScenarioExportView,
     ScenarioListView,
     ScenarioLogsView,
     ScenarioResultsView,
+    ScenarioStatusView,
+    scenario_events,
+    scenario_log_events,
 )
 from apiapp.domains.workflow.views import (
     RunWorkflowSchedulesView,
@@ -41,6 +47,7 @@ from apiapp.domains.workflow.views import (
     WorkflowSchedulerLogViewSet,
     WorkflowSchedulerViewSet,
     WorkflowViewSet,
+    workflow_run_events,
 )
 from apiapp.domains.integration.views import (
     delete_var,
@@ -68,6 +75,7 @@ __all__ = [
     "UpdateInstancesView",
     "update_equip_types_and_instances",
     # data
+    "ComponentExportView",
     "DataSourceComponentCreateView",
     "DataSourceComponentDetailView",
     "DataSourceComponentsBySourceView",
@@ -81,11 +89,16 @@ __all__ = [
     # scenario
     "ComponentsByDataSourceView",
     "RunScenarioView",
+    "ScenarioCompareView",
     "ScenarioCreateView",
     "ScenarioDeleteView",
+    "ScenarioExportView",
     "ScenarioListView",
     "ScenarioLogsView",
     "ScenarioResultsView",
+    "ScenarioStatusView",
+    "scenario_events",
+    "scenario_log_events",
     # workflow
     "RunWorkflowSchedulesView",
     "TaskManagementView",
@@ -94,6 +107,7 @@ __all__ = [
     "WorkflowSchedulerLogViewSet",
     "WorkflowSchedulerViewSet",
     "WorkflowViewSet",
+    "workflow_run_events",
     # integration
     "delete_var",
     "get_module",
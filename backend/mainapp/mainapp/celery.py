@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.schedules import crontab
 from django.conf import settings
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mainapp.settings")
@@ -13,9 +14,23 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
 
 app.conf.beat_schedule = {
-    "check-database-workflow-schedules-every-minute": {
+    "compact-old-logs-daily": {
+        "task": "mainserver.compact_logs",
+        "schedule": crontab(hour=3, minute=15),
+        "options": {"queue": "default"},
+    },
+    "collect-worker-status": {
+        "task": "mainserver.collect_worker_status",
+        "schedule": float(getattr(settings, "WORKER_STATUS_INTERVAL_SECONDS", 15)),
+        # A snapshot older than one interval is useless; don't let them pile up.
+        "options": {"queue": "default", "expires": getattr(settings, "WORKER_STATUS_INTERVAL_SECONDS", 15)},
+    },
+}
+
+# Fallback polling; the run_workflow_scheduler service dispatches schedules on time.
+if getattr(settings, "WORKFLOW_SCHEDULER_BEAT", True):
+    app.conf.beat_schedule["check-database-workflow-schedules-every-minute"] = {
         "task": "mainserver.run_workflow_schedules",
         "schedule": 60.0,
         "options": {"queue": "default"},  # ✅ important!
-    },
-}
\ No newline at end of file
+    }
\ No newline at end of file
@@ -81,6 +81,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "mainapp.wsgi.application"
+# Served by uvicorn workers (see Dockerfile) so event streams don't hold a thread each.
+ASGI_APPLICATION = "mainapp.asgi.application"
 
 # --- Database ---
 DATABASES = {
@@ -158,17 +160,68 @@ MEDIA_ROOT = BASE_DIR / "media"
 # --- Celery / Redis ---
 CELERY_BROKER_URL = env("CELERY_BROKER_URL", default="redis://redis:6379/0")
 CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND", default="redis://redis:6379/1")
+# Per-process pool used by apiapp.services.redis_client
+REDIS_MAX_CONNECTIONS = env.int("REDIS_MAX_CONNECTIONS", default=50)
+REDIS_SOCKET_TIMEOUT = env.float("REDIS_SOCKET_TIMEOUT", default=5.0)
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_DEFAULT_QUEUE = "default"
+# STARTED tells a running task from a queued one when cancelling (services/task_index.py).
+CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_ROUTES = {
     "worker.run_scenario": {"queue": "scenarios"},
     "worker.run_workflow": {"queue": "workflows"},
     "mainserver.run_workflow_schedules": {"queue": "default"},
+    "mainserver.compact_logs": {"queue": "default"},
+    "mainserver.collect_worker_status": {"queue": "default"},
+    "mainserver.scenario_chunk_done": {"queue": "default"},
+    "mainserver.merge_scenario_chunks": {"queue": "default"},
+    "mainserver.scenario_chunks_failed": {"queue": "default"},
+    "mainserver.build_scenario_summary": {"queue": "default"},
+    "mainserver.purge_scenario": {"queue": "default"},
+    "mainserver.report_task_status": {"queue": "default"},
 }
 
+# Worker status shown by WorkersStatusView is collected in the background by beat.
+WORKER_STATUS_INTERVAL_SECONDS = env.int("WORKER_STATUS_INTERVAL_SECONDS", default=15)
+WORKER_STATUS_INSPECT_TIMEOUT = env.float("WORKER_STATUS_INSPECT_TIMEOUT", default=2.0)
+# Dispatched task index / revoked ids kept in Redis for cancellation (apiapp.services.task_index).
+TASK_INDEX_TTL_SECONDS = env.int("TASK_INDEX_TTL_SECONDS", default=7 * 24 * 3600)
+
+# Scenarios whose components all have independent_periods run as one task per window.
+SCENARIO_CHUNK_MONTHS = env.int("SCENARIO_CHUNK_MONTHS", default=12)
+SCENARIO_MAX_CHUNKS = env.int("SCENARIO_MAX_CHUNKS", default=32)
+# Result rows of deleted scenarios are removed in the background, this many per transaction.
+SCENARIO_PURGE_CHUNK_SIZE = env.int("SCENARIO_PURGE_CHUNK_SIZE", default=10000)
+
+# Rows fetched per server-side cursor round trip (and per Parquet row group) in exports.
+EXPORT_CHUNK_ROWS = env.int("EXPORT_CHUNK_ROWS", default=10000)
+
+# Compressed results responses of finished scenarios (apiapp.services.result_cache); 0 disables.
+RESULT_CACHE_MAX_BYTES = env.int("RESULT_CACHE_MAX_BYTES", default=256 * 1024 * 1024)
+RESULT_CACHE_TTL_SECONDS = env.int("RESULT_CACHE_TTL_SECONDS", default=7 * 24 * 3600)
+RESULT_CACHE_COMPRESSION_LEVEL = env.int("RESULT_CACHE_COMPRESSION_LEVEL", default=6)
+
+# Server-Sent Event streams close after this long; EventSource reconnects with since_id.
+SSE_MAX_SECONDS = env.int("SSE_MAX_SECONDS", default=300)
+
+# Workflow schedules: `manage.py run_workflow_scheduler` dispatches them on time.
+# Beat keeps polling every minute as a fallback unless disabled here.
+WORKFLOW_SCHEDULER_BEAT = env.bool("WORKFLOW_SCHEDULER_BEAT", default=True)
+WORKFLOW_SCHEDULER_RESYNC_SECONDS = env.int("WORKFLOW_SCHEDULER_RESYNC_SECONDS", default=300)
+# 0 = no global limit on queued/running workflow runs.
+WORKFLOW_MAX_CONCURRENT_RUNS = env.int("WORKFLOW_MAX_CONCURRENT_RUNS", default=0)
+# Runs still QUEUED/STARTED after this long are treated as dead by the overlap checks.
+WORKFLOW_RUN_STALE_MINUTES = env.int("WORKFLOW_RUN_STALE_MINUTES", default=360)
+# Schedules held back by the overlap policy or the cap are retried this often.
+WORKFLOW_DEFER_RETRY_SECONDS = env.int("WORKFLOW_DEFER_RETRY_SECONDS", default=30)
+
+# Scheduler/scenario logs older than this are rolled up into daily summaries (mainserver.compact_logs).
+LOG_RETENTION_DAYS = env.int("LOG_RETENTION_DAYS", default=30)
+LOG_RETENTION_CHUNK_SIZE = env.int("LOG_RETENTION_CHUNK_SIZE", default=5000)
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Логи — с ротацией и на D:
@@ -2,6 +2,7 @@
 import { useParams, useNavigate } from "react-router-dom";
 import { useEffect, useState } from "react";
 import api from "../utils/axiosInstance";
+import { downloadExport } from "../utils/download";
 import {
   Spinner,
   Alert,
@@ -116,6 +117,9 @@ export default function DataSourcePage() {
     if (sourceName === "Models" && newComponent.file) {
       formData.append("file", newComponent.file);
     }
+    if (sourceName === "Models") {
+      formData.append("independent_periods", newComponent.independent_periods ? "true" : "false");
+    }
 
     try {
       const res = await api.post("/components/", formData);
@@ -249,6 +253,17 @@ export default function DataSourcePage() {
                     </div>
                   </Form.Group>
                 )}
+                {sourceName === "Models" && (
+                  <Form.Group className="mb-3">
+                    <Form.Check
+                      type="checkbox"
+                      id="independent-periods"
+                      label={t("independentPeriods")}
+                      checked={!!newComponent.independent_periods}
+                      onChange={(e) => setNewComponent({ ...newComponent, independent_periods: e.target.checked })}
+                    />
+                  </Form.Group>
+                )}
                 {sourceName === "Models" && (
                   <Form.Group className="mb-3">
                     <Form.Label>{t("componentFile")}</Form.Label>
@@ -486,6 +501,14 @@ export default function DataSourcePage() {
                     </td>
                     <td>{c.description}</td>
                     <td className="d-flex gap-2">
+                      <Button
+                        variant="none"
+                        size="sm"
+                        className="btn-ghost"
+                        onClick={(e) => { e.stopPropagation(); downloadExport(`/components/${c.id}/export/csv/`); }}
+                      >
+                        {t("exportCSV")}
+                      </Button>
                       {(user?.username === c.created_by || role === "admin") && (
                         <Button
                           variant="outline-danger"
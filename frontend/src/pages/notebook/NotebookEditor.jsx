@@ -9,7 +9,7 @@ import { useMonaco } from "@monaco-editor/react";
 import { useParams } from "react-router-dom";
 import { registerPythonProviders } from "./utils/registerPythonProviders";
 import WorkflowTablesConfigModal from "./WorkflowTablesConfigModal";
-import { buildWorkflowTablesBootstrap } from "./utils/buildWorkflowTablesBootstrap";
+import { buildWorkflowTablesBootstrap, buildWorkflowTablesFlush } from "./utils/buildWorkflowTablesBootstrap";
 import {
   ArrowUp,
   ArrowDown,
@@ -44,6 +44,7 @@ export default function NotebookEditor() {
   const [showInputsModal, setShowInputsModal] = useState(false);
   const [inputsConfig, setInputsConfig] = useState({ tabs: [] });
   const [outputsConfig, setOutputsConfig] = useState({ mode: "append", saveTarget: "local", tabs: [] });
+  const [executionMode, setExecutionMode] = useState("sequential");
   const workflowTableHints = useMemo(() => {
     const ident = (name) => {
       const s = String(name || "").replace(/[^a-zA-Z0-9_]/g, "");
@@ -83,6 +84,7 @@ export default function NotebookEditor() {
         setCells(res.data.cells || []);
         setInputsConfig(res.data.inputs_config || { tabs: [] });
         setOutputsConfig(res.data.outputs_config || { mode: "append", saveTarget: "local", tabs: [] });
+        setExecutionMode(res.data.execution_mode || "sequential");
       })
       .catch(err => console.error("Failed to load workflow", err));
     loadVersions();
@@ -158,7 +160,12 @@ export default function NotebookEditor() {
 
   const saveNotebook = async () => {
     try {
-      await api.patch(`/components/workflows/${id}/`, { cells, inputs_config: inputsConfig, outputs_config: outputsConfig });
+      await api.patch(`/components/workflows/${id}/`, {
+        cells,
+        inputs_config: inputsConfig,
+        outputs_config: outputsConfig,
+        execution_mode: executionMode,
+      });
       const payload = await loadVersions();
       if (payload?.active) setSelectedVersion(payload.active);
       alert("Notebook saved successfully!");
@@ -265,7 +272,7 @@ export default function NotebookEditor() {
   const runOne = async (cell) => {
     const userCode = blockToPythonFromCell(cell);
     const bootstrap = buildWorkflowTablesBootstrap(inputsConfig, outputsConfig);
-    const execCode = bootstrap ? bootstrap + "\n\n" + userCode : userCode;
+    const execCode = bootstrap ? bootstrap + "\n\n" + buildWorkflowTablesFlush(userCode) : userCode;
 
     // mark cell as "loading"
     setOutputs((prev) => ({
@@ -414,6 +421,17 @@ export default function NotebookEditor() {
           <Save size={16} /> <span>Outputs</span>
         </button>
 
+        <select
+          className="form-select toolbar-item"
+          value={executionMode}
+          onChange={(e) => setExecutionMode(e.target.value)}
+          title="How the saved workflow runs on workers; parallel modes run independent cells concurrently"
+        >
+          <option value="sequential">Run: sequential</option>
+          <option value="threads">Run: parallel (threads)</option>
+          <option value="processes">Run: parallel (processes)</option>
+        </select>
+
         <button
           className="btn-ghost toolbar-item gap-1"
           onClick={() => setAutoCollapsePrevious((v) => !v)}
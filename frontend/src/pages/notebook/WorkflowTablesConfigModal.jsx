@@ -16,7 +16,7 @@ function ensureConfigShape(config, variant) {
       tabs,
     };
   }
-  return { tabs };
+  return { snapshot: Boolean(base.snapshot), tabs };
 }
 
 function ensureTabDefaults(tab, variant) {
@@ -272,6 +272,21 @@ export default function WorkflowTablesConfigModal({
           </div>
         )}
 
+        {variant === "inputs" && (
+          <div className="form-check">
+            <input
+              id="wf-inputs-snapshot"
+              type="checkbox"
+              className="form-check-input"
+              checked={Boolean(normalized.snapshot)}
+              onChange={(e) => applyConfig({ ...normalized, snapshot: e.target.checked })}
+            />
+            <label htmlFor="wf-inputs-snapshot" className="form-check-label">
+              Reuse input snapshot between runs (until inputs or component data change)
+            </label>
+          </div>
+        )}
+
         {/* Tabs row */}
         <div style={{ display: "flex", gap: 8, flexWrap: "wrap" }}>
           {tabs.map((t) => (
@@ -1,6 +1,7 @@
 import { useEffect, useMemo, useState } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import api from "../../utils/axiosInstance";
+import { downloadExport } from "../../utils/download";
 import { Card, Button, Form, Spinner, Alert } from "react-bootstrap";
 import { Line } from "react-chartjs-2";
 import {
@@ -29,6 +30,15 @@ const toLocalIso = (d) => {
   return new Date(d.getTime() - offsetMs).toISOString().slice(0, 16);
 };
 
+// Monthly overview metrics served from the scenario summary ("" = raw records).
+export const SUMMARY_OPTIONS = [
+  { value: "", label: "Raw" },
+  { value: "average", label: "Monthly average" },
+  { value: "total", label: "Monthly total" },
+  { value: "last", label: "Month end" },
+  { value: "cumulative", label: "Cumulative" },
+];
+
 export default function ScenarioResultsPage() {
   const { scenarioId } = useParams();
   const navigate = useNavigate();
@@ -55,6 +65,7 @@ export default function ScenarioResultsPage() {
   const [start, setStart] = useState("");
   const [end, setEnd] = useState("");
   const [autoRangeSet, setAutoRangeSet] = useState(false);
+  const [summary, setSummary] = useState("");
 
   // Load metadata + unit systems once per scenario
   useEffect(() => {
@@ -108,12 +119,13 @@ export default function ScenarioResultsPage() {
     const loadResults = async () => {
       setLoading(true);
       try {
-        let res;
+        const params = {};
         if (start && end) {
-          res = await api.get(`/scenarios/${scenarioId}/results/`, { params: { start, end } });
-        } else {
-          res = await api.get(`/scenarios/${scenarioId}/results/`);
+          params.start = start;
+          params.end = end;
         }
+        if (summary) params.summary = summary;
+        const res = await api.get(`/scenarios/${scenarioId}/results/`, { params });
         const recs = (res.data && res.data.records) || [];
         setRecords(recs);
         const sn = res.data && res.data.scenario && res.data.scenario.scenario_name;
@@ -139,7 +151,7 @@ export default function ScenarioResultsPage() {
       }
     };
     loadResults();
-  }, [scenarioId, start, end, autoRangeSet]);
+  }, [scenarioId, start, end, autoRangeSet, summary]);
 
   const filteredPointsByInstance = useMemo(() => {
     if (!selectedType || !selectedProperty) return {};
@@ -167,7 +179,8 @@ export default function ScenarioResultsPage() {
       if (!r.date_time) continue;
       const t = new Date(r.date_time);
       if (isNaN(t.getTime())) continue;
-      if (startTs && t.getTime() < startTs) continue;
+      // Monthly points sit on the first of the month, possibly before start.
+      if (startTs && !summary && t.getTime() < startTs) continue;
       if (endTs && t.getTime() > endTs) continue;
 
       let y = Number(r.value);
@@ -184,7 +197,7 @@ export default function ScenarioResultsPage() {
       pointsByInstance[k].sort((a, b) => a.x - b.x);
     }
     return pointsByInstance;
-  }, [records, selectedType, selectedProperty, selectedInstances, start, end, types, instancesMap, propertiesMap, selectedUnitSystemId, unitMapBySystem]);
+  }, [records, selectedType, selectedProperty, selectedInstances, start, end, types, instancesMap, propertiesMap, selectedUnitSystemId, unitMapBySystem, summary]);
 
   const chartData = useMemo(() => {
     const instNames = Object.keys(filteredPointsByInstance);
@@ -229,7 +242,7 @@ export default function ScenarioResultsPage() {
       } } }
     },
     scales: {
-      x: { type: "time", time: { unit: "day" } },
+      x: { type: "time", time: { unit: summary ? "month" : "day" } },
       y: { beginAtZero: false }
     }
   };
@@ -260,7 +273,19 @@ export default function ScenarioResultsPage() {
     <div className="container-fluid">
       <div className="d-flex align-items-center justify-content-between mb-3">
         <h3 className="ds-title" style={{ margin: 0 }}>{scenarioName}</h3>
-        <Button variant="none" className="btn-brand" onClick={() => navigate(-1)}>← Back</Button>
+        <div className="d-flex" style={{ gap: 8 }}>
+          {["csv", "xlsx", "parquet"].map(fmt => (
+            <Button
+              key={fmt}
+              variant="none"
+              className="btn-ghost"
+              onClick={() => downloadExport(`/scenarios/${scenarioId}/export/${fmt}/`, start && end ? { start, end } : {})}
+            >
+              {fmt.toUpperCase()}
+            </Button>
+          ))}
+          <Button variant="none" className="btn-brand" onClick={() => navigate(-1)}>← Back</Button>
+        </div>
       </div>
 
       <div style={{ display: "flex", gap: 16, alignItems: "stretch" }}>
@@ -280,6 +305,18 @@ export default function ScenarioResultsPage() {
                     ))}
                   </Form.Select>
                 </div>
+                <div>
+                  <Form.Label className="ds-title">Resolution</Form.Label>
+                  <Form.Select
+                    className="ds-input form-select"
+                    value={summary}
+                    onChange={e => setSummary(e.target.value)}
+                  >
+                    {SUMMARY_OPTIONS.map(o => (
+                      <option key={o.value} value={o.value}>{o.label}</option>
+                    ))}
+                  </Form.Select>
+                </div>
                 <div>
                   <Form.Label className="ds-title">Object Type</Form.Label>
                   <Form.Select
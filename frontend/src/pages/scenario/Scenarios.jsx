@@ -1,7 +1,9 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import { Card, Button, Form, Table, Modal } from "react-bootstrap";
 import api from "../../utils/axiosInstance";
+import { openEventStream } from "../../utils/eventStream";
+import { fetchPage } from "../../utils/pagination";
 import { useTranslation } from "react-i18next";
 import { useAuth } from "../../context/AuthContext";
 import StartScenarioModal from "./StartScenarioModal";
@@ -99,7 +101,7 @@ function ScenarioTable({ scenarios, sortKey, sortAsc, onSort, onShowLogs, onRowD
               <td>{s.is_approved ? "✔" : "—"}</td>
               <td>{s.description}</td>
               <td style={{ whiteSpace: "nowrap" }}>
-                {canDelete && (
+                {canDelete && s.status !== "DELETING" && (
                   <Button
                     className="btn-brand"
                     variant="None"
@@ -118,6 +120,8 @@ function ScenarioTable({ scenarios, sortKey, sortAsc, onSort, onShowLogs, onRowD
   );
 }
 
+const ACTIVE_STATUSES = ["QUEUED", "PENDING", "STARTED", "RETRY"];
+
 export default function ScenariosPage() {
   const navigate = useNavigate();
   const [scenarios, setScenarios] = useState([]);
@@ -129,6 +133,8 @@ export default function ScenariosPage() {
   const [availableComponents, setAvailableComponents] = useState([]);
   const [selectedComponents, setSelectedComponents] = useState({});
   const [saving, setSaving] = useState(false);
+  const [baselineId, setBaselineId] = useState("");
+  const [deltaStorage, setDeltaStorage] = useState(false);
   const [sortKey, setSortKey] = useState("scenario_name");
   const [sortAsc, setSortAsc] = useState(true);
   const [showOfficial, setShowOfficial] = useState(false);
@@ -143,39 +149,107 @@ export default function ScenariosPage() {
   const [showLogsModal, setShowLogsModal] = useState(false);
   const [logs, setLogs] = useState([]);
   const [logsScenarioName, setLogsScenarioName] = useState("");
+  const [logsScenarioId, setLogsScenarioId] = useState(null);
+  const lastLogId = useRef(null);
   const [showWorkerPanel, setShowWorkerPanel] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  // Search and "show mine" are applied by the server; the list is paged by cursor.
+  const filters = useRef({});
+  filters.current = {
+    ...(showOnlyUser ? { owner: "me" } : {}),
+    ...(searchText.trim() ? { q: searchText.trim() } : {}),
+  };
 
   const fetchScenarios = async () => {
-    const res = await api.get("/scenarios/all/");
-    setScenarios(res.data);
+    const page = await fetchPage("/scenarios/all/", filters.current);
+    setScenarios(page.results);
+    setNextCursor(page.cursor);
   };
 
+  // Periodic refresh of the first page, keeping any further pages already loaded.
+  const refreshScenarios = async () => {
+    const page = await fetchPage("/scenarios/all/", filters.current);
+    const fresh = new Set(page.results.map(s => s.scenario_id));
+    setScenarios(prev => [...page.results, ...prev.filter(s => !fresh.has(s.scenario_id))]);
+  };
+
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage("/scenarios/all/", filters.current, nextCursor);
+      setScenarios(prev => [...prev, ...page.results]);
+      setNextCursor(page.cursor);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  useEffect(() => {
+    const timer = setTimeout(fetchScenarios, 300);
+    return () => clearTimeout(timer);
+  }, [showOnlyUser, searchText]);
+
+  // Reconcile running scenarios with the Celery result backend: one request for all rows.
   useEffect(() => {
     const interval = setInterval(async () => {
-      const updatedScenarios = await Promise.all(
-        scenarios.map(async s => {
-          if (s.celery_task_id && s.status !== "done") {
-            try {
-              const res = await api.get(`/scenarios/${s.scenario_id}/status/`);
-              return { ...s, status: res.data.status, progress: res.data.progress };
-            } catch {
-              return s;
-            }
-          }
-          return s;
-        })
-      );
-      setScenarios(updatedScenarios);
-    }, 3000);
+      const ids = scenarios
+        .filter(s => ACTIVE_STATUSES.includes(s.status))
+        .map(s => s.scenario_id);
+      if (ids.length === 0) return;
+      try {
+        const res = await api.post("/scenarios/status/", { ids });
+        const byId = Object.fromEntries(res.data.map(r => [r.scenario_id, r]));
+        setScenarios(prev =>
+          prev.map(s =>
+            byId[s.scenario_id]
+              ? { ...s, status: byId[s.scenario_id].status, progress: byId[s.scenario_id].progress }
+              : s
+          )
+        );
+      } catch {
+        // next tick retries
+      }
+    }, 15000);
     return () => clearInterval(interval);
   }, [scenarios]);
 
   useEffect(() => {
-    fetchScenarios();
-    const interval = setInterval(fetchScenarios, 5000);
-    return () => clearInterval(interval);
+    // Status changes arrive over the event stream; the refresh only picks up new scenarios.
+    const interval = setInterval(refreshScenarios, 60000);
+    const closeStream = openEventStream("/scenarios/events/", {
+      events: {
+        scenario: (event) =>
+          setScenarios(prev =>
+            event.status === "DELETED"
+              ? prev.filter(s => s.scenario_id !== event.scenario_id)
+              : prev.map(s => (s.scenario_id === event.scenario_id ? { ...s, status: event.status } : s))
+          ),
+      },
+    });
+    return () => {
+      clearInterval(interval);
+      closeStream();
+    };
   }, []);
 
+  // Append new log rows while the log modal is open.
+  useEffect(() => {
+    if (!showLogsModal || !logsScenarioId) return undefined;
+    return openEventStream(`/scenarios/${logsScenarioId}/events/`, {
+      getParams: () => ({ since_id: lastLogId.current ?? "" }),
+      events: {
+        scenario_log: (event) => {
+          if (lastLogId.current != null && event.id <= lastLogId.current) return;
+          lastLogId.current = event.id;
+          setLogs(prev => [...prev, event]);
+        },
+      },
+    });
+  }, [showLogsModal, logsScenarioId]);
+
   useEffect(() => {
     api.get("/components/by-data-source/").then(res => setAvailableComponents(res.data));
     api.get("/me/").then(res => setCurrentUser(res.data.username));
@@ -192,7 +266,10 @@ export default function ScenariosPage() {
     setLogsScenarioName(s.scenario_name);
     try {
       const res = await api.get(`/scenarios/${s.scenario_id}/logs/`);
+      const ids = res.data.map(log => log.id).filter(id => id != null);
+      lastLogId.current = ids.length ? Math.max(...ids) : 0;
       setLogs(res.data);
+      setLogsScenarioId(s.scenario_id);
       setShowLogsModal(true);
     } catch (err) {
       alert(t("failedLoadLogs"));
@@ -209,12 +286,16 @@ export default function ScenariosPage() {
       await api.post("/scenarios/create/", {
         scenario_name: scenarioName,
         description,
-        components: componentsArr
+        components: componentsArr,
+        baseline_id: baselineId || null,
+        storage_mode: baselineId && deltaStorage ? "delta" : "full"
       });
       setShowModal(false);
       setScenarioName("");
       setDescription("");
       setSelectedComponents({});
+      setBaselineId("");
+      setDeltaStorage(false);
     } catch (err) {
       alert("Error: " + err.message);
     }
@@ -233,21 +314,15 @@ export default function ScenariosPage() {
   const handleDeleteScenario = async (s) => {
     if (!window.confirm(t("deleteConfirm") || "Delete this scenario?")) return;
     try {
+      // Results are purged in the background; the row goes away on the "DELETED" event.
       await api.delete(`/scenarios/${s.scenario_id}/delete/`);
-      await fetchScenarios();
+      setScenarios(prev => prev.map(x => (x.scenario_id === s.scenario_id ? { ...x, status: "DELETING" } : x)));
     } catch (err) {
       alert(t("deleteError") || ("Error deleting: " + err.message));
     }
   };
 
-  // Filter scenarios by search and user
-  const filteredScenarios = scenarios.filter(s => {
-    const matchesSearch = (s.scenario_name || "").toLowerCase().includes(searchText.toLowerCase());
-    const matchesUser = !showOnlyUser || (s.created_by === currentUser);
-    return matchesSearch && matchesUser;
-  });
-
-  const sortedScenarios = [...filteredScenarios].sort((a, b) => {
+  const sortedScenarios = [...scenarios].sort((a, b) => {
     let aVal = a[sortKey];
     let bVal = b[sortKey];
 
@@ -327,6 +402,13 @@ export default function ScenariosPage() {
         onDelete={handleDeleteScenario}
         canDelete={role !== "guest"}
       />
+      {nextCursor && (
+        <div className="text-center mt-2">
+          <button className="btn btn-ghost" onClick={loadMore} disabled={loadingMore}>
+            {loadingMore ? t("loading") : t("loadMore")}
+          </button>
+        </div>
+      )}
 
       {/* Create Scenario Modal */}
       <Modal show={showModal} onHide={() => setShowModal(false)} size="lg" centered>
@@ -400,6 +482,31 @@ export default function ScenariosPage() {
                 )}
               </Form.Group>
             ))}
+
+            <Form.Group className="mb-3">
+              <Form.Label className="ds-title">{t("baselineScenario")}</Form.Label>
+              <Form.Select
+                value={baselineId}
+                onChange={e => setBaselineId(e.target.value)}
+                style={{ maxWidth: 400 }}
+                className="ds-input form-select"
+              >
+                <option value="">—</option>
+                {scenarios.map(s => (
+                  <option key={s.scenario_id} value={s.scenario_id}>{s.scenario_name}</option>
+                ))}
+              </Form.Select>
+              {baselineId && (
+                <Form.Check
+                  type="switch"
+                  id="delta-storage-switch"
+                  label={t("storeDifferencesOnly")}
+                  checked={deltaStorage}
+                  onChange={() => setDeltaStorage(v => !v)}
+                  className="brand-switch mt-2"
+                />
+              )}
+            </Form.Group>
           </Form>
         </Modal.Body>
         <Modal.Footer>
@@ -58,6 +58,8 @@ export default function WorkerStatusPanel() {
           <tr>
             <th>{t("server")}</th>
             <th>{t("status")}</th>
+            <th>{t("activeTasks")}</th>
+            <th>{t("lastSeen")}</th>
           </tr>
         </thead>
         <tbody>
@@ -68,11 +70,13 @@ export default function WorkerStatusPanel() {
                 <td>
                   <BrandBadge text={w.status} />
                 </td>
+                <td>{w.active_tasks ?? "—"}</td>
+                <td>{w.last_seen ? new Date(w.last_seen).toLocaleString() : "—"}</td>
               </tr>
             ))
           ) : (
             <tr>
-              <td colSpan="2" className="text-center text-muted">
+              <td colSpan="4" className="text-center text-muted">
                 {t("noWorkersFound")}
               </td>
             </tr>
@@ -134,6 +138,11 @@ export default function WorkerStatusPanel() {
   return (
     <Card className="ds-card p-4">
       <h4 className="ds-heading mb-3">{t("serverStatus")}</h4>
+      {statuses.licenses?.enabled && (
+        <div className="mb-3">
+          <BrandBadge text={t("licenseSlots", statuses.licenses)} />
+        </div>
+      )}
 
       {renderWorkerTable(statuses.workers)}
       {renderTable(statuses.PENDING, "PENDING")}
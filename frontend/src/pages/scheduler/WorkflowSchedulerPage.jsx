@@ -1,5 +1,6 @@
 import { useEffect, useState } from "react";
 import api from "../../utils/axiosInstance";
+import { openEventStream } from "../../utils/eventStream";
 import { FiFileText, FiTrash2, FiPlay, FiClock, FiXCircle, FiLoader, FiCheckCircle } from "react-icons/fi";
 import Cron from "react-js-cron";
 import "react-js-cron/dist/styles.css"; // стандартные стили
@@ -55,6 +56,10 @@ export default function WorkflowSchedulerPage() {
       alert("Workflow scheduled to run now");
       fetchSchedulers();
     } catch (err) {
+      if (err.response?.status === 409) {
+        alert(err.response.data?.reason || "Run skipped by the overlap policy");
+        return;
+      }
       alert("Ошибка запуска расписания");
       console.error(err);
     }
@@ -114,6 +119,8 @@ export default function WorkflowSchedulerPage() {
     setEditForm({
       id: scheduler.id,
       cron_expression: scheduler.cron_expression || "0 0 * * *",
+      overlap_policy: scheduler.overlap_policy || "allow",
+      max_queued: scheduler.max_queued || 1,
     });
     setShowEdit(true);
   };
@@ -128,6 +135,8 @@ export default function WorkflowSchedulerPage() {
     if (!editForm) return;
     await api.patch(`workflow-schedulers/${editForm.id}/`, {
       cron_expression: editForm.cron_expression,
+      overlap_policy: editForm.overlap_policy,
+      max_queued: Number(editForm.max_queued) || 1,
     });
     closeEdit();
     fetchSchedulers();
@@ -138,6 +147,27 @@ export default function WorkflowSchedulerPage() {
     fetchWorkflows();
   }, []);
 
+  // Live run status while the run history is open.
+  useEffect(() => {
+    if (!showLogs || !activeScheduler) return undefined;
+    return openEventStream("/workflows/runs/events/", {
+      params: { workflow_id: activeScheduler.workflow },
+      events: {
+        workflow_run: (event) => {
+          setRuns((prev) => {
+            const { type, ...fields } = event;
+            const index = prev.findIndex((r) => r.id === event.id);
+            if (index === -1) return [fields, ...prev];
+            const next = [...prev];
+            next[index] = { ...next[index], ...fields };
+            return next;
+          });
+          setActiveRun((prev) => (prev && prev.id === event.id ? { ...prev, ...event } : prev));
+        },
+      },
+    });
+  }, [showLogs, activeScheduler]);
+
   return (
     <div className="container-fluid mt-4">
       <div className="ds-card p-4">
@@ -376,6 +406,35 @@ export default function WorkflowSchedulerPage() {
                               </pre>
                             </>
                           )}
+                          {activeRun.timeline?.length > 0 && (
+                            <>
+                              <h6 className="mt-3">Cell timeline:</h6>
+                              <table className="table table-sm">
+                                <thead>
+                                  <tr>
+                                    <th>Cell</th>
+                                    <th>After</th>
+                                    <th>Worker</th>
+                                    <th>Start</th>
+                                    <th>Duration, ms</th>
+                                    <th>Status</th>
+                                  </tr>
+                                </thead>
+                                <tbody>
+                                  {activeRun.timeline.map((c) => (
+                                    <tr key={c.index} title={c.error || ""}>
+                                      <td>{c.label}</td>
+                                      <td>{(c.depends_on || []).map((i) => i + 1).join(", ") || "-"}</td>
+                                      <td>{c.worker || "-"}</td>
+                                      <td>{c.start ? new Date(c.start).toLocaleTimeString() : "-"}</td>
+                                      <td>{c.duration_ms ?? "-"}</td>
+                                      <td className={c.status === "error" ? "text-danger" : ""}>{c.status}</td>
+                                    </tr>
+                                  ))}
+                                </tbody>
+                              </table>
+                            </>
+                          )}
                         </>
                       ) : (
                         <p>Select a run from the left</p>
@@ -426,6 +485,32 @@ export default function WorkflowSchedulerPage() {
                         ))}
                       </select>
                     </div>
+                    <div className="mt-3 row g-2">
+                      <div className="col-8">
+                        <label className="form-label">If previous runs are still active</label>
+                        <select
+                          className="ds-input form-select"
+                          value={editForm.overlap_policy}
+                          onChange={(e) => setEditForm({ ...editForm, overlap_policy: e.target.value })}
+                        >
+                          <option value="allow">Always queue</option>
+                          <option value="skip">Skip if running</option>
+                          <option value="queue">Queue at most N</option>
+                          <option value="replace">Replace oldest</option>
+                        </select>
+                      </div>
+                      <div className="col-4">
+                        <label className="form-label">N</label>
+                        <input
+                          type="number"
+                          min={1}
+                          className="ds-input form-control"
+                          value={editForm.max_queued}
+                          disabled={!["queue", "replace"].includes(editForm.overlap_policy)}
+                          onChange={(e) => setEditForm({ ...editForm, max_queued: e.target.value })}
+                        />
+                      </div>
+                    </div>
                   </div>
                   <div className="modal-footer">
                     <button type="button" className="btn btn-secondary" onClick={closeEdit}>
@@ -1,6 +1,8 @@
 import { useEffect, useMemo, useState } from "react";
 import { useParams, useNavigate, useSearchParams } from "react-router-dom";
 import api from "../../utils/axiosInstance";
+import { fetchAllPages } from "../../utils/pagination";
+import { SUMMARY_OPTIONS } from "../results/ScenarioResultsPage";
 import { Card, Button, Form, Spinner, Alert, Modal } from "react-bootstrap";
 import { Line } from "react-chartjs-2";
 import {
@@ -72,6 +74,7 @@ export default function VisualAnalysisBuilder() {
 
   const [start, setStart] = useState("");
   const [end, setEnd] = useState("");
+  const [summary, setSummary] = useState("");
 
   // Initialize selected scenarios from URL once (supports scenarioIds or legacy scenarioId)
   useEffect(() => {
@@ -90,8 +93,7 @@ export default function VisualAnalysisBuilder() {
   useEffect(() => {
     const loadScenarios = async () => {
       try {
-        const scRes = await api.get(`/scenarios/all/`);
-        const all = scRes.data || [];
+        const all = await fetchAllPages("/scenarios/all/");
         // Hide scenarios with ERROR or NEW status from the selector
         const filtered = all.filter(s => {
           const status = String(s.status || "").toUpperCase();
@@ -257,7 +259,16 @@ export default function VisualAnalysisBuilder() {
     setDataLoading(true);
     setHasFetched(true);
     try {
-      if (selectedScenarioIds.length > 0) {
+      if (selectedScenarioIds.length > 0 && summary) {
+        // Monthly overview of all selected scenarios in one request.
+        const params = { ids: selectedScenarioIds.join(","), summary };
+        if (start) params.start = start;
+        if (end) params.end = end;
+        const res = await api.get("/scenarios/compare/", { params });
+        setRecords(res.data.records || []);
+        const names = (res.data.scenarios || []).map(s => s.scenario_name);
+        setComponentName(names.length ? names.join(", ") : "Scenarios");
+      } else if (selectedScenarioIds.length > 0) {
         const params = {};
         if (start) params.start = start;
         if (end) params.end = end;
@@ -354,7 +365,8 @@ export default function VisualAnalysisBuilder() {
   // Build series for global (1x1) mode
   const preparedSeries = useMemo(() => {
     if (!selectedType || (!selectedProperty && selectedScenarioIds.length !== 1)) return { mode: "instance", seriesMap: {} };
-    const startTs = start ? new Date(start).getTime() : null;
+    // Monthly points sit on the first of the month, possibly before start.
+    const startTs = start && !summary ? new Date(start).getTime() : null;
     const endTs = end ? new Date(end).getTime() : null;
 
     const typeIdByName = Object.fromEntries(types.map(t => [t.name, t.id]));
@@ -454,7 +466,7 @@ export default function VisualAnalysisBuilder() {
       pointsByInstance[k].sort((a, b) => a.x - b.x);
     }
     return { mode: "instance", seriesMap: pointsByInstance };
-  }, [records, types, instancesMap, propertiesMap, selectedType, selectedProperty, selectedProperties, selectedInstances, start, end, isScenarioCompare, selectedScenarioIds.length, selectedUnitSystemId, unitMapBySystem, scenarios]);
+  }, [records, types, instancesMap, propertiesMap, selectedType, selectedProperty, selectedProperties, selectedInstances, start, end, isScenarioCompare, selectedScenarioIds.length, selectedUnitSystemId, unitMapBySystem, scenarios, summary]);
 
   // Build series for a given set of instance names (per-panel)
   const buildSeriesForPanel = (panelCfg) => {
@@ -463,7 +475,8 @@ export default function VisualAnalysisBuilder() {
     const propertyNames = (panelCfg?.properties && panelCfg.properties.length > 0) ? panelCfg.properties : (propertyName ? [propertyName] : []);
     const instanceNames = panelCfg?.instances || [];
     if (!typeName || propertyNames.length === 0) return { mode: "instance", seriesMap: {} };
-    const startTs = start ? new Date(start).getTime() : null;
+    // Monthly points sit on the first of the month, possibly before start.
+    const startTs = start && !summary ? new Date(start).getTime() : null;
     const endTs = end ? new Date(end).getTime() : null;
 
     const typeIdByName = Object.fromEntries(types.map(t => [t.name, t.id]));
@@ -666,6 +679,20 @@ export default function VisualAnalysisBuilder() {
                     ))}
                   </Form.Select>
                 </div>
+                {selectedScenarioIds.length > 0 && (
+                  <div>
+                    <Form.Label className="ds-title">Resolution</Form.Label>
+                    <Form.Select
+                      className="ds-input form-select"
+                      value={summary}
+                      onChange={e => setSummary(e.target.value)}
+                    >
+                      {SUMMARY_OPTIONS.map(o => (
+                        <option key={o.value} value={o.value}>{o.label}</option>
+                      ))}
+                    </Form.Select>
+                  </div>
+                )}
                 <div>
                   <Form.Label className="ds-title">Start</Form.Label>
                   <Form.Control type="datetime-local" className="ds-input" value={start} onChange={e => setStart(e.target.value)} />
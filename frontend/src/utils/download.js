@@ -0,0 +1,16 @@
+import API from "../links.jsx";
+import api from "./axiosInstance";
+import { getAccessToken } from "./auth";
+
+// Server-side exports (csv/xlsx/parquet) are streamed by the backend; a plain
+// navigation lets the browser save them to disk instead of holding them in
+// memory. Navigation can't send headers, so the access token goes in the query.
+export async function downloadExport(path, params = {}) {
+  try {
+    await api.get("/me/"); // refreshes an expired access token
+  } catch {
+    // the API client handles logout
+  }
+  const query = new URLSearchParams({ ...params, token: getAccessToken() || "" });
+  window.location.assign(`${API}${path}?${query}`);
+}
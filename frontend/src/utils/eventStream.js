@@ -0,0 +1,56 @@
+import API from "../links.jsx";
+import api from "./axiosInstance";
+import { getAccessToken } from "./auth";
+
+// Server-Sent Events from the backend (scenario logs/status, workflow runs).
+// EventSource can't send an Authorization header, so the access token goes in
+// the query string. Streams end every few minutes or when the token expires;
+// we then refresh the token through the API client and reconnect.
+export function openEventStream(path, { params = {}, getParams, events = {} } = {}) {
+  let source = null;
+  let timer = null;
+  let closed = false;
+  let delay = 3000;
+
+  const connect = () => {
+    if (closed) return;
+    const query = new URLSearchParams({
+      ...params,
+      ...(getParams ? getParams() : {}),
+      token: getAccessToken() || "",
+    });
+    source = new EventSource(`${API}${path}?${query}`);
+
+    Object.entries(events).forEach(([type, handler]) => {
+      source.addEventListener(type, (e) => handler(JSON.parse(e.data)));
+    });
+    source.addEventListener("open", () => {
+      delay = 3000;
+    });
+    // Backend can't reach Redis: back off.
+    source.addEventListener("unavailable", () => {
+      delay = 30000;
+    });
+
+    source.onerror = () => {
+      source.close();
+      if (closed) return;
+      timer = setTimeout(async () => {
+        try {
+          await api.get("/me/"); // refreshes an expired access token
+        } catch {
+          // keep retrying; the API client handles logout
+        }
+        connect();
+      }, delay);
+    };
+  };
+
+  connect();
+
+  return () => {
+    closed = true;
+    clearTimeout(timer);
+    if (source) source.close();
+  };
+}
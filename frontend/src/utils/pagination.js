@@ -0,0 +1,29 @@
+import api from "./axiosInstance";
+
+// Cursor-paginated list endpoints return { next, previous, results }; `next`
+// is an absolute URL, so only its cursor is passed back through the API client.
+export function cursorFrom(url) {
+  if (!url) return null;
+  try {
+    return new URL(url, window.location.origin).searchParams.get("cursor");
+  } catch {
+    return null;
+  }
+}
+
+export async function fetchPage(path, params = {}, cursor = null) {
+  const res = await api.get(path, { params: cursor ? { ...params, cursor } : params });
+  return { results: res.data.results || [], cursor: cursorFrom(res.data.next) };
+}
+
+// Every page, for selectors that need the full list.
+export async function fetchAllPages(path, params = {}) {
+  const all = [];
+  let cursor = null;
+  do {
+    const page = await fetchPage(path, params, cursor);
+    all.push(...page.results);
+    cursor = page.cursor;
+  } while (cursor);
+  return all;
+}